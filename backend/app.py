@@ -4,26 +4,85 @@ REST API for the project planning backend.
 UPDATED: reflection-insights endpoint now handles NEW format (prompts + answers).
 """
 
+import json
 import logging
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from datetime import date, datetime, timedelta
 from io import BytesIO
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Response, request, jsonify, send_file
 from flask_cors import CORS
-from config import FLASK_DEBUG, FLASK_ENV
-from safety import handle_error_safely
+from config import (
+    BADGE_BATCH_MAX_ITEMS,
+    BREAKDOWN_BACKGROUND_WORKERS,
+    BREAKDOWN_MAX_PENDING,
+    BREAKDOWN_MAX_WAITERS,
+    BREAKDOWN_MAX_WAIT_SECONDS,
+    BREAKDOWN_RESULT_MAX_ENTRIES,
+    BREAKDOWN_RESULT_TTL_SECONDS,
+    FLASK_DEBUG,
+    EXPORT_BATCH_MAX_PROJECTS,
+    EXPORT_BATCH_TIMEOUT_SECONDS,
+    EXPORT_CACHE_MAX_BYTES,
+    EXPORT_JOB_MAX_ENTRIES,
+    EXPORT_JOB_MAX_PENDING,
+    EXPORT_JOB_MAX_RESULT_BYTES,
+    EXPORT_JOB_TTL_SECONDS,
+    EXPORT_JOB_WORKERS,
+    FLASK_ENV,
+    PDF_RENDER_MAX_QUEUE,
+    PDF_RENDER_PROCESSES,
+    PDF_RENDER_RETRY_AFTER_SECONDS,
+    PDF_RENDER_START_METHOD,
+    PDF_RENDER_TIMEOUT_SECONDS,
+    PDF_WARMUP,
+    SAFETY_SCAN_MAX_ITEMS,
+    SCHOOL_HOLIDAYS,
+    STARTUP_WARMUP,
+    TIMELINE_ESTIMATE_MAX_HANDLES
+)
+from safety import (
+    get_keyword_matcher,
+    handle_error_safely,
+    scan_texts,
+    start_keyword_watcher
+)
 from core_logic import (
     validate_project,
     validate_success_criteria,
     validate_timeline,
     validate_team_balance,
-    award_badges
+    schedule_tasks,
+    get_availability_calendar,
+    parse_holidays,
+    TimelineEstimate,
+    DEFAULT_HOURS_PER_DAY,
+    award_badges,
+    award_badges_batch,
+    award_badges_for_reflection
+)
+from export_formats import EXPORT_FORMATS, export_mimetypes, find_export_format
+from pdf_export import (
+    PdfRenderPool,
+    RenderPoolBusy,
+    export_etag,
+    export_filename,
+    iter_zip,
+    warm_pdf_renderer
 )
+from result_store import ByteCache, ResultStore
 from utils import (
     detect_project_type,
     generate_tasks_with_context,
+    instant_task_plan,
+    refine_task,
     estimate_timeline_with_context,
     generate_adaptive_reflection_prompts,
     generate_reflection_insights,
-    export_project_to_pdf
+    setup_error_logging,
+    warm_claude_client
 )
 
 # Setup logging
@@ -38,13 +97,50 @@ app = Flask(__name__)
 CORS(app)
 app.config['JSON_SORT_KEYS'] = False
 
+# Log Claude failures to the error log file
+setup_error_logging()
+
+# Pick up safety keyword edits without a restart
+start_keyword_watcher()
+
+
+# ===== WARM-UP =====
+
+def warm_up():
+    """
+    Do the slow one-off setup now rather than in the first requests: import the
+    Claude SDK and (when PDFs render in this process) build the PDF renderer.
+    """
+    warm_claude_client()
+    # Render processes warm themselves when they start
+    if PDF_WARMUP and PDF_RENDER_PROCESSES <= 0:
+        warm_pdf_renderer()
+
+
+_warm_up_thread = None
+if STARTUP_WARMUP == "blocking":
+    warm_up()
+elif STARTUP_WARMUP == "background":
+    _warm_up_thread = threading.Thread(target=warm_up, name="warm-up", daemon=True)
+    _warm_up_thread.start()
+
+
+def wait_for_warm_up(timeout: float = None):
+    """Block until a background warm-up is done (e.g. before forking workers)."""
+    if _warm_up_thread is not None:
+        _warm_up_thread.join(timeout)
+
 
 # ===== HEALTH CHECK =====
 
 @app.route("/health", methods=["GET"])
 def health_check():
     """Health check endpoint for deployment monitoring."""
-    return jsonify({"status": "ok", "environment": FLASK_ENV}), 200
+    return jsonify({
+        "status": "ok",
+        "environment": FLASK_ENV,
+        "safety_keywords_version": get_keyword_matcher().version
+    }), 200
 
 
 # ===== PROJECT CREATION & VALIDATION =====
@@ -126,6 +222,41 @@ def detect_type():
 
 # ===== LAYER 2: TASK BREAKDOWN (Context-Aware) =====
 
+# Instant mode: revision token -> latest plan for that request
+_breakdown_results = ResultStore(BREAKDOWN_RESULT_TTL_SECONDS, BREAKDOWN_RESULT_MAX_ENTRIES)
+_breakdown_executor = ThreadPoolExecutor(max_workers=BREAKDOWN_BACKGROUND_WORKERS, thread_name_prefix="breakdown")
+# One slot per upgrade queued or running, so a burst can't queue Claude calls without limit
+_breakdown_slots = threading.BoundedSemaphore(BREAKDOWN_MAX_PENDING)
+# Long polls hold a request thread each; past this many, polls answer without waiting
+_breakdown_waiters = threading.BoundedSemaphore(BREAKDOWN_MAX_WAITERS)
+
+
+def _upgrade_breakdown(token: str, context: dict):
+    """Background: replace the instant plan with Claude's plan (revision 1)."""
+    try:
+        if _breakdown_results.get(token) is None:
+            logger.info("Skipping task breakdown upgrade: plan expired while queued")
+            return
+        try:
+            result = generate_tasks_with_context(**context)
+        except Exception as e:
+            error = handle_error_safely(e, "_upgrade_breakdown")
+            logger.error(f"Background task breakdown error: {error['internal_error']}")
+            result = None
+    finally:
+        _breakdown_slots.release()
+
+    plan = _breakdown_results.get(token)
+    if plan is None:
+        return  # expired while Claude was working; nobody can fetch it any more
+    plan = dict(plan)
+    plan["revision"] = 1
+    plan["status"] = "done"
+    if result:
+        plan.update(tasks=result["tasks"], source=result["source"], message=result["message"])
+    _breakdown_results.put(token, plan)
+
+
 @app.route("/api/projects/break-down", methods=["POST"])
 def break_down_tasks():
     """
@@ -138,14 +269,18 @@ def break_down_tasks():
         "experience_level": str (beginner/intermediate/advanced),
         "team_size": str (1/2-3/4+),
         "goal": str (student's stated goal),
-        "brainstorm_ideas": str (student's brainstorm ideas)
+        "brainstorm_ideas": str (student's brainstorm ideas),
+        "mode": "instant" (optional: answer now with a template plan, upgrade in the background)
     }
 
     Returns: {
         "tasks": list of {task, hours, difficulty},
-        "source": "claude" or "fallback",
+        "source": "claude", "library" (precomputed, generic requests), "similar" (near-duplicate request) or "fallback",
         "message": str or null
     }
+    In instant mode also {"revision_token": str, "revision": 0, "status": "pending"} -
+    poll GET /api/projects/break-down/<revision_token> for the upgraded plan.
+    When too many upgrades are already waiting, status is "done" and the starter plan is final.
     """
     logger.info("POST /api/projects/break-down - Task breakdown requested")
     try:
@@ -165,15 +300,35 @@ def break_down_tasks():
                 "source": "fallback"
             }), 400
 
-        result = generate_tasks_with_context(
-            project_title=title,
-            project_description=description,
-            project_type=project_type,
-            experience_level=experience_level,
-            team_size=team_size,
-            goal=goal,
-            brainstorm_ideas=brainstorm_ideas
-        )
+        context = {
+            "project_title": title,
+            "project_description": description,
+            "project_type": project_type,
+            "experience_level": experience_level,
+            "team_size": team_size,
+            "goal": goal,
+            "brainstorm_ideas": brainstorm_ideas
+        }
+
+        if data.get('mode') == 'instant':
+            token = uuid.uuid4().hex
+            plan = {
+                "revision_token": token,
+                "revision": 0,
+                "status": "pending",
+                **instant_task_plan(project_type, experience_level, team_size, goal, brainstorm_ideas),
+                "message": "Here's a starter plan. A plan made for your project is on its way!"
+            }
+            if _breakdown_slots.acquire(blocking=False):
+                _breakdown_results.put(token, plan)
+                _breakdown_executor.submit(_upgrade_breakdown, token, context)
+            else:
+                logger.warning("Task breakdown upgrades full; answering with the starter plan only")
+                plan.update(status="done", message="Here's a starter plan. Edit the tasks to match your project!")
+                _breakdown_results.put(token, plan)
+            return jsonify(plan), 200
+
+        result = generate_tasks_with_context(**context)
 
         return jsonify({
             "tasks": result["tasks"],
@@ -191,6 +346,99 @@ def break_down_tasks():
         }), 500
 
 
+@app.route("/api/projects/break-down/<token>", methods=["GET"])
+def break_down_result(token):
+    """
+    Latest plan for an instant-mode breakdown.
+
+    Query: after=<revision> and wait=<seconds> (optional) - hold the request until a
+    revision newer than `after` exists, up to BREAKDOWN_MAX_WAIT_SECONDS. Only
+    BREAKDOWN_MAX_WAITERS polls wait at once; others get the current plan right away.
+
+    Returns: {"revision_token", "revision", "status": "pending"/"done", "tasks", "source", "message"}
+             404 if the token is unknown or expired.
+    """
+    try:
+        after = request.args.get('after', -1, type=int)
+        wait = min(max(request.args.get('wait', 0, type=float), 0), BREAKDOWN_MAX_WAIT_SECONDS)
+
+        if wait > 0 and _breakdown_waiters.acquire(blocking=False):
+            try:
+                plan = _breakdown_results.wait_for(token, lambda p: p["revision"] > after, wait)
+            finally:
+                _breakdown_waiters.release()
+        else:
+            plan = _breakdown_results.get(token)
+        if plan is None:
+            return jsonify({"error": "This plan has expired. Please generate tasks again."}), 404
+
+        return jsonify(plan), 200
+
+    except Exception as e:
+        error = handle_error_safely(e, "break_down_result")
+        return jsonify({"error": error["user_message"]}), 500
+
+
+@app.route("/api/projects/tasks/refine", methods=["POST"])
+def refine_task_endpoint():
+    """
+    Rewrite one task the student doesn't like, without regenerating the whole plan.
+
+    Request: {
+        "task": {task, hours, difficulty},
+        "project_title": str,
+        "project_type": str,
+        "experience_level": str,
+        "team_size": str,
+        "other_tasks": list of {task} (optional, so the rewrite doesn't repeat them),
+        "feedback": str (optional, what to change),
+        "count": 1 or 2 (optional, number of replacement tasks)
+    }
+
+    Returns: {
+        "tasks": list of {task, hours, difficulty},
+        "source": "claude" or "original",
+        "message": str or null
+    }
+    """
+    logger.info("POST /api/projects/tasks/refine - Single task refine requested")
+    try:
+        data = request.json or {}
+        task = data.get('task')
+        title = data.get('project_title', '')
+        feedback = data.get('feedback', '')
+
+        if not isinstance(task, dict) or not task.get('task') or not title:
+            return jsonify({"error": "Task and project title required", "tasks": [], "source": "original"}), 400
+
+        try:
+            count = min(max(int(data.get('count', 1)), 1), 2)
+        except (ValueError, TypeError):
+            count = 1
+
+        other_tasks = data.get('other_tasks') or []
+        if not isinstance(other_tasks, list):
+            other_tasks = []
+
+        result = refine_task(
+            task=task,
+            project_title=title,
+            project_type=data.get('project_type', 'other'),
+            experience_level=data.get('experience_level', 'beginner'),
+            team_size=data.get('team_size', '1'),
+            other_tasks=other_tasks,
+            feedback=feedback if isinstance(feedback, str) else '',
+            count=count
+        )
+
+        return jsonify(result), 200
+
+    except Exception as e:
+        error = handle_error_safely(e, "refine_task_endpoint")
+        logger.error(f"Task refine error: {error['internal_error']}")
+        return jsonify({"error": error["user_message"], "tasks": [], "source": "original"}), 500
+
+
 # ===== LAYER 2B: TIMELINE ESTIMATION (Context-Aware) =====
 
 @app.route("/api/projects/estimate-timeline", methods=["POST"])
@@ -202,8 +450,10 @@ def estimate_timeline():
         "tasks": list of {hours: int},
         "deadline_days": int,
         "experience_level": str (beginner/intermediate/advanced),
-        "team_size": str (1/2-3/4+)
+        "team_size": str (1/2-3/4+),
+        "hours_by_weekday", "holidays": (optional) school calendar, as for validate-timeline
     }
+    Available hours count only school days (weekends, SCHOOL_HOLIDAYS and holidays are off).
 
     Returns: {
         "total_hours": int,
@@ -230,11 +480,21 @@ def estimate_timeline():
                 "realistic": False
             }), 400
 
+        try:
+            deadline_days = max(int(deadline_days), 1)
+        except (ValueError, TypeError):
+            return jsonify({"error": "Invalid deadline days"}), 400
+
+        calendar, error = _calendar_from_request(data)
+        if error:
+            return jsonify({"error": error}), 400
+
         result = estimate_timeline_with_context(
             tasks=tasks,
             deadline_days=deadline_days,
             experience_level=experience_level,
-            team_size=team_size
+            team_size=team_size,
+            calendar=calendar
         )
 
         return jsonify(result), 200
@@ -250,6 +510,108 @@ def estimate_timeline():
         }), 500
 
 
+# ===== LAYER 2C: LIVE TIMELINE (Single-task edits) =====
+
+# estimate_id -> TimelineEstimate, oldest first (per process)
+_timeline_estimates = OrderedDict()
+_timeline_estimates_lock = threading.Lock()
+
+
+@app.route("/api/projects/timeline-estimates", methods=["POST"])
+def create_timeline_estimate():
+    """
+    Start a live timeline estimate that later edits update one task at a time.
+
+    Request: {
+        "tasks": list of {hours, assigned_to (optional), id (optional)},
+        "deadline_date": ISO date string (or "deadline_days": int at 2h per day),
+        "hours_by_weekday", "holidays": (optional) school calendar, as for validate-timeline
+    }
+
+    Returns: {"estimate_id": str, "revision", "total_hours", "available_hours",
+              "status", "message", "realistic", "loads", "task_count"}
+    """
+    try:
+        data = request.json or {}
+        tasks = data.get('tasks', [])
+        if not isinstance(tasks, list) or not all(isinstance(t, dict) for t in tasks):
+            return jsonify({"error": "Tasks list required"}), 400
+
+        if data.get('deadline_date'):
+            calendar, error = _calendar_from_request(data)
+            if error:
+                return jsonify({"error": error}), 400
+            try:
+                deadline = datetime.fromisoformat(data['deadline_date']).date()
+            except (ValueError, TypeError):
+                return jsonify({"error": "Invalid deadline date"}), 400
+            today = date.today()
+            available_hours = calendar.hours_between(today, max(deadline, today + timedelta(days=1)))
+        else:
+            try:
+                available_hours = max(int(data.get('deadline_days', 7)), 1) * DEFAULT_HOURS_PER_DAY
+            except (ValueError, TypeError):
+                return jsonify({"error": "Invalid deadline days"}), 400
+
+        try:
+            estimate = TimelineEstimate(tasks, available_hours)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        estimate_id = uuid.uuid4().hex
+        with _timeline_estimates_lock:
+            _timeline_estimates[estimate_id] = (estimate, threading.Lock())
+            while len(_timeline_estimates) > TIMELINE_ESTIMATE_MAX_HANDLES:
+                _timeline_estimates.popitem(last=False)
+
+        return jsonify({"estimate_id": estimate_id, **estimate.snapshot()}), 201
+
+    except Exception as e:
+        error = handle_error_safely(e, "create_timeline_estimate")
+        return jsonify({"error": error["user_message"]}), 500
+
+
+@app.route("/api/projects/timeline-estimates/<estimate_id>", methods=["PATCH"])
+def edit_timeline_estimate(estimate_id):
+    """
+    Apply task edits to a live timeline estimate.
+
+    Request: {"edits": list of {"op": "add"/"remove"/"update", "id", "task"}}
+             (or a single edit as the body)
+
+    Returns: {"revision": int, "results": list of {revision, id, changed, loads}}
+             Only changed fields are sent back. 404 if the estimate expired (start a new one).
+             Edits are all or nothing: if one is invalid (400), none of them are applied.
+    """
+    try:
+        data = request.json or {}
+        edits = data.get('edits', [data])
+        if not isinstance(edits, list) or not edits or not all(isinstance(e, dict) for e in edits):
+            return jsonify({"error": "Edits list required"}), 400
+
+        with _timeline_estimates_lock:
+            entry = _timeline_estimates.get(estimate_id)
+            if entry is not None:
+                _timeline_estimates.move_to_end(estimate_id)
+        if entry is None:
+            return jsonify({"error": "Timeline estimate not found. Start a new one."}), 404
+
+        estimate, lock = entry
+        with lock:
+            try:
+                results = estimate.apply_all(edits)
+            except KeyError as e:
+                return jsonify({"error": f"Unknown task id: {e.args[0]}", "revision": estimate.revision}), 400
+            except ValueError as e:
+                return jsonify({"error": str(e), "revision": estimate.revision}), 400
+
+        return jsonify({"revision": estimate.revision, "results": results}), 200
+
+    except Exception as e:
+        error = handle_error_safely(e, "edit_timeline_estimate")
+        return jsonify({"error": error["user_message"]}), 500
+
+
 # ===== LAYER 3: ADAPTIVE REFLECTION PROMPTS =====
 
 @app.route("/api/projects/reflection-prompts", methods=["POST"])
@@ -311,19 +673,27 @@ def validate_timeline_endpoint():
     Validate project timeline and budget.
 
     Request: {
-        "tasks": list of {hours: int},
-        "deadline_date": ISO date string
+        "tasks": list of {hours: int, difficulty: str (optional)},
+        "deadline_date": ISO date string,
+        "experience_level": str (optional, beginner/intermediate/advanced),
+        "hours_by_weekday": {"monday": hours, ...} (optional, default 2 on school days),
+        "holidays": list of ISO dates or "start..end" breaks (optional, added to SCHOOL_HOLIDAYS)
     }
     """
     try:
         data = request.json or {}
         tasks = data.get('tasks', [])
         deadline = data.get('deadline_date', '')
+        experience_level = data.get('experience_level', 'beginner')
 
         if not deadline:
             return jsonify({"error": "Deadline date is required"}), 400
 
-        result = validate_timeline(tasks, deadline)
+        calendar, error = _calendar_from_request(data)
+        if error:
+            return jsonify({"error": error}), 400
+
+        result = validate_timeline(tasks, deadline, experience_level, calendar)
 
         return jsonify(result), 200
 
@@ -332,22 +702,115 @@ def validate_timeline_endpoint():
         return jsonify({"error": error["user_message"]}), 500
 
 
+# Parsed once at startup: a bad SCHOOL_HOLIDAYS setting stops the app here
+# instead of turning every calendar request into a 400
+try:
+    _school_holidays = parse_holidays(SCHOOL_HOLIDAYS)
+except ValueError as e:
+    raise ValueError(f"Invalid SCHOOL_HOLIDAYS setting: {e}") from e
+
+
+def _calendar_from_request(data: dict):
+    """Build the availability calendar for a request. Returns (calendar, error message)."""
+    hours_by_weekday = data.get('hours_by_weekday') or {}
+    holidays = data.get('holidays') or []
+    if not isinstance(hours_by_weekday, dict) or not isinstance(holidays, list):
+        return None, "hours_by_weekday must be an object and holidays a list"
+    try:
+        holidays = _school_holidays | parse_holidays(holidays)
+    except (ValueError, TypeError):
+        return None, "Invalid holiday dates"
+    try:
+        return get_availability_calendar(hours_by_weekday, holidays), None
+    except (ValueError, TypeError):
+        return None, "Invalid hours_by_weekday"
+
+
+# ===== SCHEDULING (Dependencies + critical path) =====
+
+@app.route("/api/projects/schedule", methods=["POST"])
+def schedule_endpoint():
+    """
+    Build a day-by-day schedule that respects task dependencies and each member's capacity.
+
+    Request: {
+        "tasks": list of {task, hours, id (optional), depends_on (optional list of ids), assigned_to (optional)},
+        "team_capacity": {member: hours per day} (optional),
+        "hours_per_day": float (optional, default 2, for anyone not in team_capacity),
+        "deadline_days": int (optional),
+        "hours_by_weekday", "holidays": (optional) school calendar, as for validate-timeline
+    }
+
+    Returns: {
+        "tasks": list of {id, task, hours, assigned_to, earliest_start, latest_start, slack,
+                          critical, scheduled_start, scheduled_finish, start_date, finish_date},
+        "critical_path": list of task ids,
+        "critical_path_days": float,
+        "makespan_days": float,
+        "days_needed": int,
+        "finish_date": ISO date (work days skip weekends and holidays),
+        "members": {member: list of {day, date, hours, tasks}},
+        "fits_deadline": bool (only if deadline_days was sent)
+    }
+    """
+    try:
+        data = request.json or {}
+        tasks = data.get('tasks', [])
+        team_capacity = data.get('team_capacity') or {}
+        hours_per_day = data.get('hours_per_day', 2)
+        deadline_days = data.get('deadline_days')
+
+        if not isinstance(tasks, list) or not tasks or not all(isinstance(t, dict) for t in tasks):
+            return jsonify({"error": "Tasks list required"}), 400
+
+        calendar, error = _calendar_from_request(data)
+        if error:
+            return jsonify({"error": error}), 400
+
+        try:
+            result = schedule_tasks(tasks, team_capacity, float(hours_per_day), calendar)
+        except ValueError as e:
+            # Our own validation messages (cycles, unknown dependencies, bad hours)
+            return jsonify({"error": str(e)}), 400
+
+        if deadline_days is not None:
+            result["fits_deadline"] = result["makespan_days"] <= float(deadline_days)
+
+        return jsonify(result), 200
+
+    except Exception as e:
+        error = handle_error_safely(e, "schedule_endpoint")
+        return jsonify({"error": error["user_message"]}), 500
+
+
 # ===== TEAM BALANCE =====
 
 @app.route("/api/projects/validate-team-balance", methods=["POST"])
 def validate_team_endpoint():
     """
-    Validate that team work is balanced.
+    Validate that team work is balanced (by hours and difficulty if tasks are sent).
 
     Request: {
-        "assignments": {task_id: person_name, ...}
+        "assignments": {task_id: person_name, ...},
+        "tasks": list of {task, hours, difficulty} (optional, indexed by task_id),
+        "team_members": list of names (optional, includes people with no tasks)
+    }
+
+    Returns: {
+        "balanced": bool,
+        "warning": str or null,
+        "suggestion": str or null,
+        "loads": {person: hours},
+        "suggested_moves": list of {task_id, task, from, to, effort}
     }
     """
     try:
         data = request.json or {}
         assignments = data.get('assignments', {})
+        tasks = data.get('tasks')
+        team_members = data.get('team_members')
 
-        result = validate_team_balance(assignments)
+        result = validate_team_balance(assignments, tasks, team_members)
 
         return jsonify(result), 200
 
@@ -364,18 +827,27 @@ def award_badges_endpoint():
     Award badges based on reflection and performance.
 
     Request: {
-        "reflection_text": str,
+        "reflection": {"prompts": [...], "answers": [...]} or {"went_well", "was_hard", "learned"},
+        "reflection_text": str (OLD format, used if "reflection" is missing),
         "tasks_edited": bool,
         "timeline_accuracy": float (0.5 to 2.0)
     }
     """
     try:
         data = request.json or {}
+        reflection = data.get('reflection')
         reflection_text = data.get('reflection_text', '')
         tasks_edited = data.get('tasks_edited', False)
         timeline_accuracy = data.get('timeline_accuracy', 1.0)
 
-        badges = award_badges(reflection_text, tasks_edited, timeline_accuracy)
+        if isinstance(reflection, dict) and reflection:
+            badges = award_badges_for_reflection(reflection, tasks_edited, timeline_accuracy)
+        else:
+            badges = award_badges(
+                tasks_edited=tasks_edited,
+                timeline_accuracy=timeline_accuracy,
+                reflection_text=reflection_text
+            )
 
         return jsonify({"badges": badges}), 200
 
@@ -387,6 +859,53 @@ def award_badges_endpoint():
         }), 500
 
 
+@app.route("/api/projects/award-badges/batch", methods=["POST"])
+def award_badges_batch_endpoint():
+    """
+    Award badges for a whole class at the end of a unit.
+
+    Request: {
+        "students": [
+            {
+                "reflection": {"prompts", "answers"} or {"went_well", "was_hard", "learned"} or str,
+                "tasks_edited": bool (optional, default False),
+                "timeline_accuracy": float (optional, default 1.0)
+            },
+            ...
+        ]
+    }
+
+    Returns: {
+        "badges": [badge names],
+        "matrix": [[bool per badge] per student],
+        "counts": {badge name: int},
+        "total": int
+    }
+    """
+    try:
+        data = request.json or {}
+        students = data.get('students', [])
+
+        if not isinstance(students, list) or not students:
+            return jsonify({"error": "Students list required"}), 400
+
+        if len(students) > BADGE_BATCH_MAX_ITEMS:
+            return jsonify({"error": f"Too many students (max {BADGE_BATCH_MAX_ITEMS})"}), 400
+
+        students = [s if isinstance(s, dict) else {} for s in students]
+        result = award_badges_batch(
+            reflections=[s.get('reflection', '') for s in students],
+            tasks_edited=[bool(s.get('tasks_edited', False)) for s in students],
+            timeline_accuracy=[s.get('timeline_accuracy', 1.0) for s in students]
+        )
+
+        return jsonify(result), 200
+
+    except Exception as e:
+        error = handle_error_safely(e, "award_badges_batch_endpoint")
+        return jsonify({"error": error["user_message"]}), 500
+
+
 @app.route("/api/projects/reflection-insights", methods=["POST"])
 def get_reflection_insights():
     """
@@ -435,7 +954,6 @@ def get_reflection_insights():
 
         # Handle NEW format: reflection.prompts + reflection.answers
         if 'prompts' in reflection and 'answers' in reflection:
-            prompts = reflection.get('prompts', [])
             answers = reflection.get('answers', [])
 
             # Fix #10: Safely join answers, converting to strings and filtering None
@@ -449,14 +967,6 @@ def get_reflection_insights():
                 "was_hard": combined_reflection,
                 "learned": combined_reflection
             }
-
-            # Generate badges using NEW format (prompts + answers)
-            badges = award_badges(
-                reflection_prompts=prompts,
-                reflection_answers=answers,
-                tasks_edited=tasks_edited,
-                timeline_accuracy=timeline_accuracy
-            )
         # Handle OLD format: went_well/was_hard/learned
         else:
             reflection_data = {
@@ -467,15 +977,8 @@ def get_reflection_insights():
                 "learned": reflection.get('learned', '')
             }
 
-            # Generate badges using OLD format (reflection_text)
-            combined_old_reflection = f"{reflection.get('went_well', '')} {reflection.get('was_hard', '')} {reflection.get('learned', '')}"
-            badges = award_badges(
-                reflection_prompts=None,
-                reflection_answers=None,
-                tasks_edited=tasks_edited,
-                timeline_accuracy=timeline_accuracy,
-                reflection_text=combined_old_reflection
-            )
+        # Same badge rules as /award-badges, for either format
+        badges = award_badges_for_reflection(reflection, tasks_edited, timeline_accuracy)
 
         # Generate insights
         result = generate_reflection_insights(reflection_data)
@@ -496,12 +999,78 @@ def get_reflection_insights():
 
 # ===== EXPORT =====
 
+# Rendered PDFs by content hash (per process)
+_export_cache = ByteCache(EXPORT_CACHE_MAX_BYTES)
+
+# Render processes start on the first export
+_pdf_pool = PdfRenderPool(PDF_RENDER_PROCESSES, PDF_RENDER_MAX_QUEUE, PDF_RENDER_START_METHOD)
+
+
+def _not_modified(etag: str):
+    response = Response(status=304)
+    response.set_etag(etag)
+    return response
+
+
+def _project_pdf(data: dict, etag: str, slot_wait: float = 0) -> bytes:
+    """
+    PDF bytes from the cache, or rendered (and cached).
+
+    Raises: RenderPoolBusy if no render slot frees up within slot_wait seconds
+    """
+    pdf_bytes = _export_cache.get(etag)
+    if pdf_bytes is None:
+        pdf_bytes = _pdf_pool.render(data, timeout=PDF_RENDER_TIMEOUT_SECONDS, slot_wait=slot_wait)
+        _export_cache.put(etag, pdf_bytes)
+    return pdf_bytes
+
+
+def _pdf_export_response(data: dict):
+    """The PDF for a project (cached by content hash), 304, or 503 when saturated or too slow."""
+    etag = export_etag(data)
+    if request.if_none_match.contains(etag):
+        return _not_modified(etag)
+
+    try:
+        pdf_bytes = _project_pdf(data, etag)
+    except RenderPoolBusy:
+        logger.warning("PDF export rejected: render pool saturated")
+        return _export_busy_response()
+    except FutureTimeoutError:
+        # The render keeps its slot until it finishes, so the pool is busy - same answer
+        logger.warning(f"PDF export timed out after {PDF_RENDER_TIMEOUT_SECONDS}s")
+        return _export_busy_response()
+
+    # BytesIO shares the bytes until written to, so this doesn't copy the PDF
+    response = send_file(
+        BytesIO(pdf_bytes),
+        mimetype="application/pdf",
+        as_attachment=True,
+        download_name=f"{data.get('title', 'project')}_plan.pdf",
+        etag=etag
+    )
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+
+def _export_busy_response():
+    response = jsonify({"error": "Lots of exports right now - please try again in a few seconds."})
+    response.status_code = 503
+    response.headers["Retry-After"] = str(PDF_RENDER_RETRY_AFTER_SECONDS)
+    return response
+
+
 @app.route("/api/projects/export-pdf", methods=["POST"])
 def export_pdf():
     """
     Export project as PDF.
 
     Request: Complete project data dict
+    Headers: If-None-Match (optional) - the ETag of an earlier export
+
+    Returns the PDF with an ETag (hash of the project data), or 304 if it matches If-None-Match.
+    Repeat exports of the same plan come from a cache without re-rendering.
+    503 with Retry-After when the render processes are saturated.
     """
     try:
         data = request.json or {}
@@ -509,16 +1078,7 @@ def export_pdf():
         if not data.get('title'):
             return jsonify({"error": "Project title required"}), 400
 
-        # Generate PDF
-        pdf_bytes = export_project_to_pdf(data)
-
-        # Return as downloadable file
-        return send_file(
-            BytesIO(pdf_bytes),
-            mimetype="application/pdf",
-            as_attachment=True,
-            download_name=f"{data.get('title', 'project')}_plan.pdf"
-        )
+        return _pdf_export_response(data)
 
     except Exception as e:
         error = handle_error_safely(e, "export_pdf")
@@ -526,6 +1086,389 @@ def export_pdf():
         return jsonify({"error": error["user_message"]}), 500
 
 
+@app.route("/api/projects/export", methods=["POST"])
+def export_project():
+    """
+    Export project in any supported format.
+
+    Request: Complete project data dict
+    Query: format (optional) - pdf, markdown/md, csv, json or ics
+    Headers: Accept (used when format isn't given, e.g. text/markdown), If-None-Match (optional)
+
+    Returns the export as an attachment with an ETag, or 304 if it matches If-None-Match.
+    PDF is the default. Markdown, CSV (tasks), canonical JSON and iCalendar
+    (scheduled tasks + deadline) are streamed without running the PDF renderer.
+    """
+    try:
+        data = request.json or {}
+
+        if not data.get('title'):
+            return jsonify({"error": "Project title required"}), 400
+
+        requested = request.args.get('format')
+        if requested:
+            export_name = find_export_format(requested)
+            if export_name is None:
+                return jsonify({"error": f"Unknown format (use one of: pdf, {', '.join(EXPORT_FORMATS)})"}), 400
+        else:
+            best = request.accept_mimetypes.best_match(export_mimetypes(), default="application/pdf")
+            export_name = find_export_format(best)
+
+        if export_name == "pdf":
+            return _pdf_export_response(data)
+
+        export_format = EXPORT_FORMATS[export_name]
+        etag = export_etag(data, export_name)
+        if request.if_none_match.contains(etag):
+            return _not_modified(etag)
+
+        def generate():
+            for chunk in export_format.render(data):
+                yield chunk.encode("utf-8")
+
+        response = Response(generate(), mimetype=export_format.mimetype)
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = "private, no-cache"
+        response.headers["Content-Disposition"] = (
+            f'attachment; filename="{export_filename(data.get("title"), extension=export_format.extension)}"'
+        )
+        return response
+
+    except Exception as e:
+        error = handle_error_safely(e, "export_project")
+        return jsonify({"error": error["user_message"]}), 500
+
+
+def _batch_error(projects) -> str:
+    """Why a list of projects can't be batch exported, or None."""
+    if not isinstance(projects, list) or not projects:
+        return "Projects list required"
+    if len(projects) > EXPORT_BATCH_MAX_PROJECTS:
+        return f"Too many projects (max {EXPORT_BATCH_MAX_PROJECTS})"
+    for index, project in enumerate(projects):
+        if not isinstance(project, dict) or not project.get('title'):
+            return f"Project {index + 1}: title required"
+    return None
+
+
+def _batch_pdf_files(projects: list, on_progress=None):
+    """
+    (file name, PDF bytes) for each project: cached ones first, then the rest as
+    they finish rendering in parallel. Each render gets PDF_RENDER_TIMEOUT_SECONDS and
+    the whole batch EXPORT_BATCH_TIMEOUT_SECONDS; failures are listed in export_errors.txt.
+    on_progress(done) is called after each project.
+    """
+    etags = [export_etag(project) for project in projects]
+    done = 0
+    to_render = []
+    for index, etag in enumerate(etags):
+        pdf_bytes = _export_cache.get(etag)
+        if pdf_bytes is None:
+            to_render.append(index)
+        else:
+            done += 1
+            if on_progress:
+                on_progress(done)
+            yield export_filename(projects[index]['title'], index), pdf_bytes
+
+    failed = []
+    rendered = _pdf_pool.render_many(
+        [projects[index] for index in to_render],
+        timeout=PDF_RENDER_TIMEOUT_SECONDS,
+        total_timeout=EXPORT_BATCH_TIMEOUT_SECONDS,
+        slot_wait=PDF_RENDER_TIMEOUT_SECONDS
+    )
+    for position, result in rendered:
+        index = to_render[position]
+        done += 1
+        if on_progress:
+            on_progress(done)
+        if isinstance(result, Exception):
+            logger.error(f"Batch export failed for project {index + 1}: {result!r}")
+            failed.append(index)
+            continue
+        _export_cache.put(etags[index], result)
+        yield export_filename(projects[index]['title'], index), result
+
+    if failed:
+        lines = [f"{export_filename(projects[index]['title'], index)}: could not be created, please export it again" for index in sorted(failed)]
+        yield "export_errors.txt", ("\n".join(lines) + "\n").encode("utf-8")
+
+
+@app.route("/api/export/batch", methods=["POST"])
+def export_batch():
+    """
+    Export many projects (e.g. a whole class) as one ZIP of PDFs.
+
+    Request: {
+        "projects": list of complete project data dicts (same as export-pdf)
+    }
+
+    Returns a ZIP streamed as the PDFs finish rendering (in parallel), with
+    files named "01_<title>_plan.pdf", ... Projects that couldn't be rendered
+    are listed in export_errors.txt at the end of the archive.
+    """
+    try:
+        data = request.json or {}
+        projects = data.get('projects', [])
+
+        error = _batch_error(projects)
+        if error:
+            return jsonify({"error": error}), 400
+
+        logger.info(f"POST /api/export/batch - Exporting {len(projects)} projects")
+
+        response = Response(iter_zip(_batch_pdf_files(projects)), mimetype="application/zip")
+        response.headers["Content-Disposition"] = 'attachment; filename="project_plans.zip"'
+        return response
+
+    except Exception as e:
+        error = handle_error_safely(e, "export_batch")
+        return jsonify({"error": error["user_message"]}), 500
+
+
+# ===== EXPORT JOBS =====
+
+# Queued and running jobs: job_id -> job dict, at most EXPORT_JOB_MAX_PENDING, never expire
+_active_export_jobs = {}
+_active_export_jobs_lock = threading.Lock()
+# Finished jobs: job_id -> job dict (including the file), in memory only; deleted
+# EXPORT_JOB_TTL_SECONDS after finishing, or sooner once their files pass EXPORT_JOB_MAX_RESULT_BYTES
+_export_jobs = ResultStore(
+    EXPORT_JOB_TTL_SECONDS,
+    EXPORT_JOB_MAX_ENTRIES,
+    max_bytes=EXPORT_JOB_MAX_RESULT_BYTES,
+    size_of=lambda job: len(job.get("result") or b"")
+)
+_export_job_executor = ThreadPoolExecutor(max_workers=EXPORT_JOB_WORKERS, thread_name_prefix="export-job")
+
+
+def _get_export_job(job_id: str) -> dict:
+    """The job, whether still active or finished; None if unknown or expired."""
+    with _active_export_jobs_lock:
+        job = _active_export_jobs.get(job_id)
+    return job if job is not None else _export_jobs.get(job_id)
+
+
+def _update_export_job(job_id: str, **changes):
+    with _active_export_jobs_lock:
+        job = _active_export_jobs.get(job_id)
+        if job is not None:
+            _active_export_jobs[job_id] = dict(job, **changes)
+
+
+def _finish_export_job(job_id: str, **changes):
+    """Move the job to the finished store, where its TTL starts."""
+    with _active_export_jobs_lock:
+        job = _active_export_jobs.get(job_id)
+        if job is None:
+            return
+        _export_jobs.put(job_id, dict(job, expires_at=_export_job_expiry(), **changes))
+        del _active_export_jobs[job_id]
+
+
+def _run_export_job(job_id: str, projects: list, export_name: str):
+    """Background: build the export file and store it on the job."""
+    _update_export_job(job_id, status="running")
+    try:
+        if export_name == "zip":
+            files = _batch_pdf_files(projects, on_progress=lambda done: _update_export_job(job_id, done=done))
+            result = b"".join(iter_zip(files))
+        elif export_name == "pdf":
+            result = _project_pdf(projects[0], export_etag(projects[0]), slot_wait=PDF_RENDER_TIMEOUT_SECONDS)
+        else:
+            result = "".join(EXPORT_FORMATS[export_name].render(projects[0])).encode("utf-8")
+    except Exception as e:
+        error = handle_error_safely(e, "_run_export_job")
+        logger.error(f"Export job error: {error['internal_error']}")
+        _finish_export_job(job_id, status="failed", error=error["user_message"])
+        return
+
+    if len(result) > EXPORT_JOB_MAX_RESULT_BYTES:
+        logger.warning(f"Export job result too large to keep: {len(result)} bytes")
+        _finish_export_job(job_id, status="failed", error="This export is too big. Please export fewer projects at a time.")
+        return
+    _finish_export_job(job_id, status="done", done=len(projects), result=result)
+
+
+def _export_job_status(job: dict) -> dict:
+    return {key: value for key, value in job.items() if key != "result"}
+
+
+def _export_job_expiry() -> str:
+    return (datetime.now() + timedelta(seconds=EXPORT_JOB_TTL_SECONDS)).isoformat(timespec="seconds")
+
+
+@app.route("/api/export/jobs", methods=["POST"])
+def create_export_job():
+    """
+    Start an export in the background, for exports that may outlast a proxy timeout.
+
+    Request: {
+        "project": project data dict, "format": "pdf"/"md"/"csv"/"json"/"ics" (default pdf)
+        OR
+        "projects": list of project data dicts (a ZIP of PDFs, like /api/export/batch)
+    }
+
+    Returns (202): {"job_id", "status": "queued", "done": 0, "total": int, "status_url", "download_url"}
+    Poll status_url until status is "done" (or "failed"), then fetch download_url.
+    Jobs and their files are kept in memory and deleted EXPORT_JOB_TTL_SECONDS after finishing.
+    503 with Retry-After when EXPORT_JOB_MAX_PENDING jobs are already queued or running.
+    """
+    try:
+        data = request.json or {}
+
+        if 'projects' in data:
+            projects = data.get('projects')
+            error = _batch_error(projects)
+            if error:
+                return jsonify({"error": error}), 400
+            export_name = "zip"
+            mimetype = "application/zip"
+            filename = "project_plans.zip"
+        else:
+            project = data.get('project')
+            if not isinstance(project, dict) or not project.get('title'):
+                return jsonify({"error": "Project with a title required"}), 400
+            export_name = find_export_format(data.get('format') or "pdf")
+            if export_name is None:
+                return jsonify({"error": f"Unknown format (use one of: pdf, {', '.join(EXPORT_FORMATS)})"}), 400
+            projects = [project]
+            if export_name == "pdf":
+                mimetype, extension = "application/pdf", "pdf"
+            else:
+                mimetype, extension = EXPORT_FORMATS[export_name].mimetype, EXPORT_FORMATS[export_name].extension
+            filename = export_filename(project['title'], extension=extension)
+
+        job_id = uuid.uuid4().hex
+        job = {
+            "job_id": job_id,
+            "status": "queued",
+            "format": export_name,
+            "done": 0,
+            "total": len(projects),
+            "filename": filename,
+            "mimetype": mimetype,
+            "error": None,
+            "expires_at": None,
+            "status_url": f"/api/export/jobs/{job_id}",
+            "download_url": f"/api/export/jobs/{job_id}/download"
+        }
+        with _active_export_jobs_lock:
+            busy = len(_active_export_jobs) >= EXPORT_JOB_MAX_PENDING
+            if not busy:
+                _active_export_jobs[job_id] = job
+        if busy:
+            logger.warning("Export job rejected: too many jobs queued")
+            return _export_busy_response()
+        try:
+            _export_job_executor.submit(_run_export_job, job_id, projects, export_name)
+        except Exception:
+            with _active_export_jobs_lock:
+                del _active_export_jobs[job_id]
+            raise
+
+        logger.info(f"POST /api/export/jobs - Queued {export_name} export of {len(projects)} project(s)")
+        return jsonify(_export_job_status(job)), 202
+
+    except Exception as e:
+        error = handle_error_safely(e, "create_export_job")
+        return jsonify({"error": error["user_message"]}), 500
+
+
+@app.route("/api/export/jobs/<job_id>", methods=["GET"])
+def export_job_status(job_id):
+    """
+    Progress of an export job.
+
+    Returns: {"job_id", "status": "queued"/"running"/"done"/"failed", "done", "total", "error",
+              "expires_at": when the job and its file are deleted (once finished), ...}
+             404 if the job is unknown or expired.
+    """
+    job = _get_export_job(job_id)
+    if job is None:
+        return jsonify({"error": "This export has expired. Please export again."}), 404
+    return jsonify(_export_job_status(job)), 200
+
+
+@app.route("/api/export/jobs/<job_id>/download", methods=["GET"])
+def export_job_download(job_id):
+    """
+    The finished export file.
+
+    Returns: the file, 409 if the job isn't done yet (or failed), 404 if unknown or expired.
+    """
+    job = _get_export_job(job_id)
+    if job is None:
+        return jsonify({"error": "This export has expired. Please export again."}), 404
+    if job["status"] != "done":
+        return jsonify({"error": job["error"] or "Export isn't ready yet", "status": job["status"]}), 409
+
+    response = send_file(
+        BytesIO(job["result"]),
+        mimetype=job["mimetype"],
+        as_attachment=True,
+        download_name=job["filename"]
+    )
+    response.headers["Cache-Control"] = "private, no-store"
+    return response
+
+
+# ===== TEACHER MODERATION =====
+
+@app.route("/api/safety/scan-batch", methods=["POST"])
+def scan_batch():
+    """
+    Screen many student texts with the safety checks (no Claude call).
+
+    Request: {
+        "items": list of str or {"id": any, "text": str}
+    }
+
+    Returns (streamed, one JSON object per line):
+        {"index": int, "id": any, "safe": bool, "categories": [...], "keywords": [...]}
+        ...
+        {"summary": {"total": int, "flagged": int}}
+    """
+    try:
+        data = request.json or {}
+        items = data.get('items', [])
+
+        if not isinstance(items, list) or not items:
+            return jsonify({"error": "Items list required"}), 400
+
+        if len(items) > SAFETY_SCAN_MAX_ITEMS:
+            return jsonify({"error": f"Too many items (max {SAFETY_SCAN_MAX_ITEMS})"}), 400
+
+        ids = []
+        texts = []
+        for index, item in enumerate(items):
+            if isinstance(item, dict):
+                ids.append(item.get('id', index))
+                text = item.get('text', '')
+            else:
+                ids.append(index)
+                text = item
+            texts.append(text if isinstance(text, str) else str(text or ''))
+
+        logger.info(f"POST /api/safety/scan-batch - Scanning {len(texts)} items")
+
+        def generate():
+            flagged = 0
+            for verdict in scan_texts(texts):
+                verdict["id"] = ids[verdict["index"]]
+                if not verdict["safe"]:
+                    flagged += 1
+                yield json.dumps(verdict) + "\n"
+            yield json.dumps({"summary": {"total": len(texts), "flagged": flagged}}) + "\n"
+
+        return Response(generate(), mimetype="application/x-ndjson")
+
+    except Exception as e:
+        error = handle_error_safely(e, "scan_batch")
+        return jsonify({"error": error["user_message"]}), 500
+
+
 # ===== ERROR HANDLERS =====
 
 @app.errorhandler(404)
@@ -541,7 +1484,22 @@ def internal_error(error):
     return jsonify({"error": "Internal server error"}), 500
 
 
+# ===== BACKGROUND WORK =====
+
+def drain_background_work():
+    """
+    Let background work finish before the process exits: instant-mode Claude
+    upgrades and running export jobs complete, queued export jobs are dropped,
+    then the PDF render processes stop. Called by serve.py on graceful shutdown.
+    """
+    logger.info("Draining background work before shutdown")
+    _breakdown_executor.shutdown(wait=True)
+    _export_job_executor.shutdown(wait=True, cancel_futures=True)
+    _pdf_pool.shutdown()
+
+
 # ===== RUN SERVER =====
+# Development server; for production use serve.py
 
 if __name__ == "__main__":
     logger.info(f"Starting Sprint Kit server (environment: {FLASK_ENV})")
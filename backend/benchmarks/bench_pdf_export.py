@@ -0,0 +1,59 @@
+"""
+Per-export CPU time for PDF export: a renderer set up per request (what
+export_project_to_pdf used to do) vs the shared, warmed renderer.
+
+Usage (from backend/):
+    python benchmarks/bench_pdf_export.py [--exports 50] [--tasks 8]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pdf_export import PdfRenderer, WARMUP_PROJECT, get_pdf_renderer, warm_pdf_renderer  # noqa: E402
+
+
+def sample_project(task_count: int) -> dict:
+    project = dict(WARMUP_PROJECT, title="Popsicle Stick Bridge")
+    project["tasks"] = [
+        {"name": f"Task {i + 1}: build and test part {i + 1}", "hours": 2, "difficulty": "Medium", "assigned_to": "Alex"}
+        for i in range(task_count)
+    ]
+    return project
+
+
+def cpu_ms(render, project: dict, exports: int) -> list:
+    times = []
+    for _ in range(exports):
+        start = time.process_time()
+        render(project)
+        times.append((time.process_time() - start) * 1000)
+    return times
+
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--exports", type=int, default=50)
+    parser.add_argument("--tasks", type=int, default=8)
+    args = parser.parse_args(argv)
+
+    project = sample_project(args.tasks)
+
+    start = time.process_time()
+    warm_pdf_renderer()
+    print(f"warm-up (imports, styles, fonts): {(time.process_time() - start) * 1000:.1f} ms CPU")
+
+    results = {
+        "per-request setup": cpu_ms(lambda p: PdfRenderer().render(p), project, args.exports),
+        "shared renderer": cpu_ms(get_pdf_renderer().render, project, args.exports)
+    }
+    for name, times in results.items():
+        print(f"{name:>18}: median {statistics.median(times):6.2f} ms, mean {statistics.mean(times):6.2f} ms CPU per export")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+PDF render time vs task count, to check layout stays close to linear for very
+large plans (chunked task tables) and how it compares with one big table.
+
+Usage (from backend/):
+    python benchmarks/bench_pdf_layout.py [--sizes 10 100 1000] [--repeat 3]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from io import BytesIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pdf_export import get_pdf_renderer, warm_pdf_renderer  # noqa: E402
+from bench_pdf_export import sample_project  # noqa: E402
+
+
+def single_table_render(renderer, project: dict) -> bytes:
+    """Only the task list, as one table (the old layout)."""
+    rows = [[t['name'], str(t['hours']), t['difficulty'], t['assigned_to']] for t in project['tasks']]
+    table = renderer._LongTable([list(renderer.task_header)] + rows, colWidths=renderer.task_columns, repeatRows=1)
+    table.setStyle(renderer.task_table_style)
+    buffer = BytesIO()
+    renderer._SimpleDocTemplate(buffer, pagesize=renderer.pagesize).build([table])
+    return buffer.getvalue()
+
+
+def cpu_ms(render, project: dict, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.process_time()
+        render(project)
+        times.append((time.process_time() - start) * 1000)
+    return statistics.median(times)
+
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--compare", action="store_true", help="also time one big task table")
+    args = parser.parse_args(argv)
+
+    warm_pdf_renderer()
+    renderer = get_pdf_renderer()
+
+    print(f"{'tasks':>6} {'ms CPU':>9} {'ms/task':>8}" + (f" {'one table ms':>13}" if args.compare else ""))
+    for size in args.sizes:
+        project = sample_project(size)
+        ms = cpu_ms(renderer.render, project, args.repeat)
+        line = f"{size:>6} {ms:>9.1f} {ms / size:>8.3f}"
+        if args.compare:
+            line += f" {cpu_ms(lambda p: single_table_render(renderer, p), project, args.repeat):>13.1f}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
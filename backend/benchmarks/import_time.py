@@ -0,0 +1,59 @@
+"""
+Import-time report: which modules make a fresh `import app` (worker boot) slow.
+Runs the import in a new interpreter with -X importtime, so nothing is cached.
+
+Usage (from backend/):
+    python benchmarks/import_time.py [--module app] [--top 20] [--warm-up off]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_times(module: str, warm_up: str = "off") -> list:
+    """
+    Import module in a fresh interpreter.
+
+    Returns: [(cumulative_us, self_us, depth, name)] for every module imported, in import order
+    """
+    env = dict(os.environ, STARTUP_WARMUP=warm_up)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((int(cumulative_us), int(self_us), depth, name.strip()))
+    return rows
+
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--module", default="app")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--warm-up", default="off", choices=["off", "background", "blocking"],
+                        help="STARTUP_WARMUP for the run (default off: just the import)")
+    args = parser.parse_args(argv)
+
+    rows = import_times(args.module, args.warm_up)
+    total = next((row[0] for row in rows if row[3] == args.module and row[2] == 0), 0)
+    print(f"import {args.module}: {total / 1000:.1f} ms")
+    print(f"{'cumulative ms':>14} {'self ms':>8}  module")
+    # Slowest first (a module's time includes everything it imports)
+    for cumulative_us, self_us, depth, name in sorted(rows, reverse=True)[:args.top]:
+        print(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>8.1f}  {'  ' * max(depth - 1, 0)}{name}")
+
+    heavy = [name for name in ("anthropic", "numpy", "reportlab", "dotenv") if any(row[3] == name for row in rows)]
+    print(f"heavy modules loaded at import: {', '.join(heavy) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
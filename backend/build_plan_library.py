@@ -0,0 +1,126 @@
+"""
+Build the precomputed plan library (offline batch job - the server never runs this).
+
+Asks Claude for a plan for every project type x experience level x team size,
+with the same TASK_BREAKDOWN_PROMPT and methodology guidance the server uses,
+at most PLAN_LIBRARY_BUILD_PER_MINUTE calls per minute. Combinations that fail
+keep their plan from the existing library (if any) and can be retried with
+--only-missing.
+
+Usage:
+    python build_plan_library.py [--output plan_library.bin] [--per-minute 20] [--only-missing]
+"""
+
+import argparse
+import itertools
+import logging
+import sys
+import time
+from datetime import datetime, timezone
+
+from config import CLAUDE_MODEL, PLAN_LIBRARY_BUILD_PER_MINUTE, PLAN_LIBRARY_FILE
+from plan_library import (
+    EXPERIENCE_LEVELS,
+    PROJECT_TYPES,
+    TEAM_SIZES,
+    load_plan_library,
+    write_plan_library
+)
+from prompts import TASK_BREAKDOWN_PROMPT, get_methodology_guidance
+from utils import call_claude_safely, clean_generated_tasks, parse_json_response
+
+logger = logging.getLogger("build_plan_library")
+
+# What a generic project of each type looks like
+LIBRARY_PROJECTS = {
+    "hardware": ("Build a working model", "Design and build a physical model or device, test it, and show how it works."),
+    "software": ("Make an app or game", "Plan, code and test a small app, website or game, then show it to the class."),
+    "creative": ("Make a creative piece", "Plan and create a video, artwork, story or song, get feedback, and share it."),
+    "event": ("Run a school event", "Plan, promote and run an event at school, then clean up and look back on it."),
+    "research": ("Research a question", "Find and read sources on a question, organize what you learn, and present your findings."),
+    "other": ("Complete a school project", "Plan the project, do the main work, review it, and present the result.")
+}
+
+MAX_ATTEMPTS = 2
+
+
+def generate_plan(project_type: str, experience_level: str, team_size: str) -> list:
+    """One Claude plan for a combination, or None if Claude failed or the answer was unusable."""
+    title, description = LIBRARY_PROJECTS[project_type]
+    response = call_claude_safely(
+        TASK_BREAKDOWN_PROMPT,
+        project_title=title,
+        project_description=description,
+        project_type=project_type,
+        experience_level=experience_level,
+        team_size=team_size,
+        methodology_guidance=get_methodology_guidance(project_type, experience_level, team_size),
+        goal='',
+        brainstorm_ideas=''
+    )
+    if not response["success"]:
+        return None
+    tasks = clean_generated_tasks(parse_json_response(response["data"]))
+    return tasks or None
+
+
+def build_library(output: str, per_minute: int, only_missing: bool = False) -> int:
+    """
+    Generate every combination (throttled) and write the library.
+
+    Returns: number of combinations without a plan
+    """
+    existing = load_plan_library(output)
+    plans = {}
+    if existing is not None:
+        for combo in itertools.product(PROJECT_TYPES, EXPERIENCE_LEVELS, TEAM_SIZES):
+            tasks = existing.get(*combo)
+            if tasks:
+                plans[combo] = tasks
+        existing.close()
+
+    interval = 60.0 / max(per_minute, 1)
+    next_call = 0.0
+    missing = 0
+
+    for combo in itertools.product(PROJECT_TYPES, EXPERIENCE_LEVELS, TEAM_SIZES):
+        if only_missing and combo in plans:
+            continue
+
+        tasks = None
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            time.sleep(max(next_call - time.monotonic(), 0))
+            next_call = time.monotonic() + interval
+            tasks = generate_plan(*combo)
+            if tasks:
+                break
+            logger.warning("No plan for %s (attempt %d of %d)", "|".join(combo), attempt, MAX_ATTEMPTS)
+
+        if tasks:
+            plans[combo] = tasks
+            logger.info("Plan for %s: %d tasks", "|".join(combo), len(tasks))
+        elif combo not in plans:
+            missing += 1
+
+    write_plan_library(output, plans, {
+        "model": CLAUDE_MODEL,
+        "built_at": datetime.now(timezone.utc).isoformat(timespec="seconds")
+    })
+    logger.info("Wrote %d plans to %s (%d missing)", len(plans), output, missing)
+    return missing
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Build the precomputed plan library.")
+    parser.add_argument("--output", default=PLAN_LIBRARY_FILE, help="Library file to write")
+    parser.add_argument("--per-minute", type=int, default=PLAN_LIBRARY_BUILD_PER_MINUTE, help="Max Claude calls per minute")
+    parser.add_argument("--only-missing", action="store_true", help="Keep existing plans, only fill the gaps")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    missing = build_library(args.output, args.per_minute, args.only_missing)
+    return 1 if missing else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,9 +5,26 @@ CRITICAL: Child safety is non-negotiable.
 """
 
 import os
-from dotenv import load_dotenv
 
-load_dotenv()
+
+def _find_env_file(start: str) -> str:
+    """The nearest .env in start or a parent directory (as load_dotenv() finds it), or None."""
+    directory = start
+    while True:
+        candidate = os.path.join(directory, ".env")
+        if os.path.isfile(candidate):
+            return candidate
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return None
+        directory = parent
+
+
+# python-dotenv is only imported when there's a .env file to read (not in containers)
+_env_file = _find_env_file(os.path.dirname(os.path.abspath(__file__)))
+if _env_file:
+    from dotenv import load_dotenv
+    load_dotenv(_env_file)
 
 # ===== ENVIRONMENT & DEBUG =====
 ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
@@ -19,6 +36,97 @@ FLASK_DEBUG = DEBUG
 CLAUDE_API_KEY = os.getenv("CLAUDE_API_KEY")
 CLAUDE_MODEL = "claude-sonnet-4-20250514"
 MAX_TOKENS = 1000
+# Rewriting a single task needs only a short completion
+REFINE_MAX_TOKENS = int(os.getenv("REFINE_MAX_TOKENS", "200"))
+
+# ===== TASK BREAKDOWN: INSTANT MODE =====
+# "instant" break-down requests return a template plan right away and upgrade it
+# with Claude in the background; results are kept this long for the client to fetch
+BREAKDOWN_RESULT_TTL_SECONDS = float(os.getenv("BREAKDOWN_RESULT_TTL_SECONDS", "300"))
+BREAKDOWN_RESULT_MAX_ENTRIES = int(os.getenv("BREAKDOWN_RESULT_MAX_ENTRIES", "1000"))
+BREAKDOWN_BACKGROUND_WORKERS = int(os.getenv("BREAKDOWN_BACKGROUND_WORKERS", "4"))
+# Upgrades queued or running at once; past this, instant plans are not upgraded
+BREAKDOWN_MAX_PENDING = int(os.getenv("BREAKDOWN_MAX_PENDING", "32"))
+# Longest a poll may wait for the upgraded plan
+BREAKDOWN_MAX_WAIT_SECONDS = float(os.getenv("BREAKDOWN_MAX_WAIT_SECONDS", "20"))
+# Polls allowed to wait at once: each holds a request thread, so keep this well under
+# SERVE_THREADS (raise it with the async worker class). Further polls answer at once
+BREAKDOWN_MAX_WAITERS = int(os.getenv("BREAKDOWN_MAX_WAITERS", "2"))
+
+# ===== TASK BREAKDOWN: PRECOMPUTED PLAN LIBRARY =====
+# Built offline by build_plan_library.py; missing file = every plan comes from Claude
+PLAN_LIBRARY_FILE = os.getenv(
+    "PLAN_LIBRARY_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "plan_library.bin")
+)
+# Bulk builds stay under this many Claude calls per minute
+PLAN_LIBRARY_BUILD_PER_MINUTE = int(os.getenv("PLAN_LIBRARY_BUILD_PER_MINUTE", "20"))
+
+# ===== TASK BREAKDOWN: NEAR-DUPLICATE PLAN REUSE =====
+# A Claude plan is reused for a later request with the same type, experience and
+# team size whose text is at least this similar (estimated Jaccard, 0-1)
+SIMILAR_PLAN_REUSE = os.getenv("SIMILAR_PLAN_REUSE", "true").lower() == "true"
+SIMILAR_PLAN_THRESHOLD = float(os.getenv("SIMILAR_PLAN_THRESHOLD", "0.7"))
+SIMILAR_PLAN_MAX_ENTRIES = int(os.getenv("SIMILAR_PLAN_MAX_ENTRIES", "2000"))
+
+# ===== EXPORT =====
+# Build the PDF renderer (reportlab, styles, fonts) at startup instead of on the first export
+PDF_WARMUP = os.getenv("PDF_WARMUP", "true").lower() == "true"
+# Rendered PDFs kept per worker for repeat exports of the same plan (bytes)
+EXPORT_CACHE_MAX_BYTES = int(os.getenv("EXPORT_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+# PDFs render in separate processes (0 = on the request thread); once every process is
+# busy and PDF_RENDER_MAX_QUEUE more are waiting, exports get 503 + Retry-After
+PDF_RENDER_PROCESSES = int(os.getenv("PDF_RENDER_PROCESSES", "2"))
+PDF_RENDER_MAX_QUEUE = int(os.getenv("PDF_RENDER_MAX_QUEUE", "8"))
+PDF_RENDER_TIMEOUT_SECONDS = float(os.getenv("PDF_RENDER_TIMEOUT_SECONDS", "30"))
+PDF_RENDER_RETRY_AFTER_SECONDS = int(os.getenv("PDF_RENDER_RETRY_AFTER_SECONDS", "5"))
+# "spawn" is safe with the app's background threads; "fork" starts faster
+PDF_RENDER_START_METHOD = os.getenv("PDF_RENDER_START_METHOD", "spawn")
+# Most projects in one /api/export/batch ZIP
+EXPORT_BATCH_MAX_PROJECTS = int(os.getenv("EXPORT_BATCH_MAX_PROJECTS", "200"))
+# Longest a batch (or batch export job) spends rendering, kept under SERVE_TIMEOUT_SECONDS;
+# projects not done by then are listed in export_errors.txt
+EXPORT_BATCH_TIMEOUT_SECONDS = float(os.getenv("EXPORT_BATCH_TIMEOUT_SECONDS", "110"))
+# Background export jobs (/api/export/jobs): kept in memory only, and deleted this
+# long after they finish - no student data is stored beyond that
+EXPORT_JOB_WORKERS = int(os.getenv("EXPORT_JOB_WORKERS", "2"))
+EXPORT_JOB_TTL_SECONDS = float(os.getenv("EXPORT_JOB_TTL_SECONDS", "600"))
+EXPORT_JOB_MAX_ENTRIES = int(os.getenv("EXPORT_JOB_MAX_ENTRIES", "200"))
+# Jobs queued or running at once (more get 503 + Retry-After), and total size of the
+# finished files kept for download (the oldest go first past this)
+EXPORT_JOB_MAX_PENDING = int(os.getenv("EXPORT_JOB_MAX_PENDING", "8"))
+EXPORT_JOB_MAX_RESULT_BYTES = int(os.getenv("EXPORT_JOB_MAX_RESULT_BYTES", str(128 * 1024 * 1024)))
+
+# ===== STARTUP =====
+# Importing the Claude SDK (and building the PDF renderer) is the slow part of boot.
+# "background": the app starts serving at once and a thread does it; "blocking": done
+# before the app is ready; "off": on first use
+STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "background").lower()
+
+# ===== PRODUCTION SERVER (serve.py) =====
+SERVE_BIND = os.getenv("SERVE_BIND", "0.0.0.0:5000")
+# Instant breakdowns, timeline estimates and export jobs are kept in the worker that
+# created them, so follow-up requests must reach the same worker: keep 1 (scale with
+# SERVE_THREADS) unless the load balancer pins each client to one worker
+SERVE_WORKERS = int(os.getenv("SERVE_WORKERS", "1"))
+# "gthread" (threads per worker, good for requests waiting on Claude), "sync"
+# (one request at a time per worker) or "gevent" (async, needs gevent installed)
+SERVE_WORKER_CLASS = os.getenv("SERVE_WORKER_CLASS", "gthread")
+SERVE_THREADS = int(os.getenv("SERVE_THREADS", "8"))
+# Longest a request may run before its worker is restarted (Claude calls included)
+SERVE_TIMEOUT_SECONDS = int(os.getenv("SERVE_TIMEOUT_SECONDS", "120"))
+# On SIGTERM, in-flight requests and background Claude calls get this long to finish
+SERVE_GRACEFUL_TIMEOUT_SECONDS = int(os.getenv("SERVE_GRACEFUL_TIMEOUT_SECONDS", "60"))
+
+# ===== LOGGING =====
+# All log I/O happens on a background listener thread, never on the request thread.
+ERROR_LOG_FILE = os.getenv("ERROR_LOG_FILE", "claude_errors.log")
+ERROR_LOG_MAX_BYTES = int(os.getenv("ERROR_LOG_MAX_BYTES", str(1024 * 1024)))
+ERROR_LOG_BACKUP_COUNT = int(os.getenv("ERROR_LOG_BACKUP_COUNT", "3"))
+
+# During abuse bursts, only this many warnings of the same kind are logged per window
+SAFETY_LOG_RATE_LIMIT = int(os.getenv("SAFETY_LOG_RATE_LIMIT", "20"))
+SAFETY_LOG_WINDOW_SECONDS = float(os.getenv("SAFETY_LOG_WINDOW_SECONDS", "60"))
 
 # ===== CHILD SAFETY: SCOPE BOUNDARIES =====
 # Sprint Kit teaches project planning ONLY. These are hard boundaries.
@@ -33,27 +141,6 @@ ALLOWED_PROJECT_TYPES = [
     "extracurricular activity"
 ]
 
-DISALLOWED_KEYWORDS = [
-    # Academic dishonesty
-    "homework",
-    "shortcut",
-    "test answers",
-    "answers",
-    "cheating",
-
-    # Personal/mental health
-    "personal",
-    "family",
-    "relationship",
-    "dating",
-    "depression",
-    "depressed",
-    "anxiety",
-    "self-harm",
-    "suicide",
-    "bullying"
-]
-
 OUT_OF_SCOPE_RESPONSE = """
 I can help you plan projects for school or teams. But that question is outside
 what I'm designed for.
@@ -66,21 +153,33 @@ If you need help with:
 Let's get back to planning your project. What's your goal?
 """
 
-# ===== CHILD SAFETY: PROMPT INJECTION PROTECTION =====
-PROMPT_INJECTION_KEYWORDS = [
-    "system prompt",
-    "ignore",
-    "forget",
-    "pretend",
-    "you are now",
-    "as an ai",
-    "from now on",
-    "role play",
-    "roleplay"
-]
+# ===== CHILD SAFETY: KEYWORD LISTS =====
+# Disallowed-topic and prompt-injection keyword lists live in a data file so they
+# can be updated without a code change or restart. safety.py watches the file.
+SAFETY_KEYWORDS_FILE = os.getenv(
+    "SAFETY_KEYWORDS_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "safety_keywords.json")
+)
+SAFETY_KEYWORDS_POLL_SECONDS = float(os.getenv("SAFETY_KEYWORDS_POLL_SECONDS", "5"))
+
+# ===== TEACHER MODERATION: BULK SAFETY SCAN =====
+SAFETY_SCAN_MAX_ITEMS = int(os.getenv("SAFETY_SCAN_MAX_ITEMS", "10000"))
+# Batches at least this big are split across a process pool (if workers > 1)
+SAFETY_SCAN_PARALLEL_THRESHOLD = int(os.getenv("SAFETY_SCAN_PARALLEL_THRESHOLD", "2000"))
+SAFETY_SCAN_WORKERS = int(os.getenv("SAFETY_SCAN_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# ===== TIMELINE: SCHOOL CALENDAR =====
+# Days with no project work, comma separated: "2026-11-26,2026-12-21..2027-01-01"
+SCHOOL_HOLIDAYS = [d.strip() for d in os.getenv("SCHOOL_HOLIDAYS", "").split(",") if d.strip()]
+
+# Live timeline estimates kept in memory (oldest dropped first)
+TIMELINE_ESTIMATE_MAX_HANDLES = int(os.getenv("TIMELINE_ESTIMATE_MAX_HANDLES", "1000"))
 
 # ===== BADGES: AUTHENTIC GAMIFICATION =====
 # Badges tied to REAL learning, not generic points
+# Max reflections per class-wide badge request
+BADGE_BATCH_MAX_ITEMS = int(os.getenv("BADGE_BATCH_MAX_ITEMS", "10000"))
+
 BADGE_DEFINITIONS = {
     "break_it_down": {
         "name": "I Can Break It Down",
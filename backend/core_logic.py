@@ -5,11 +5,20 @@ No external dependencies - pure logic.
 UPDATED: Badge logic now analyzes actual reflection answers, not generic keywords.
 """
 
+import bisect
+import heapq
+import itertools
 import logging
-from datetime import datetime, timedelta
+import math
+import re
+from datetime import date, datetime, timedelta
+from functools import lru_cache
 
 logger = logging.getLogger(__name__)
 
+# Assume 2 hours max per day for school work
+DEFAULT_HOURS_PER_DAY = 2
+
 
 def validate_project(title: str, description: str) -> dict:
     """
@@ -120,19 +129,168 @@ def validate_success_criteria(criteria_text: str) -> dict:
     return {"valid": True, "error": None, "warning": None}
 
 
-def validate_timeline(tasks: list, deadline_date: str) -> dict:
+# ===== AVAILABILITY CALENDAR (school days, weekends, holidays) =====
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+# School work on school days only, by default
+DEFAULT_HOURS_BY_WEEKDAY = {
+    "monday": DEFAULT_HOURS_PER_DAY,
+    "tuesday": DEFAULT_HOURS_PER_DAY,
+    "wednesday": DEFAULT_HOURS_PER_DAY,
+    "thursday": DEFAULT_HOURS_PER_DAY,
+    "friday": DEFAULT_HOURS_PER_DAY,
+    "saturday": 0,
+    "sunday": 0
+}
+
+# How far ahead the calendar is precomputed
+CALENDAR_HORIZON_DAYS = 3 * 366
+
+
+def parse_holidays(values: list) -> frozenset:
+    """
+    Parse holiday dates: "2026-11-26" or a break like "2026-12-21..2027-01-01" (inclusive).
+    date objects (e.g. from an earlier parse) are kept as they are.
+
+    Returns: frozenset of dates
+    Raises: ValueError for entries that aren't ISO dates or ranges
+    """
+    holidays = set()
+    for value in values or []:
+        if isinstance(value, date) and not isinstance(value, datetime):
+            holidays.add(value)
+            continue
+        value = str(value).strip()
+        if not value:
+            continue
+        first, _, last = value.partition("..")
+        start = date.fromisoformat(first.strip())
+        end = date.fromisoformat(last.strip()) if last else start
+        if end < start:
+            raise ValueError(f"Holiday range ends before it starts: {value}")
+        while start <= end:
+            holidays.add(start)
+            start += timedelta(days=1)
+    return frozenset(holidays)
+
+
+def _weekly_hours(hours_by_weekday: dict = None) -> dict:
+    """Fill in a student's hours per weekday over the defaults."""
+    weekly = dict(DEFAULT_HOURS_BY_WEEKDAY)
+    for day, hours in (hours_by_weekday or {}).items():
+        if str(day).lower() not in weekly:
+            raise ValueError(f"Unknown weekday: {day}")
+        weekly[str(day).lower()] = max(float(hours), 0.0)
+    return weekly
+
+
+class AvailabilityCalendar:
+    """
+    Work hours available on each day from a start date, stored as a cumulative sum
+    so the hours between any two dates is a single subtraction.
+
+    Built once per (start date, weekly hours, holidays) - see get_availability_calendar.
+    """
+
+    def __init__(self, start: date, hours_by_weekday: dict = None, holidays: frozenset = frozenset(), horizon_days: int = CALENDAR_HORIZON_DAYS):
+        weekly = _weekly_hours(hours_by_weekday)
+
+        self.start = start
+        self.horizon_days = horizon_days
+        self.hours_by_weekday = weekly
+
+        daily = []
+        for offset in range(horizon_days):
+            day = start + timedelta(days=offset)
+            daily.append(0.0 if day in holidays else float(weekly[WEEKDAYS[day.weekday()]]))
+
+        self._daily = daily
+        self._cumulative = list(itertools.accumulate(daily, initial=0.0))
+        self._work_days = [offset for offset, hours in enumerate(daily) if hours > 0]
+
+    def _offset(self, day) -> int:
+        if isinstance(day, datetime):
+            day = day.date()
+        return min(max((day - self.start).days, 0), self.horizon_days)
+
+    def hours_between(self, start, end) -> float:
+        """Available hours from start (inclusive) to end (exclusive). O(1)."""
+        return self._cumulative[self._offset(end)] - self._cumulative[self._offset(start)]
+
+    def work_days_between(self, start, end) -> int:
+        """Number of days with any available hours from start to end (exclusive)."""
+        return bisect.bisect_left(self._work_days, self._offset(end)) - bisect.bisect_left(self._work_days, self._offset(start))
+
+    def date_after_hours(self, hours: float, start=None) -> date:
+        """
+        The day on which `hours` of work (starting at start) would be finished.
+        Returns None if that's beyond the calendar.
+        """
+        base = self._cumulative[self._offset(start or self.start)]
+        index = bisect.bisect_left(self._cumulative, base + hours - 1e-9)
+        if index > self.horizon_days:
+            return None
+        return self.start + timedelta(days=max(index - 1, self._offset(start or self.start)))
+
+    def work_day(self, number: int, start=None) -> date:
+        """
+        Date of the Nth available day (0 = first available day on or after start).
+        Returns None if that's beyond the calendar.
+        """
+        index = bisect.bisect_left(self._work_days, self._offset(start or self.start)) + number
+        if index >= len(self._work_days):
+            return None
+        return self.start + timedelta(days=self._work_days[index])
+
+
+@lru_cache(maxsize=64)
+def _cached_calendar(start: date, weekly: tuple, holidays: frozenset) -> AvailabilityCalendar:
+    return AvailabilityCalendar(start, dict(weekly), holidays)
+
+
+def get_availability_calendar(hours_by_weekday: dict = None, holidays: list = None, start: date = None) -> AvailabilityCalendar:
+    """
+    Get the (cached) availability calendar starting today.
+
+    Args:
+        hours_by_weekday: {"monday": hours, ...} for this student (missing days use the default)
+        holidays: List of ISO dates or "start..end" breaks (or parsed dates)
+        start: First day (default: today)
+
+    Raises: ValueError for invalid weekdays or holiday dates
+    """
+    weekly = _weekly_hours(hours_by_weekday)
+    return _cached_calendar(start or date.today(), tuple(sorted(weekly.items())), parse_holidays(holidays))
+
+
+def timeline_status(total_hours: float, available_hours: float) -> tuple:
+    """Status and message for total_hours of work in available_hours."""
+    if total_hours <= available_hours * 0.5:
+        return "good", f"You have {available_hours - total_hours:.0f} extra hours. Good planning!"
+    if total_hours <= available_hours:
+        return "tight", f"That's {total_hours:g} hours of work in {available_hours:g} available hours. Tight, but doable!"
+    return "too_tight", f"That's {total_hours:g} hours of work, but only {available_hours:g} available. You might need more time or help."
+
+
+def validate_timeline(tasks: list, deadline_date: str, experience_level: str = "beginner", calendar: AvailabilityCalendar = None) -> dict:
     """
     Check if timeline is realistic.
 
     Args:
         tasks: List of dicts with 'hours' key
         deadline_date: ISO format date string
+        experience_level: beginner/intermediate/advanced (for the risk forecast)
+        calendar: Availability calendar (default: school days, no holidays - this module
+                  doesn't read config, so callers pass one built with SCHOOL_HOLIDAYS)
 
     Returns: {
         "status": "good/tight/too_tight",
         "total_hours": int,
         "available_hours": int,
-        "message": str
+        "school_days": int,
+        "message": str,
+        "forecast": Monte Carlo risk (see simulate_timeline_risk) or None
     }
     """
     try:
@@ -181,29 +339,23 @@ def validate_timeline(tasks: list, deadline_date: str) -> dict:
                 "realistic": False
             }
 
-        days_available = max((deadline - now).days, 1)  # At least 1 day
+        # Work hours from today up to (not including) the deadline day
+        # At least today counts, even for a deadline later today
+        calendar = calendar or get_availability_calendar(start=now.date())
+        end = max(deadline.date(), now.date() + timedelta(days=1))
+        available_hours = calendar.hours_between(now.date(), end)
+        school_days = calendar.work_days_between(now.date(), end)
 
-        # Assume 2 hours max per day for school work
-        hours_per_day = 2
-        available_hours = days_available * hours_per_day
-
-        # Determine status
-        if total_hours <= available_hours * 0.5:
-            status = "good"
-            message = f"You have {available_hours - total_hours:.0f} extra hours. Good planning!"
-        elif total_hours <= available_hours:
-            status = "tight"
-            message = f"That's {total_hours} hours of work in {available_hours} available hours. Tight, but doable!"
-        else:
-            status = "too_tight"
-            message = f"That's {total_hours} hours of work, but only {available_hours} available. You might need more time or help."
+        status, message = timeline_status(total_hours, available_hours)
 
         return {
             "status": status,
             "total_hours": int(total_hours),
             "available_hours": int(available_hours),
+            "school_days": school_days,
             "message": message,
-            "realistic": status in ["good", "tight"]
+            "realistic": status in ["good", "tight"],
+            "forecast": simulate_timeline_risk(tasks, available_hours, experience_level=experience_level, start_date=now, calendar=calendar)
         }
 
     except Exception as e:
@@ -217,43 +369,937 @@ def validate_timeline(tasks: list, deadline_date: str) -> dict:
         }
 
 
-def validate_team_balance(assignments: dict) -> dict:
+# ===== TIMELINE RISK (Monte Carlo) =====
+
+# Students usually take longer than they guess: (optimistic, most likely, pessimistic)
+# multipliers on the estimated hours, by difficulty
+DIFFICULTY_SPREAD = {
+    "easy": (0.8, 1.0, 1.5),
+    "medium": (0.8, 1.05, 1.8),
+    "hard": (0.85, 1.1, 2.2)
+}
+
+# Less experienced teams run further over their estimates
+EXPERIENCE_PACE = {"beginner": 1.15, "intermediate": 1.05, "advanced": 1.0}
+
+# Above this many task draws (tasks x samples), use the normal approximation
+MAX_SIMULATION_DRAWS = 1_000_000
+
+
+def simulate_timeline_risk(
+    tasks: list,
+    available_hours: float,
+    hours_per_day: float = None,
+    experience_level: str = "beginner",
+    samples: int = 20000,
+    seed: int = 0,
+    start_date: datetime = None,
+    calendar: AvailabilityCalendar = None
+) -> dict:
+    """
+    Estimate the chance of finishing on time with a Monte Carlo simulation.
+
+    Each task's real hours follow a PERT (beta) distribution around the
+    student's estimate, widened by difficulty and scaled by experience level.
+    All samples are drawn at once with NumPy. Plans too big to draw every
+    task (see MAX_SIMULATION_DRAWS) sample the total from its normal approximation.
+
+    Args:
+        tasks: List of dicts with 'hours' and optional 'difficulty'
+        available_hours: Work hours available before the deadline
+        hours_per_day: Work hours per day (turns hours into days), if there's no calendar
+        experience_level: beginner/intermediate/advanced
+        samples: Number of simulated projects
+        seed: Random seed (same plan, same answer)
+        start_date: Day work starts (default: now), for P50/P90 dates
+        calendar: Availability calendar: P50/P90 dates skip weekends and holidays
+
+    Returns: {
+        "probability_on_time": float (0-1),
+        "p50_hours": float, "p90_hours": float,
+        "p50_days": int, "p90_days": int,
+        "p50_date": ISO date, "p90_date": ISO date,
+        "samples": int
+    } or None if NumPy isn't installed or there are no tasks
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        logger.warning("NumPy not installed, skipping timeline risk simulation")
+        return None
+
+    low, mode, high = [], [], []
+    pace = EXPERIENCE_PACE.get(str(experience_level).lower(), EXPERIENCE_PACE["beginner"])
+    for task in tasks:
+        if not isinstance(task, dict):
+            continue
+        try:
+            hours = float(task.get('hours', 0))
+        except (ValueError, TypeError):
+            continue
+        if hours <= 0:
+            continue
+        spread = DIFFICULTY_SPREAD.get(str(task.get('difficulty', 'medium')).lower(), DIFFICULTY_SPREAD["medium"])
+        low.append(hours * spread[0])
+        mode.append(hours * spread[1] * pace)
+        high.append(hours * spread[2] * pace)
+
+    if not low or (calendar is None and (hours_per_day or 0) <= 0):
+        return None
+
+    low = np.array(low)
+    high = np.maximum(np.array(high), low + 1e-6)
+    mode = np.clip(np.array(mode), low, high)
+
+    # PERT shape parameters
+    width = high - low
+    alpha = 1 + 4 * (mode - low) / width
+    beta = 1 + 4 * (high - mode) / width
+
+    rng = np.random.default_rng(seed)
+    if len(low) * samples <= MAX_SIMULATION_DRAWS:
+        draws = rng.beta(alpha, beta, size=(samples, len(low)))
+        totals = (low + width * draws).sum(axis=1)
+    else:
+        # Big plans: the sum of many independent tasks is close to normal
+        # (central limit theorem), so sample the total directly from the summed PERT moments
+        total_alpha = alpha + beta
+        mean = (low + width * alpha / total_alpha).sum()
+        variance = (width ** 2 * alpha * beta / (total_alpha ** 2 * (total_alpha + 1))).sum()
+        totals = mean + np.sqrt(variance) * rng.standard_normal(samples)
+
+    p50_hours, p90_hours = np.percentile(totals, [50, 90])
+    start_date = start_date or datetime.now()
+    if calendar is not None:
+        # Calendar days until the finishing day, counting today
+        p50_date = calendar.date_after_hours(float(p50_hours), start_date.date())
+        p90_date = calendar.date_after_hours(float(p90_hours), start_date.date())
+        p50_days = (p50_date - start_date.date()).days + 1 if p50_date else None
+        p90_days = (p90_date - start_date.date()).days + 1 if p90_date else None
+    else:
+        p50_days = math.ceil(p50_hours / hours_per_day)
+        p90_days = math.ceil(p90_hours / hours_per_day)
+        p50_date = (start_date + timedelta(days=p50_days)).date()
+        p90_date = (start_date + timedelta(days=p90_days)).date()
+
+    return {
+        "probability_on_time": round(float(np.mean(totals <= available_hours)), 3),
+        "p50_hours": round(float(p50_hours), 1),
+        "p90_hours": round(float(p90_hours), 1),
+        "p50_days": p50_days,
+        "p90_days": p90_days,
+        "p50_date": p50_date.isoformat() if p50_date else None,
+        "p90_date": p90_date.isoformat() if p90_date else None,
+        "samples": samples
+    }
+
+
+# ===== INCREMENTAL TIMELINE (single-task edits) =====
+
+class TimelineEstimate:
+    """
+    Running timeline totals for one project, updated one task edit at a time.
+
+    Every edit (add, remove, update) costs O(1): it adjusts the total hours and the
+    loads of at most two members, then re-derives the status. Edits return only
+    the fields that changed, so the client doesn't resend or re-read the whole plan.
+    """
+
+    def __init__(self, tasks: list, available_hours: float):
+        self.available_hours = float(available_hours)
+        self.revision = 0
+        self.total_hours = 0.0
+        self.loads = {}
+        self._tasks = {}
+        self._next_id = 0
+        self._undo = None  # during apply_all: ({task_id: entry before}, {member: load before})
+        for index, task in enumerate(tasks):
+            self._add(str(task.get('id', index)), task)
+        self._next_id = len(tasks)
+        self.status, self.message = timeline_status(self.total_hours, self.available_hours)
+
+    @staticmethod
+    def _hours(task: dict) -> float:
+        try:
+            hours = float(task.get('hours', 0))
+        except (ValueError, TypeError):
+            raise ValueError("Invalid task hours. Please enter valid numbers.")
+        if hours <= 0:
+            raise ValueError("All tasks must have at least 1 hour of work.")
+        return hours
+
+    @staticmethod
+    def _member(task: dict) -> str:
+        member = task.get('assigned_to') or None
+        if member is not None and not isinstance(member, str):
+            raise ValueError("assigned_to must be a team member's name.")
+        return member
+
+    def _add(self, task_id: str, task: dict):
+        # Validate everything before touching any totals
+        if task_id in self._tasks:
+            raise ValueError(f"Duplicate task id: {task_id}")
+        hours = self._hours(task)
+        member = self._member(task)
+        self._remember(task_id, member)
+        self._tasks[task_id] = (hours, member)
+        self.total_hours += hours
+        if member:
+            self.loads[member] = self.loads.get(member, 0.0) + hours
+        return member
+
+    def _remove(self, task_id: str):
+        if task_id not in self._tasks:
+            raise KeyError(task_id)
+        hours, member = self._tasks[task_id]
+        self._remember(task_id, member)
+        del self._tasks[task_id]
+        self.total_hours -= hours
+        if member:
+            self.loads[member] -= hours
+            if self.loads[member] <= 1e-9:
+                del self.loads[member]
+        return member
+
+    def snapshot(self) -> dict:
+        """The full state: what the first response (or a resync) needs."""
+        return {
+            "revision": self.revision,
+            "total_hours": round(self.total_hours, 2),
+            "available_hours": round(self.available_hours, 2),
+            "status": self.status,
+            "message": self.message,
+            "realistic": self.status in ["good", "tight"],
+            "loads": {member: round(load, 2) for member, load in self.loads.items()},
+            "task_count": len(self._tasks)
+        }
+
+    def _remember(self, task_id: str, member: str):
+        """Inside apply_all, keep the first state of each task and load an edit touches."""
+        if self._undo is not None:
+            tasks, loads = self._undo
+            tasks.setdefault(task_id, self._tasks.get(task_id))
+            if member:
+                loads.setdefault(member, self.loads.get(member))
+
+    def apply_all(self, edits: list) -> list:
+        """
+        Apply several edits as one: if any edit fails, none of them are applied.
+        Still O(1) per edit - only what the edits touch is saved for the rollback.
+
+        Returns: list of apply() results
+        Raises: like apply(), for the first edit that fails
+        """
+        saved = (self.total_hours, self.revision, self.status, self.message, self._next_id)
+        self._undo = ({}, {})
+        try:
+            return [self.apply(edit) for edit in edits]
+        except Exception:
+            tasks, loads = self._undo
+            for task_id, entry in tasks.items():
+                if entry is None:
+                    self._tasks.pop(task_id, None)
+                else:
+                    self._tasks[task_id] = entry
+            for member, load in loads.items():
+                if load is None:
+                    self.loads.pop(member, None)
+                else:
+                    self.loads[member] = load
+            self.total_hours, self.revision, self.status, self.message, self._next_id = saved
+            raise
+        finally:
+            self._undo = None
+
+    def apply(self, edit: dict) -> dict:
+        """
+        Apply one edit.
+
+        Args:
+            edit: {"op": "add", "task": {...}, "id": optional}
+                  {"op": "remove", "id": str}
+                  {"op": "update", "id": str, "task": {hours and/or assigned_to}}
+
+        Returns: {"revision": int, "id": task id, "changed": {field: new value},
+                  "loads": {member: load} (only members whose load changed; 0 = no tasks left)}
+        Raises: ValueError for invalid edits, KeyError for unknown task ids
+        """
+        op = edit.get('op')
+        task = edit.get('task') or {}
+        before = (round(self.total_hours, 2), self.status, self.message, len(self._tasks))
+
+        if op == "add":
+            if edit.get('id') is not None:
+                task_id = str(edit['id'])
+            else:
+                while str(self._next_id) in self._tasks:
+                    self._next_id += 1
+                task_id = str(self._next_id)
+            members = {self._add(task_id, task)}
+        elif op == "remove":
+            task_id = str(edit.get('id'))
+            members = {self._remove(task_id)}
+        elif op == "update":
+            task_id = str(edit.get('id'))
+            if task_id not in self._tasks:
+                raise KeyError(task_id)
+            hours, member = self._tasks[task_id]
+            updated = {"hours": hours, "assigned_to": member, **task}
+            self._hours(updated)  # validate before touching any totals
+            self._member(updated)
+            members = {self._remove(task_id), self._add(task_id, updated)}
+        else:
+            raise ValueError(f"Unknown edit op: {op}")
+
+        self.status, self.message = timeline_status(self.total_hours, self.available_hours)
+        self.revision += 1
+
+        after = (round(self.total_hours, 2), self.status, self.message, len(self._tasks))
+        changed = {
+            field: new for field, old, new in zip(("total_hours", "status", "message", "task_count"), before, after)
+            if old != new
+        }
+        if "status" in changed:
+            changed["realistic"] = self.status in ["good", "tight"]
+
+        return {
+            "revision": self.revision,
+            "id": task_id,
+            "changed": changed,
+            "loads": {member: round(self.loads.get(member, 0.0), 2) for member in members if member}
+        }
+
+
+# ===== SCHEDULING (critical path + per-member day plans) =====
+
+def _schedule_graph(tasks: list) -> tuple:
+    """
+    Normalize tasks into ids, hours and dependency lists, in topological order.
+    Task ids are the "id" field if present, otherwise the list index (as strings).
+
+    Returns: (ids in topological order, {id: task info}, {id: list of dependents})
+    Raises: ValueError for unknown dependencies or a dependency cycle
+    """
+    info = {}
+    for index, task in enumerate(tasks):
+        task_id = str(task.get('id', index))
+        if task_id in info:
+            raise ValueError(f"Duplicate task id: {task_id}")
+        try:
+            hours = float(task.get('hours', 0))
+        except (ValueError, TypeError):
+            raise ValueError(f"Invalid hours for task {task_id}")
+        if hours <= 0:
+            raise ValueError(f"Task {task_id} needs at least some hours of work")
+        depends_on = task.get('depends_on') or []
+        if not isinstance(depends_on, list):
+            depends_on = [depends_on]
+        info[task_id] = {
+            "task": task.get('task') or task.get('name') or f"Task {task_id}",
+            "hours": hours,
+            "assigned_to": task.get('assigned_to') or None,
+            "depends_on": [str(dep) for dep in depends_on]
+        }
+
+    dependents = {task_id: [] for task_id in info}
+    remaining = {}
+    for task_id, task in info.items():
+        for dep in task["depends_on"]:
+            if dep not in info:
+                raise ValueError(f"Task {task_id} depends on unknown task {dep}")
+            dependents[dep].append(task_id)
+        remaining[task_id] = len(task["depends_on"])
+
+    # Kahn's algorithm
+    order = [task_id for task_id, count in remaining.items() if count == 0]
+    for task_id in order:
+        for dependent in dependents[task_id]:
+            remaining[dependent] -= 1
+            if remaining[dependent] == 0:
+                order.append(dependent)
+
+    if len(order) != len(info):
+        raise ValueError("Task dependencies have a cycle")
+
+    return order, info, dependents
+
+
+def schedule_tasks(tasks: list, capacity: dict = None, default_hours_per_day: float = DEFAULT_HOURS_PER_DAY, calendar: AvailabilityCalendar = None) -> dict:
+    """
+    Build a dependency-aware schedule for a task plan.
+
+    1. Critical path (ignoring who does what): earliest/latest start and slack
+       for every task, in days, from a forward and backward pass in topological order.
+    2. Resource schedule: priority-list scheduling (least latest-start first)
+       where each member works their own hours per day. Unassigned tasks go to
+       whoever can start them earliest.
+
+    Args:
+        tasks: List of {task, hours, id (optional), depends_on (optional list of ids), assigned_to (optional)}
+        capacity: {member: hours per day} (members not listed get default_hours_per_day)
+        default_hours_per_day: Capacity for anyone not in capacity
+        calendar: Availability calendar - work day N lands on the calendar's Nth
+                  available day (skipping weekends and holidays) and gets a date
+
+    Returns: {
+        "tasks": list of {id, task, hours, assigned_to, earliest_start, latest_start, slack,
+                          critical, scheduled_start, scheduled_finish} (days from today),
+        "critical_path": list of task ids,
+        "critical_path_days": float (shortest possible finish with unlimited help),
+        "makespan_days": float (finish with this team),
+        "days_needed": int,
+        "finish_date": ISO date (only with a calendar),
+        "members": {member: list of {day, date (with a calendar), hours, tasks: [{id, hours}]}}
+    }
+    With a calendar, task rows also get start_date and finish_date.
+    Raises: ValueError for invalid tasks or dependency cycles
+    """
+    order, info, dependents = _schedule_graph(tasks)
+    capacity = {name: float(hours) for name, hours in (capacity or {}).items() if name and float(hours) > 0}
+
+    members = list(capacity)
+    for task_id in order:
+        member = info[task_id]["assigned_to"]
+        if member and member not in capacity:
+            capacity[member] = float(default_hours_per_day)
+            members.append(member)
+
+    def hours_per_day(member):
+        return capacity.get(member, float(default_hours_per_day))
+
+    # Task length in days: at the assignee's pace, or the default pace if unassigned
+    duration = {task_id: info[task_id]["hours"] / hours_per_day(info[task_id]["assigned_to"]) for task_id in order}
+
+    # Forward pass
+    earliest_start = {}
+    earliest_finish = {}
+    for task_id in order:
+        start = max((earliest_finish[dep] for dep in info[task_id]["depends_on"]), default=0.0)
+        earliest_start[task_id] = start
+        earliest_finish[task_id] = start + duration[task_id]
+    critical_path_days = max(earliest_finish.values(), default=0.0)
+
+    # Backward pass
+    latest_finish = {}
+    latest_start = {}
+    for task_id in reversed(order):
+        finish = min((latest_start[dep] for dep in dependents[task_id]), default=critical_path_days)
+        latest_finish[task_id] = finish
+        latest_start[task_id] = finish - duration[task_id]
+
+    slack = {task_id: latest_start[task_id] - earliest_start[task_id] for task_id in order}
+    critical = {task_id: slack[task_id] <= 1e-9 for task_id in order}
+
+    # Walk one chain of zero-slack tasks from start to finish
+    critical_path = []
+    current = min(
+        (t for t in order if critical[t] and not info[t]["depends_on"]),
+        key=lambda t: earliest_start[t],
+        default=None
+    )
+    while current is not None:
+        critical_path.append(current)
+        current = next(
+            (d for d in dependents[current] if critical[d] and abs(earliest_start[d] - earliest_finish[current]) <= 1e-9),
+            None
+        )
+
+    # Resource-constrained schedule (serial priority-list scheduling)
+    position = {task_id: i for i, task_id in enumerate(order)}
+    waiting = {task_id: len(info[task_id]["depends_on"]) for task_id in order}
+    ready = [(latest_start[t], position[t], t) for t in order if waiting[t] == 0]
+    heapq.heapify(ready)
+    available = {member: 0.0 for member in members}
+    scheduled = {}
+    assignee = {}
+
+    while ready:
+        _, _, task_id = heapq.heappop(ready)
+        ready_at = max((scheduled[dep][1] for dep in info[task_id]["depends_on"]), default=0.0)
+
+        member = info[task_id]["assigned_to"]
+        if member is None:
+            if members:
+                member = min(members, key=lambda m: (max(available[m], ready_at) + info[task_id]["hours"] / hours_per_day(m)))
+            else:
+                member = "Unassigned"
+                members.append(member)
+                available[member] = 0.0
+
+        start = max(available[member], ready_at)
+        finish = start + info[task_id]["hours"] / hours_per_day(member)
+        available[member] = finish
+        scheduled[task_id] = (start, finish)
+        assignee[task_id] = member
+
+        for dependent in dependents[task_id]:
+            waiting[dependent] -= 1
+            if waiting[dependent] == 0:
+                heapq.heappush(ready, (latest_start[dependent], position[dependent], dependent))
+
+    makespan = max((finish for _, finish in scheduled.values()), default=0.0)
+
+    # Day-by-day plan per member (day 1 = today)
+    days = {member: {} for member in members}
+    for task_id in sorted(scheduled, key=lambda t: scheduled[t][0]):
+        start, finish = scheduled[task_id]
+        plan = days[assignee[task_id]]
+        pace = hours_per_day(assignee[task_id])
+        day = int(start)
+        while day < finish - 1e-9:
+            worked = (min(finish, day + 1) - max(start, day)) * pace
+            if worked > 1e-9:
+                entry = plan.get(day)
+                if entry is None:
+                    entry = plan[day] = {"day": day + 1, "hours": 0.0, "tasks": []}
+                entry["hours"] += worked
+                entry["tasks"].append({"id": task_id, "hours": round(worked, 2)})
+            day += 1
+
+    def work_date(day):
+        found = calendar.work_day(day)
+        return found.isoformat() if found else None
+
+    for plan in days.values():
+        for entry in plan.values():
+            entry["hours"] = round(entry["hours"], 2)
+            if calendar is not None:
+                entry["date"] = work_date(entry["day"] - 1)
+
+    task_rows = []
+    for task_id in order:
+        task = info[task_id]
+        start, finish = scheduled[task_id]
+        task_rows.append({
+            "id": task_id,
+            "task": task["task"],
+            "hours": task["hours"],
+            "assigned_to": assignee[task_id],
+            "earliest_start": round(earliest_start[task_id], 2),
+            "latest_start": round(latest_start[task_id], 2) + 0.0,
+            "slack": round(max(slack[task_id], 0.0), 2),
+            "critical": critical[task_id],
+            "scheduled_start": round(start, 2),
+            "scheduled_finish": round(finish, 2)
+        })
+        if calendar is not None:
+            task_rows[-1]["start_date"] = work_date(int(start))
+            task_rows[-1]["finish_date"] = work_date(max(math.ceil(finish - 1e-9) - 1, int(start)))
+
+    result = {
+        "tasks": task_rows,
+        "critical_path": critical_path,
+        "critical_path_days": round(critical_path_days, 2),
+        "makespan_days": round(makespan, 2),
+        "days_needed": math.ceil(makespan - 1e-9),
+        "members": {member: [plan[day] for day in sorted(plan)] for member, plan in days.items()}
+    }
+    if calendar is not None:
+        result["finish_date"] = work_date(max(result["days_needed"] - 1, 0))
+    return result
+
+
+# ===== TEAM BALANCE (hours-weighted) =====
+
+# Harder tasks take more effort per hour
+DIFFICULTY_WEIGHTS = {"easy": 1.0, "medium": 1.25, "hard": 1.5}
+
+
+def task_effort(task: dict) -> float:
+    """
+    Effort for one task: hours weighted by difficulty.
+    Missing or invalid hours count as 1 (so unknown tasks still count).
+    """
+    try:
+        hours = float(task.get('hours', 1))
+    except (ValueError, TypeError):
+        hours = 1.0
+    if hours <= 0:
+        hours = 1.0
+    difficulty = str(task.get('difficulty', 'medium')).lower()
+    return hours * DIFFICULTY_WEIGHTS.get(difficulty, DIFFICULTY_WEIGHTS["medium"])
+
+
+def _loads_for(assignment: dict, efforts: dict, people: list) -> dict:
+    loads = {person: 0.0 for person in people}
+    for task_id, person in assignment.items():
+        loads[person] += efforts[task_id]
+    return loads
+
+
+def _closest_below(sorted_tasks: list, target: float, low: float, high: float):
+    """
+    In a list of (effort, seq, task_id) sorted by effort, find the task whose
+    effort is closest to target, strictly between low and high.
+    """
+    index = bisect.bisect_left(sorted_tasks, (target,))
+    best = None
+    for candidate in sorted_tasks[max(index - 1, 0):index + 1]:
+        if low < candidate[0] < high and (best is None or abs(candidate[0] - target) < abs(best[0] - target)):
+            best = candidate
+    return best
+
+
+def _improve_balance(assignment: dict, efforts: dict, people: list, max_iterations: int = 2000) -> dict:
+    """
+    Local search: move or swap tasks away from the busiest person while that
+    lowers the spread of loads (sum of squared loads strictly decreases).
+
+    Moving effort d from the busiest person to someone with a load gap g
+    improves things by d * (g - d), which is largest when d is closest to g / 2,
+    so each person's tasks are kept sorted and the best candidate is a bisect away.
+    Single moves run first (cheap), then moves and swaps together.
+    """
+    assignment = dict(assignment)
+    loads = _loads_for(assignment, efforts, people)
+    sorted_tasks = {person: [] for person in people}
+    for seq, (task_id, person) in enumerate(assignment.items()):
+        sorted_tasks[person].append((efforts[task_id], seq, task_id))
+    for tasks in sorted_tasks.values():
+        tasks.sort()
+
+    def transfer(entry, source, target):
+        sorted_tasks[source].remove(entry)
+        bisect.insort(sorted_tasks[target], entry)
+        assignment[entry[2]] = target
+        loads[source] -= entry[0]
+        loads[target] += entry[0]
+
+    for allow_swaps in (False, True):
+        for _ in range(max_iterations):
+            busiest = max(people, key=lambda p: loads[p])
+            best = None  # (gain, task entry, other person, swap entry or None)
+
+            for other in people:
+                gap = loads[busiest] - loads[other]
+                if other == busiest or gap <= 1e-9:
+                    continue
+
+                entry = _closest_below(sorted_tasks[busiest], gap / 2, 0, gap)
+                if entry:
+                    gain = entry[0] * (gap - entry[0])
+                    if best is None or gain > best[0]:
+                        best = (gain, entry, other, None)
+
+                if allow_swaps:
+                    for entry in sorted_tasks[busiest]:
+                        swap = _closest_below(sorted_tasks[other], entry[0] - gap / 2, entry[0] - gap, entry[0])
+                        if swap:
+                            delta = entry[0] - swap[0]
+                            gain = delta * (gap - delta)
+                            if best is None or gain > best[0]:
+                                best = (gain, entry, other, swap)
+
+            if best is None or best[0] <= 1e-9:
+                break
+
+            _, entry, other, swap = best
+            transfer(entry, busiest, other)
+            if swap is not None:
+                transfer(swap, other, busiest)
+
+    return assignment
+
+
+def _lpt_assignment(efforts: dict, people: list, current: dict) -> dict:
+    """
+    Longest-processing-time greedy: biggest task first, to the least-loaded person.
+    Bins are then matched to people by how much of their current work they keep,
+    so the plan needs as few moves as possible.
+    """
+    bins = [[] for _ in people]
+    heap = [(0.0, i) for i in range(len(people))]
+    for task_id in sorted(efforts, key=lambda t: (-efforts[t], str(t))):
+        load, i = heapq.heappop(heap)
+        bins[i].append(task_id)
+        heapq.heappush(heap, (load + efforts[task_id], i))
+
+    # Greedy matching: highest overlap (in effort) first
+    overlaps = []
+    for i, bin_tasks in enumerate(bins):
+        for person in people:
+            kept = sum(efforts[t] for t in bin_tasks if current.get(t) == person)
+            overlaps.append((kept, i, person))
+    overlaps.sort(key=lambda o: -o[0])
+
+    bin_owner = {}
+    taken = set()
+    for _, i, person in overlaps:
+        if i not in bin_owner and person not in taken:
+            bin_owner[i] = person
+            taken.add(person)
+
+    return {task_id: bin_owner[i] for i, bin_tasks in enumerate(bins) for task_id in bin_tasks}
+
+
+def suggest_balanced_assignment(efforts: dict, current: dict, people: list) -> dict:
+    """
+    Find a near-optimal reassignment of tasks that evens out effort.
+
+    Tries local search from the current assignment and from an LPT greedy
+    assignment, and keeps the better one (fewer moves on a tie).
+
+    Args:
+        efforts: {task_id: effort}
+        current: {task_id: person}
+        people: Everyone on the team (including people with no tasks yet)
+
+    Returns: {
+        "assignment": {task_id: person},
+        "loads": {person: effort},
+        "moves": list of task_ids that change owner
+    }
+    """
+    candidates = [_improve_balance(current, efforts, people)]
+    if len(people) > 1:
+        candidates.append(_improve_balance(_lpt_assignment(efforts, people, current), efforts, people))
+
+    def score(assignment):
+        loads = _loads_for(assignment, efforts, people)
+        moves = sum(1 for t in assignment if assignment[t] != current[t])
+        return (round(max(loads.values()), 6), round(sum(l * l for l in loads.values()), 6), moves)
+
+    best = min(candidates, key=score)
+    return {
+        "assignment": best,
+        "loads": _loads_for(best, efforts, people),
+        "moves": [t for t in best if best[t] != current[t]]
+    }
+
+
+def _task_for_id(tasks, task_id):
+    """Find a task by its id field, or by list index (the frontend keys assignments by index)."""
+    if isinstance(tasks, dict):
+        return tasks.get(task_id, tasks.get(str(task_id)))
+    for task in tasks:
+        if isinstance(task, dict) and 'id' in task and str(task['id']) == str(task_id):
+            return task
+    try:
+        index = int(task_id)
+    except (ValueError, TypeError):
+        return None
+    if 0 <= index < len(tasks) and isinstance(tasks[index], dict):
+        return tasks[index]
+    return None
+
+
+def validate_team_balance(assignments: dict, tasks: list = None, team_members: list = None) -> dict:
     """
     Check that work is distributed fairly across team.
 
+    Without tasks, every task counts the same. With tasks, work is measured in
+    hours weighted by difficulty, so one 6h build task outweighs five 1h tasks.
+
     Args:
         assignments: Dict of {task_id: person_name, ...}
+        tasks: Optional list (indexed by task_id, or with "id" keys) or dict of task dicts
+        team_members: Optional list of everyone on the team, including people with no tasks
 
     Returns: {
         "balanced": bool,
         "warning": str or None,
-        "suggestion": str or None
+        "suggestion": str or None,
+        "loads": {person: hours},
+        "suggested_moves": list of {task_id, task, from, to, effort}
     }
     """
+    assignments = {task_id: person for task_id, person in (assignments or {}).items() if person}
     if not assignments:
-        return {"balanced": True, "warning": None, "suggestion": None}
-
-    # Count work per person
-    work_per_person = {}
-    for person in assignments.values():
-        work_per_person[person] = work_per_person.get(person, 0) + 1
+        return {"balanced": True, "warning": None, "suggestion": None, "loads": {}, "suggested_moves": []}
+
+    people = list(dict.fromkeys([m for m in (team_members or []) if m] + list(assignments.values())))
+    weighted = tasks is not None
+
+    efforts = {}
+    for task_id in assignments:
+        task = _task_for_id(tasks, task_id) if weighted else None
+        efforts[task_id] = task_effort(task) if task else 1.0
+
+    loads = _loads_for(assignments, efforts, people)
+    max_work = max(loads.values())
+    min_work = min(loads.values())
+
+    plan = suggest_balanced_assignment(efforts, assignments, people)
+    best_spread = max(plan["loads"].values()) - min(plan["loads"].values())
+
+    # If someone has 50% more work than others (and moving tasks could actually make it fairer)
+    if max_work > min_work * 1.5 and best_spread < max_work - min_work - 1e-9:
+        person_with_max = max(loads, key=loads.get)
+
+        suggested_moves = []
+        for task_id in plan["moves"]:
+            task = _task_for_id(tasks, task_id) if weighted else None
+            suggested_moves.append({
+                "task_id": task_id,
+                "task": (task.get('task') or task.get('name')) if task else None,
+                "from": assignments[task_id],
+                "to": plan["assignment"][task_id],
+                "effort": round(efforts[task_id], 2)
+            })
 
-    if not work_per_person:
-        return {"balanced": True, "warning": None, "suggestion": None}
+        if weighted:
+            warning = f"{person_with_max} has way more work ({max_work:.0f}h vs {min_work:.0f}h). Is that fair?"
+        else:
+            warning = f"{person_with_max} has way more tasks. Is that fair?"
 
-    max_work = max(work_per_person.values())
-    min_work = min(work_per_person.values())
+        first = suggested_moves[0]
+        label = f"'{first['task']}'" if first["task"] else "a task"
+        suggestion = f"Try moving {label} from {first['from']} to {first['to']}."
+        if len(suggested_moves) > 1:
+            suggestion += f" ({len(suggested_moves)} moves would even things out.)"
 
-    # If someone has 50% more work than others
-    if max_work > min_work * 1.5:
-        person_with_max = max(work_per_person, key=work_per_person.get)
         return {
             "balanced": False,
-            "warning": f"{person_with_max} has way more tasks. Is that fair?",
-            "suggestion": "Try moving tasks around so everyone has similar work."
+            "warning": warning,
+            "suggestion": suggestion,
+            "loads": {person: round(load, 2) for person, load in loads.items()},
+            "suggested_moves": suggested_moves
         }
 
-    return {"balanced": True, "warning": None, "suggestion": None}
+    return {
+        "balanced": True,
+        "warning": None,
+        "suggestion": None,
+        "loads": {person: round(load, 2) for person, load in loads.items()},
+        "suggested_moves": []
+    }
+
+
+# ===== BADGE RULES (data, not code) =====
+# Each rule can be earned by keywords in the reflection, by editing tasks,
+# and/or by an accurate timeline. Adding a badge = adding a row here;
+# every keyword rule is still checked in the same single pass over the text.
+
+BADGE_RULES = [
+    {
+        "id": "break_it_down",
+        "name": "I Can Break It Down",
+        "reason": "You learned how to split big goals into manageable tasks.",
+        "emoji": "🧩",
+        "keywords": ["break", "task", "step", "smaller", "split", "chunk", "pieces", "break down", "divided"],
+        "or_tasks_edited": True,
+        "accuracy_window": None
+    },
+    {
+        "id": "team_player",
+        "name": "Team Player",
+        "reason": "Your teamwork and collaboration made the difference!",
+        "emoji": "👥",
+        "keywords": ["team", "together", "helped", "worked with", "partner", "group", "collaborated", "coordinated", "communicated", "teammate"],
+        "or_tasks_edited": False,
+        "accuracy_window": None
+    },
+    {
+        "id": "planner_power",
+        "name": "Planner Power",
+        "reason": "You're good at guessing how long things take!",
+        "emoji": "⏰",
+        "keywords": None,
+        "or_tasks_edited": False,
+        # Timeline estimate within 20% of actual
+        "accuracy_window": (0.8, 1.2)
+    }
+]
+
+# Reflection must be longer than this for keyword badges.
+# NEW format (custom prompts + answers) needs a substantive answer; OLD format never did.
+REFLECTION_MIN_LENGTH = {"answers": 20, "text": 0}
+
+
+def compile_badge_rules(rules: list) -> dict:
+    """
+    Compile badge rules into one matcher for a single pass over the reflection.
+
+    All keywords go into one lookahead regex, so a match is found at every
+    position (overlapping keywords from different badges are never hidden).
+    Each keyword maps to every badge it proves, including badges whose keyword
+    is a prefix of it (e.g. "teammate" also proves a "team" rule).
+
+    Returns: {"rules": list, "pattern": compiled regex or None, "keyword_badges": {keyword: set of ids}}
+    """
+    badges_by_keyword = {}
+    for rule in rules:
+        for keyword in rule.get("keywords") or []:
+            badges_by_keyword.setdefault(keyword.lower(), set()).add(rule["id"])
+
+    keyword_badges = {}
+    for keyword in badges_by_keyword:
+        keyword_badges[keyword] = set()
+        for other, badge_ids in badges_by_keyword.items():
+            if keyword.startswith(other):
+                keyword_badges[keyword] |= badge_ids
+
+    pattern = None
+    if keyword_badges:
+        ordered = sorted(keyword_badges, key=len, reverse=True)
+        pattern = re.compile("(?=(" + "|".join(re.escape(kw) for kw in ordered) + "))")
+
+    return {"rules": rules, "pattern": pattern, "keyword_badges": keyword_badges}
+
+
+BADGE_MATCHER = compile_badge_rules(BADGE_RULES)
+
+
+def match_badge_keywords(text: str, matcher: dict = BADGE_MATCHER) -> set:
+    """
+    Find which badges' keywords appear in the text, in one pass.
+    Stops early once every keyword badge has been found.
+
+    Returns: set of badge ids
+    """
+    pattern = matcher["pattern"]
+    if pattern is None or not text:
+        return set()
+
+    keyword_badges = matcher["keyword_badges"]
+    total = sum(1 for rule in matcher["rules"] if rule.get("keywords"))
+    found = set()
+    for match in pattern.finditer(text.lower()):
+        found |= keyword_badges[match.group(1)]
+        if len(found) == total:
+            break
+    return found
+
+
+def evaluate_badges(reflection: str = None, tasks_edited: bool = False, timeline_accuracy: float = 1.0, min_length: int = 0, matcher: dict = BADGE_MATCHER) -> list:
+    """
+    Evaluate every badge rule against one reflection.
+
+    Args:
+        reflection: Combined reflection text, or None if there is no reflection
+            (keyword and tasks-edited badges need a reflection)
+        tasks_edited: Whether student edited the AI-generated tasks
+        timeline_accuracy: Ratio of actual to estimated time
+        min_length: Reflection must be longer than this for keyword badges
+        matcher: Compiled rules from compile_badge_rules
+
+    Returns: List of badge dicts with name, reason, emoji (in rule order)
+    """
+    has_reflection = reflection is not None and len(reflection) > min_length
+    keyword_hits = match_badge_keywords(reflection, matcher) if has_reflection else set()
+
+    badges = []
+    for rule in matcher["rules"]:
+        if rule.get("keywords") or rule.get("or_tasks_edited"):
+            earned = has_reflection and (
+                rule["id"] in keyword_hits
+                or (rule.get("or_tasks_edited") and tasks_edited)
+            )
+        else:
+            earned = True
+
+        window = rule.get("accuracy_window")
+        if window:
+            earned = earned and window[0] <= timeline_accuracy <= window[1]
+
+        if earned:
+            badges.append({
+                "name": rule["name"],
+                "reason": rule["reason"],
+                "emoji": rule["emoji"]
+            })
+
+    return badges
 
 
 def award_badges(reflection_prompts: list = None, reflection_answers: list = None, tasks_edited: bool = False, timeline_accuracy: float = 1.0, reflection_text: str = '') -> list:
@@ -272,67 +1318,148 @@ def award_badges(reflection_prompts: list = None, reflection_answers: list = Non
 
     Returns: List of badge dicts with name, reason, emoji
     """
-    badges = []
+    reflection, min_length = _reflection_for_badges(reflection_prompts, reflection_answers, reflection_text)
+    return evaluate_badges(reflection, tasks_edited, timeline_accuracy, min_length)
+
 
+def _reflection_for_badges(reflection_prompts: list = None, reflection_answers: list = None, reflection_text: str = '') -> tuple:
+    """
+    Pick the reflection text to analyze and its length threshold.
+
+    Returns: (reflection text or None, min_length)
+    """
     # NEW: Use custom prompts + answers if available
     # This is the NEW flow - prompts are specific to project, so we analyze answers
     if reflection_prompts and reflection_answers:
-        combined_reflection = " ".join(reflection_answers) if reflection_answers else ""
-        combined_reflection_lower = combined_reflection.lower()
-
-        # Badge 1: "I Can Break It Down"
-        # Awarded if: Student mentions tasks, steps, decomposition, or edited tasks
-        decomp_keywords = ["break", "task", "step", "smaller", "split", "chunk", "pieces", "break down", "divided"]
-        if (tasks_edited or any(kw in combined_reflection_lower for kw in decomp_keywords)) and len(combined_reflection) > 20:
-            if not any(b["name"] == "I Can Break It Down" for b in badges):
-                badges.append({
-                    "name": "I Can Break It Down",
-                    "reason": "You learned how to split big goals into manageable tasks.",
-                    "emoji": "🧩"
-                })
-
-        # Badge 3: "Team Player"
-        # Awarded if: Student mentions teamwork, collaboration, helping others
-        collab_keywords = ["team", "together", "helped", "worked with", "partner", "group", "collaborated", "coordinated", "communicated", "teammate"]
-        if any(kw in combined_reflection_lower for kw in collab_keywords) and len(combined_reflection) > 20:
-            if not any(b["name"] == "Team Player" for b in badges):
-                badges.append({
-                    "name": "Team Player",
-                    "reason": "Your teamwork and collaboration made the difference!",
-                    "emoji": "👥"
-                })
+        reflection = " ".join("" if a is None else str(a) for a in reflection_answers)
+        return reflection, REFLECTION_MIN_LENGTH["answers"]
 
     # OLD: Fallback for backward compatibility (if no custom prompts)
-    # This keeps the app working with old-format reflection data
-    elif reflection_text:
-        reflection_lower = reflection_text.lower()
+    if reflection_text:
+        return reflection_text, REFLECTION_MIN_LENGTH["text"]
 
-        decomposition_keywords = ["break", "task", "step", "smaller", "split", "chunk", "pieces", "break down", "divided"]
-        if tasks_edited or any(kw in reflection_lower for kw in decomposition_keywords):
-            badges.append({
-                "name": "I Can Break It Down",
-                "reason": "You learned how to split big goals into manageable tasks.",
-                "emoji": "🧩"
-            })
+    # No reflection: only badges that don't need one (e.g. Planner Power)
+    return None, 0
 
-        collaboration_keywords = ["team", "together", "helped", "worked with", "partner", "group", "collaborated", "coordinated", "communicated", "teammate"]
-        if any(kw in reflection_lower for kw in collaboration_keywords):
-            badges.append({
-                "name": "Team Player",
-                "reason": "Your teamwork and collaboration made the difference!",
-                "emoji": "👥"
-            })
 
-    # Badge 2: "Planner Power" (independent, works same way)
-    # Awarded if: timeline estimate was accurate (within 20%)
-    if 0.8 <= timeline_accuracy <= 1.2:
-        badges.append({
-            "name": "Planner Power",
-            "reason": "You're good at guessing how long things take!",
-            "emoji": "⏰"
-        })
+def award_badges_for_reflection(reflection: dict, tasks_edited: bool = False, timeline_accuracy: float = 1.0) -> list:
+    """
+    Award badges from a reflection payload in either request format.
 
-    return badges
+    Args:
+        reflection: {"prompts": [...], "answers": [...]} (NEW)
+            or {"went_well": str, "was_hard": str, "learned": str} (OLD)
+
+    Returns: List of badge dicts with name, reason, emoji
+    """
+    reflection, min_length = _reflection_payload_for_badges(reflection)
+    return evaluate_badges(reflection, tasks_edited, timeline_accuracy, min_length)
+
+
+def _reflection_payload_for_badges(reflection) -> tuple:
+    """
+    Same as _reflection_for_badges, for a reflection payload (dict in either format)
+    or a plain OLD-format reflection string.
+    """
+    if isinstance(reflection, str):
+        return _reflection_for_badges(reflection_text=reflection)
+
+    reflection = reflection or {}
+    if 'prompts' in reflection and 'answers' in reflection:
+        return _reflection_for_badges(reflection.get('prompts', []), reflection.get('answers', []))
+
+    combined_old_reflection = f"{reflection.get('went_well', '')} {reflection.get('was_hard', '')} {reflection.get('learned', '')}"
+    return _reflection_for_badges(reflection_text=combined_old_reflection)
+
+
+def award_badges_batch(reflections: list, tasks_edited: list = None, timeline_accuracy: list = None, matcher: dict = BADGE_MATCHER) -> dict:
+    """
+    Award badges for a whole class at once (columnar).
+
+    All reflections are lowercased and joined into one string, the badge
+    keyword regex runs over it once, and match offsets are mapped back to
+    students. Each badge is then evaluated as a column.
+
+    Args:
+        reflections: List of reflection payloads (dict in either format) or OLD-format strings
+        tasks_edited: List of bools, one per reflection (default all False)
+        timeline_accuracy: List of floats, one per reflection (default all 1.0)
+
+    Returns: {
+        "badges": list of badge names (matrix column order),
+        "matrix": list of rows, one per reflection, of bools per badge,
+        "counts": {badge name: number of students who earned it},
+        "total": int
+    }
+    """
+    count = len(reflections)
+    tasks_edited = tasks_edited if tasks_edited is not None else [False] * count
+    timeline_accuracy = timeline_accuracy if timeline_accuracy is not None else [1.0] * count
+    if len(tasks_edited) != count or len(timeline_accuracy) != count:
+        raise ValueError("tasks_edited and timeline_accuracy must have one value per reflection")
+
+    # Column: does this student have a substantive reflection?
+    texts = []
+    has_reflection = []
+    for reflection in reflections:
+        text, min_length = _reflection_payload_for_badges(reflection)
+        substantive = text is not None and len(text) > min_length
+        has_reflection.append(substantive)
+        # Never appears in keywords, so no match can span two students
+        texts.append(text.lower().replace("\x00", " ") if substantive else "")
+
+    rules = matcher["rules"]
+    rule_index = {rule["id"]: i for i, rule in enumerate(rules)}
+    keyword_hits = [[False] * count for _ in rules]
+
+    if matcher["pattern"] is not None and any(has_reflection):
+        offsets = []
+        position = 0
+        for text in texts:
+            offsets.append(position)
+            position += len(text) + 1
+
+        keyword_badges = matcher["keyword_badges"]
+        for match in matcher["pattern"].finditer("\x00".join(texts)):
+            student = bisect.bisect_right(offsets, match.start()) - 1
+            for badge_id in keyword_badges[match.group(1)]:
+                keyword_hits[rule_index[badge_id]][student] = True
+
+    def as_accuracy(value):
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return None
+
+    accuracy = [as_accuracy(value) for value in timeline_accuracy]
+
+    columns = []
+    for i, rule in enumerate(rules):
+        if rule.get("keywords") or rule.get("or_tasks_edited"):
+            hits = keyword_hits[i]
+            column = [
+                has_reflection[s] and (hits[s] or bool(rule.get("or_tasks_edited") and tasks_edited[s]))
+                for s in range(count)
+            ]
+        else:
+            column = [True] * count
+
+        window = rule.get("accuracy_window")
+        if window:
+            low, high = window
+            column = [
+                earned and value is not None and low <= value <= high
+                for earned, value in zip(column, accuracy)
+            ]
+        columns.append(column)
+
+    names = [rule["name"] for rule in rules]
+    return {
+        "badges": names,
+        "matrix": [list(row) for row in zip(*columns)] if count else [],
+        "counts": {name: sum(column) for name, column in zip(names, columns)},
+        "total": count
+    }
 
 
 def get_badge_feedback(badges: list) -> str:
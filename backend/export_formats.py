@@ -0,0 +1,256 @@
+"""
+Lightweight export formats for Sprint Kit projects: Markdown, CSV of tasks,
+canonical JSON and iCalendar (.ics).
+Plain text built with the standard library - no reportlab - so these render in
+microseconds. Each format is a generator of text chunks, ready to stream.
+PDF stays in pdf_export.py.
+"""
+
+import csv
+import hashlib
+import io
+import json
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable, NamedTuple
+
+
+class ExportFormat(NamedTuple):
+    """One registered export format."""
+    name: str
+    mimetype: str
+    extension: str
+    render: Callable  # project dict -> iterator of str chunks
+
+
+EXPORT_FORMATS = {}
+
+# PDF is binary and rendered by pdf_export, so it isn't registered, but it can still be chosen by name/Accept
+PDF_MIMETYPE = "application/pdf"
+
+
+def register_export_format(name: str, mimetype: str, extension: str):
+    """Decorator: add a project -> text chunks generator to EXPORT_FORMATS."""
+    def register(render):
+        EXPORT_FORMATS[name] = ExportFormat(name, mimetype, extension, render)
+        return render
+    return register
+
+
+def find_export_format(requested: str) -> str:
+    """
+    Registered format name for a name, file extension or mimetype ("md", "text/csv", ...).
+
+    Returns: format name, "pdf", or None if unknown
+    """
+    requested = (requested or "").strip().lower()
+    if requested in ("pdf", PDF_MIMETYPE):
+        return "pdf"
+    for export_format in EXPORT_FORMATS.values():
+        if requested in (export_format.name, export_format.extension, export_format.mimetype):
+            return export_format.name
+    return None
+
+
+def export_mimetypes() -> list:
+    """Every mimetype a client can ask for in Accept, PDF first (the default)."""
+    return [PDF_MIMETYPE] + [export_format.mimetype for export_format in EXPORT_FORMATS.values()]
+
+
+# ===== HELPERS =====
+
+def _team(project: dict) -> list:
+    team = project.get('team_members', [])
+    return [str(member) for member in team] if isinstance(team, list) else []
+
+
+def _goal(project: dict) -> str:
+    goals = project.get('goals', {})
+    return str(goals.get('goal', 'N/A')) if isinstance(goals, dict) else 'N/A'
+
+
+def _tasks(project: dict) -> list:
+    tasks = project.get('tasks', [])
+    return [task for task in tasks if isinstance(task, dict)] if isinstance(tasks, list) else []
+
+
+def _reflection_pairs(project: dict) -> list:
+    """(question, answer) pairs from either reflection format (prompts/answers or fixed fields)."""
+    reflection = project.get('reflection', {})
+    if not isinstance(reflection, dict):
+        return []
+    prompts = reflection.get('prompts')
+    answers = reflection.get('answers')
+    if isinstance(prompts, list) and isinstance(answers, list) and prompts:
+        return [(str(prompt), str(answers[i]) if i < len(answers) else 'No answer provided') for i, prompt in enumerate(prompts)]
+    fields = [("What Went Well", 'went_well'), ("What Was Hard", 'was_hard'), ("What I Learned", 'learned')]
+    return [(label, str(reflection[key])) for label, key in fields if reflection.get(key)]
+
+
+def _parse_date(value) -> date:
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except (TypeError, ValueError):
+        return None
+
+
+# ===== FORMATS =====
+
+def _md_cell(value) -> str:
+    return str(value).replace("|", "\\|").replace("\n", " ")
+
+
+@register_export_format("markdown", "text/markdown", "md")
+def export_markdown(project: dict):
+    """The plan as a Markdown document (same sections as the PDF)."""
+    yield f"# {project.get('title', 'Project Plan')}\n\n"
+    yield f"**Goal:** {_goal(project)}\n\n"
+    yield f"**Team:** {', '.join(_team(project)) or 'Solo'}\n\n"
+
+    yield "## 📋 Project Tasks\n\n| Task | Hours | Difficulty | Assigned To |\n| --- | --- | --- | --- |\n"
+    for task in _tasks(project):
+        yield (
+            f"| {_md_cell(task.get('name', 'Unnamed'))} | {_md_cell(task.get('hours', '?'))} "
+            f"| {_md_cell(task.get('difficulty', 'Medium'))} | {_md_cell(task.get('assigned_to') or 'Unassigned')} |\n"
+        )
+
+    timeline = project.get('timeline', {})
+    if isinstance(timeline, dict):
+        yield "\n## ⏱️ Timeline\n\n"
+        yield f"**Expected Duration:** {timeline.get('total_hours', '?')} hours\n\n"
+        yield f"**Deadline:** {timeline.get('deadline', 'N/A')}\n"
+
+    pairs = _reflection_pairs(project)
+    if pairs:
+        yield "\n## 🤔 What We Learned\n\n"
+        for question, answer in pairs:
+            yield f"**{question}**\n\n{answer}\n\n"
+
+    insights = project.get('insights', [])
+    if insights and isinstance(insights, list):
+        yield "## 💡 Key Insights\n\n"
+        for insight in insights:
+            yield f"- {insight}\n"
+        yield "\n"
+
+    badges = project.get('badges', [])
+    if badges and isinstance(badges, list):
+        yield "## 🏆 Badges Earned\n\n"
+        for badge in badges:
+            if isinstance(badge, dict):
+                yield f"- **{badge.get('name', 'Badge')}:** {badge.get('reason', '')}\n"
+
+
+CSV_COLUMNS = ["name", "hours", "difficulty", "assigned_to", "start_date", "finish_date"]
+# Spreadsheets run cells starting with these as formulas
+CSV_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _csv_cell(value):
+    """Student text can't become a spreadsheet formula: prefix risky cells with '."""
+    if isinstance(value, str) and value.startswith(CSV_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+@register_export_format("csv", "text/csv", "csv")
+def export_tasks_csv(project: dict):
+    """The task list, one row per task (dates only if the plan was scheduled). Formula cells are escaped."""
+    line = io.StringIO()
+    writer = csv.writer(line)
+    writer.writerow(CSV_COLUMNS)
+    for task in _tasks(project):
+        writer.writerow([_csv_cell(task.get(column, '')) for column in CSV_COLUMNS])
+        yield line.getvalue()
+        line.seek(0)
+        line.truncate()
+    yield line.getvalue()
+
+
+@register_export_format("json", "application/json", "json")
+def export_json(project: dict):
+    """Canonical JSON: sorted keys, no extra whitespace (same text for the same plan)."""
+    # One chunk: encode() uses the C encoder, iterencode() falls back to pure Python
+    yield json.dumps(project, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def _ics_text(value) -> str:
+    return (
+        str(value).replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+        .replace("\r\n", "\\n").replace("\n", "\\n")
+    )
+
+
+def _ics_line(line: str) -> str:
+    """Fold to 75 octets per line (RFC 5545), CRLF terminated."""
+    encoded = line.encode("utf-8")
+    if len(encoded) <= 75:
+        return line + "\r\n"
+    parts = []
+    limit = 75
+    while encoded:
+        cut = min(limit, len(encoded))
+        while cut < len(encoded) and (encoded[cut] & 0xC0) == 0x80:  # don't split a UTF-8 character
+            cut -= 1
+        parts.append(encoded[:cut].decode("utf-8"))
+        encoded = encoded[cut:]
+        limit = 74  # continuation lines start with a space
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def _ics_event(uid: str, stamp: str, start: date, end: date, summary: str, description: str = None):
+    yield _ics_line("BEGIN:VEVENT")
+    yield _ics_line(f"UID:{uid}")
+    yield _ics_line(f"DTSTAMP:{stamp}")
+    yield _ics_line(f"DTSTART;VALUE=DATE:{start.strftime('%Y%m%d')}")
+    yield _ics_line(f"DTEND;VALUE=DATE:{end.strftime('%Y%m%d')}")
+    yield _ics_line(f"SUMMARY:{_ics_text(summary)}")
+    if description:
+        yield _ics_line(f"DESCRIPTION:{_ics_text(description)}")
+    yield _ics_line("END:VEVENT")
+
+
+@register_export_format("ics", "text/calendar", "ics")
+def export_ics(project: dict):
+    """
+    Calendar events from the timeline: one all-day event per scheduled task
+    (start_date..finish_date, from /schedule) and one for the deadline.
+    """
+    title = str(project.get('title', 'Project'))
+    # Stable per project, so importing a newer export updates events instead of duplicating them
+    uid_base = hashlib.sha1(title.encode("utf-8")).hexdigest()[:16]
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+    yield _ics_line("BEGIN:VCALENDAR")
+    yield _ics_line("VERSION:2.0")
+    yield _ics_line("PRODID:-//Sprint Kit//Project Plan//EN")
+    yield _ics_line("CALSCALE:GREGORIAN")
+    yield _ics_line(f"X-WR-CALNAME:{_ics_text(title)}")
+
+    for index, task in enumerate(_tasks(project)):
+        start = _parse_date(task.get('start_date'))
+        finish = _parse_date(task.get('finish_date')) or start
+        if start is None:
+            continue
+        who = task.get('assigned_to') or 'Unassigned'
+        yield from _ics_event(
+            f"{uid_base}-task-{index}@sprint-kit",
+            stamp,
+            start,
+            max(finish, start) + timedelta(days=1),
+            f"{task.get('name', 'Task')} ({title})",
+            f"{task.get('hours', '?')} hours - {who}"
+        )
+
+    timeline = project.get('timeline', {})
+    deadline = _parse_date(timeline.get('deadline')) if isinstance(timeline, dict) else None
+    if deadline is not None:
+        yield from _ics_event(
+            f"{uid_base}-deadline@sprint-kit",
+            stamp,
+            deadline,
+            deadline + timedelta(days=1),
+            f"Deadline: {title}",
+            f"Expected work: {timeline.get('total_hours', '?')} hours"
+        )
+
+    yield _ics_line("END:VCALENDAR")
@@ -0,0 +1,466 @@
+"""
+PDF rendering for Sprint Kit project exports.
+The renderer is built once per worker process: reportlab imports, the sample
+stylesheet, custom paragraph and table styles and the fixed section headings
+are all prepared up front, so each export only lays out the project itself.
+
+Rendering is CPU-bound and holds the GIL, so the web app hands it to a
+PdfRenderPool of separate processes (project JSON in, PDF bytes out).
+"""
+
+import copy
+import hashlib
+import json
+import logging
+import multiprocessing
+import re
+import threading
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date, datetime
+from io import BytesIO
+
+logger = logging.getLogger(__name__)
+
+# Small project used to warm the renderer (imports, font metrics, layout code)
+WARMUP_PROJECT = {
+    "title": "Warm-up",
+    "goals": {"goal": "Warm up"},
+    "team_members": ["A"],
+    "tasks": [{"name": "Task", "hours": 1, "difficulty": "Easy", "assigned_to": "A"}],
+    "timeline": {"total_hours": 1, "deadline": "2030-01-01"},
+    "reflection": {"went_well": "-", "was_hard": "-", "learned": "-"},
+    "insights": ["-"],
+    "badges": [{"name": "Badge", "reason": "-"}]
+}
+
+
+# Bump when the PDF layout changes, so cached exports aren't reused
+PDF_LAYOUT_VERSION = 2
+
+# The task list is laid out as several tables of at most this many rows. Splitting
+# one table across pages re-measures every remaining row at each page break, so a
+# single huge table lays out in quadratic time; fixed-size chunks keep it linear.
+TASK_TABLE_CHUNK_ROWS = 100
+
+
+def export_etag(project_data: dict, export_format: str = "pdf") -> str:
+    """
+    Content address for an export: hash of the canonical project JSON (sorted keys,
+    no whitespace), the format, the layout version and today's date (the PDF
+    prints a "Created" date).
+    """
+    canonical = json.dumps(project_data, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    key = f"{export_format}|{PDF_LAYOUT_VERSION}|{date.today().isoformat()}|{canonical}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+class PdfRenderer:
+    """Turns project data into PDF bytes. Safe to share between threads."""
+
+    def __init__(self):
+        from reportlab.lib import colors
+        from reportlab.lib.pagesizes import letter
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        from reportlab.lib.units import inch
+        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, LongTable, TableStyle
+
+        self._SimpleDocTemplate = SimpleDocTemplate
+        self._Paragraph = Paragraph
+        self._Spacer = Spacer
+        self._LongTable = LongTable
+        self.inch = inch
+        self.pagesize = letter
+
+        styles = getSampleStyleSheet()
+        self.normal_style = styles['Normal']
+        self.title_style = ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=24,
+            textColor=colors.HexColor('#1e40af'),
+            spaceAfter=12,
+            alignment=1
+        )
+        self.heading_style = ParagraphStyle(
+            'CustomHeading',
+            parent=styles['Heading2'],
+            fontSize=14,
+            textColor=colors.HexColor('#1e40af'),
+            spaceAfter=10,
+            spaceBefore=12
+        )
+
+        self.task_columns = [2.2*inch, 0.6*inch, 0.9*inch, 1.3*inch]
+        self.task_header = ['Task', 'Hours', 'Difficulty', 'Assigned To']
+        self.task_table_style = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1e40af')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('FONTSIZE', (0, 1), (-1, -1), 9)
+        ])
+
+        # Fixed flowables, parsed once. Layout stores sizes on a flowable, so each
+        # render uses its own shallow copy (cheap: the parsed text is shared).
+        self._static = {
+            "tasks": Paragraph("📋 Project Tasks", self.heading_style),
+            "timeline": Paragraph("⏱️ Timeline", self.heading_style),
+            "reflection": Paragraph("🤔 What We Learned", self.heading_style),
+            "insights": Paragraph("💡 Key Insights", self.heading_style),
+            "badges": Paragraph("🏆 Badges Earned", self.heading_style),
+            "went_well": Paragraph("<b>What Went Well:</b>", self.normal_style),
+            "was_hard": Paragraph("<b>What Was Hard:</b>", self.normal_style),
+            "learned": Paragraph("<b>What I Learned:</b>", self.normal_style)
+        }
+
+    def _static_flowable(self, name: str):
+        return copy.copy(self._static[name])
+
+    def _text(self, text: str, style=None):
+        return self._Paragraph(text, style or self.normal_style)
+
+    def task_tables(self, task_rows: list) -> list:
+        """
+        The task list as tables of up to TASK_TABLE_CHUNK_ROWS rows. Each starts
+        with the header row and repeats it at the top of every page it continues on.
+        """
+        tables = []
+        for start in range(0, max(len(task_rows), 1), TASK_TABLE_CHUNK_ROWS):
+            table = self._LongTable(
+                [list(self.task_header)] + task_rows[start:start + TASK_TABLE_CHUNK_ROWS],
+                colWidths=self.task_columns,
+                repeatRows=1
+            )
+            table.setStyle(self.task_table_style)
+            tables.append(table)
+        return tables
+
+    def build_story(self, project_data: dict) -> list:
+        """The flowables for one project."""
+        inch = self.inch
+        Spacer = self._Spacer
+        story = []
+
+        story.append(self._text(f"<b>{project_data.get('title', 'Project Plan')}</b>", self.title_style))
+        story.append(Spacer(1, 0.2*inch))
+
+        goal = project_data.get('goals', {}).get('goal', 'N/A') if isinstance(project_data.get('goals', {}), dict) else 'N/A'
+        story.append(self._text(f"<b>Goal:</b> {goal}"))
+
+        team = ", ".join(project_data.get('team_members', [])) or "Solo"
+        story.append(self._text(f"<b>Team:</b> {team}"))
+        story.append(self._text(f"<b>Created:</b> {datetime.now().strftime('%B %d, %Y')}"))
+        story.append(Spacer(1, 0.3*inch))
+
+        story.append(self._static_flowable("tasks"))
+
+        task_rows = [
+            [
+                task.get('name', 'Unnamed'),
+                str(task.get('hours', '?')),
+                task.get('difficulty', 'Medium'),
+                task.get('assigned_to', 'Unassigned')
+            ]
+            for task in project_data.get('tasks', [])
+        ]
+        story.extend(self.task_tables(task_rows))
+        story.append(Spacer(1, 0.3*inch))
+
+        story.append(self._static_flowable("timeline"))
+        timeline = project_data.get('timeline', {})
+        if isinstance(timeline, dict):
+            story.append(self._text(f"<b>Expected Duration:</b> {timeline.get('total_hours', '?')} hours"))
+            story.append(self._text(f"<b>Deadline:</b> {timeline.get('deadline', 'N/A')}"))
+        story.append(Spacer(1, 0.3*inch))
+
+        story.append(self._static_flowable("reflection"))
+        reflection = project_data.get('reflection', {})
+        if isinstance(reflection, dict):
+            story.append(self._static_flowable("went_well"))
+            story.append(self._text(reflection.get('went_well', 'N/A')))
+            story.append(Spacer(1, 0.15*inch))
+
+            story.append(self._static_flowable("was_hard"))
+            story.append(self._text(reflection.get('was_hard', 'N/A')))
+            story.append(Spacer(1, 0.15*inch))
+
+            story.append(self._static_flowable("learned"))
+            story.append(self._text(reflection.get('learned', 'N/A')))
+        story.append(Spacer(1, 0.3*inch))
+
+        insights = project_data.get('insights', [])
+        if insights and isinstance(insights, list):
+            story.append(self._static_flowable("insights"))
+            for insight in insights:
+                story.append(self._text(f"• {insight}"))
+            story.append(Spacer(1, 0.2*inch))
+
+        badges = project_data.get('badges', [])
+        if badges and isinstance(badges, list):
+            story.append(self._static_flowable("badges"))
+            for badge in badges:
+                if isinstance(badge, dict):
+                    story.append(self._text(f"<b>{badge.get('name', 'Badge')}:</b> {badge.get('reason', '')}"))
+
+        return story
+
+    def render(self, project_data: dict) -> bytes:
+        """PDF bytes for one project."""
+        return self.render_to_buffer(project_data).getvalue()
+
+    def render_to_buffer(self, project_data: dict) -> BytesIO:
+        """
+        The PDF in a buffer positioned at the start, ready to stream.
+        Responses can send it as-is: no copy into a bytes object and back.
+        """
+        inch = self.inch
+        pdf_buffer = BytesIO()
+        doc = self._SimpleDocTemplate(
+            pdf_buffer,
+            pagesize=self.pagesize,
+            topMargin=0.5*inch,
+            bottomMargin=0.5*inch,
+            leftMargin=0.5*inch,
+            rightMargin=0.5*inch
+        )
+        doc.build(self.build_story(project_data))
+        pdf_buffer.seek(0)
+        return pdf_buffer
+
+
+_renderer = None
+_renderer_lock = threading.Lock()
+
+
+def get_pdf_renderer() -> PdfRenderer:
+    """The renderer for this process (built on first use)."""
+    global _renderer
+    if _renderer is None:
+        with _renderer_lock:
+            if _renderer is None:
+                _renderer = PdfRenderer()
+    return _renderer
+
+
+def warm_pdf_renderer() -> bool:
+    """
+    Build the renderer and render one small PDF, so the first real export
+    doesn't pay for imports and font setup. Returns False if reportlab isn't available.
+    """
+    try:
+        get_pdf_renderer().render(WARMUP_PROJECT)
+        return True
+    except Exception as e:
+        logger.warning("Could not warm PDF renderer: %s", e)
+        return False
+
+
+# ===== RENDER POOL =====
+
+class RenderPoolBusy(Exception):
+    """Every render process is busy and the queue is full; try again later."""
+
+
+def _init_render_process():
+    warm_pdf_renderer()
+
+
+def _render_serialized(project_json: str) -> bytes:
+    """Runs in a pool process: only the JSON text crosses the process boundary."""
+    return get_pdf_renderer().render(json.loads(project_json))
+
+
+class PdfRenderPool:
+    """
+    Renders PDFs in a bounded pool of processes, keeping reportlab off the
+    request threads (and their GIL).
+
+    At most processes + max_queue renders are accepted at once; beyond that
+    submit() and render() raise RenderPoolBusy right away instead of queueing without limit.
+    processes=0 renders on the calling thread (no pool).
+    """
+
+    def __init__(self, processes: int, max_queue: int, start_method: str = "spawn"):
+        self.processes = processes
+        self.max_queue = max_queue
+        self.start_method = start_method
+        self._slots = threading.BoundedSemaphore(max(processes, 1) + max_queue)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    mp_context=multiprocessing.get_context(self.start_method),
+                    initializer=_init_render_process
+                )
+            return self._executor
+
+    def _discard_executor(self, executor: ProcessPoolExecutor):
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+            else:
+                return
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, project_data: dict, slot_wait: float = 0) -> Future:
+        """
+        Start rendering one project; the future's result is the PDF bytes.
+        Waits up to slot_wait seconds for a free slot.
+
+        Raises: RenderPoolBusy if no slot is free
+        """
+        acquired = self._slots.acquire(timeout=slot_wait) if slot_wait > 0 else self._slots.acquire(blocking=False)
+        if not acquired:
+            raise RenderPoolBusy()
+        if self.processes <= 0:
+            future = Future()
+            try:
+                future.set_result(get_pdf_renderer().render(project_data))
+            except Exception as e:
+                future.set_exception(e)
+            finally:
+                self._slots.release()
+            return future
+
+        project_json = json.dumps(project_data, ensure_ascii=False, default=str)
+        executor = self._get_executor()
+        try:
+            future = executor.submit(_render_serialized, project_json)
+        except Exception:
+            self._slots.release()
+            raise
+        # The slot stays taken until the process is done, even if nobody waits for it
+        future.add_done_callback(lambda _: self._slots.release())
+        future.add_done_callback(lambda f: self._check_broken(executor, f))
+        return future
+
+    def _check_broken(self, executor: ProcessPoolExecutor, future: Future):
+        # A render process died (e.g. out of memory); start a fresh pool next time
+        if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+            self._discard_executor(executor)
+
+    def render(self, project_data: dict, timeout: float = None, slot_wait: float = 0) -> bytes:
+        """
+        PDF bytes for one project.
+
+        Raises: RenderPoolBusy if no slot is free within slot_wait seconds, TimeoutError
+        if the render takes longer than timeout, ValueError if rendering fails
+        """
+        try:
+            return self.submit(project_data, slot_wait=slot_wait).result(timeout=timeout)
+        except BrokenProcessPool as e:
+            raise ValueError("Could not generate PDF") from e
+
+    def render_many(self, projects: list, timeout: float = None, total_timeout: float = None, slot_wait: float = 60):
+        """
+        Render several projects in parallel, at most one per process at a time so
+        single exports still get queue slots. Projects that can't get a slot
+        within slot_wait seconds come back as RenderPoolBusy; renders running
+        longer than timeout seconds, and every project not finished total_timeout
+        seconds after the call, come back as TimeoutError.
+
+        Yields: (index, pdf_bytes or the exception) in the order renders finish
+        """
+        window = max(self.processes, 1)
+        end = time.monotonic() + total_timeout if total_timeout is not None else None
+        pending = {}  # future -> (index, render deadline or None)
+        next_index = 0
+        while next_index < len(projects) or pending:
+            while next_index < len(projects) and len(pending) < window:
+                remaining = end - time.monotonic() if end is not None else slot_wait
+                if remaining <= 0:
+                    yield next_index, TimeoutError("Batch export ran out of time")
+                else:
+                    try:
+                        future = self.submit(projects[next_index], slot_wait=min(slot_wait, remaining))
+                        pending[future] = (next_index, time.monotonic() + timeout if timeout is not None else None)
+                    except RenderPoolBusy as e:
+                        yield next_index, e
+                next_index += 1
+            if not pending:
+                continue
+
+            deadlines = [limit for _, limit in pending.values() if limit is not None] + ([end] if end is not None else [])
+            wait_seconds = max(min(deadlines) - time.monotonic(), 0) if deadlines else None
+            done, _ = wait(pending, timeout=wait_seconds, return_when=FIRST_COMPLETED)
+            for future in done:
+                index, _ = pending.pop(future)
+                error = future.exception()
+                yield index, error if error is not None else future.result()
+
+            # A process can't be stopped mid-render: it keeps its slot until done, but nobody waits for it
+            now = time.monotonic()
+            for future, (index, limit) in list(pending.items()):
+                if (limit is not None and now >= limit) or (end is not None and now >= end):
+                    del pending[future]
+                    future.cancel()
+                    yield index, TimeoutError("PDF render took too long")
+
+    def warm(self):
+        """Start the processes now rather than on the first export."""
+        if self.processes > 0:
+            executor = self._get_executor()
+            for future in [executor.submit(warm_pdf_renderer) for _ in range(self.processes)]:
+                future.result()
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+
+# ===== BATCH EXPORT =====
+
+def export_filename(title: str, index: int = None, extension: str = "pdf") -> str:
+    """Safe file name for an exported plan, e.g. "03_Bridge_Project_plan.pdf"."""
+    name = re.sub(r"\s+", "_", re.sub(r"[^\w\- ]+", "", str(title or "project")).strip())[:60] or "project"
+    prefix = f"{index + 1:02d}_" if index is not None else ""
+    return f"{prefix}{name}_plan.{extension}"
+
+
+class _ChunkSink:
+    """Write-only file for ZipFile that hands back what was written since the last drain."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def iter_zip(files):
+    """
+    Stream a ZIP archive built from (name, bytes) pairs as they arrive.
+    Each file is yielded as soon as it's added, so only one file is held at a
+    time. PDFs are already compressed, so entries are stored as-is.
+
+    Yields: chunks of the archive
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_STORED) as archive:
+        for name, data in files:
+            archive.writestr(name, data)
+            yield sink.drain()
+    yield sink.drain()
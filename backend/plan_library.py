@@ -0,0 +1,127 @@
+"""
+Precomputed plan library for Sprint Kit.
+Claude plans for every project type x experience level x team size, built offline
+by build_plan_library.py and memory-mapped by the server, so generic requests
+(no goal or brainstorm yet) never wait on a live Claude call.
+
+File layout (version 1):
+    b"SKPLAN" | version: uint16 | index length: uint32 | index JSON | plans
+The index is {"metadata": {...}, "plans": {key: [offset, length]}} with offsets
+into the plans section; each plan is a compact JSON array of tasks.
+"""
+
+import json
+import logging
+import mmap
+import os
+import re
+import struct
+
+logger = logging.getLogger(__name__)
+
+PLAN_LIBRARY_MAGIC = b"SKPLAN"
+PLAN_LIBRARY_VERSION = 1
+_HEADER = struct.Struct(">HI")
+
+PROJECT_TYPES = ["hardware", "software", "creative", "event", "research", "other"]
+EXPERIENCE_LEVELS = ["beginner", "intermediate", "advanced"]
+TEAM_SIZES = ["1", "2-3", "4+"]
+
+
+def normalize_team_size(team_size: str) -> str:
+    """Map what the client sends ("1", "3", "2-3", "4+", "6") onto TEAM_SIZES."""
+    match = re.search(r"\d+", str(team_size or ""))
+    members = int(match.group()) if match else 1
+    if members <= 1:
+        return "1"
+    return "2-3" if members <= 3 else "4+"
+
+
+def plan_key(project_type: str, experience_level: str, team_size: str) -> str:
+    return f"{project_type}|{experience_level}|{normalize_team_size(team_size)}"
+
+
+def write_plan_library(path: str, plans: dict, metadata: dict = None):
+    """
+    Write a library file (atomically: readers never see a half-written file).
+
+    Args:
+        plans: {(project_type, experience_level, team_size): list of task dicts}
+        metadata: Anything worth recording (model, build date, ...)
+    """
+    index = {}
+    blobs = []
+    offset = 0
+    for (project_type, experience_level, team_size), tasks in sorted(plans.items()):
+        blob = json.dumps(tasks, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        index[plan_key(project_type, experience_level, team_size)] = [offset, len(blob)]
+        blobs.append(blob)
+        offset += len(blob)
+
+    index_bytes = json.dumps({"metadata": metadata or {}, "plans": index}, separators=(",", ":")).encode("utf-8")
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(PLAN_LIBRARY_MAGIC)
+        f.write(_HEADER.pack(PLAN_LIBRARY_VERSION, len(index_bytes)))
+        f.write(index_bytes)
+        for blob in blobs:
+            f.write(blob)
+    os.replace(tmp_path, path)
+
+
+class PlanLibrary:
+    """
+    Read-only view of a library file. Only the small index is parsed up front;
+    a plan's bytes are decoded when it's asked for, so every get() returns new lists.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            if self._mmap[:len(PLAN_LIBRARY_MAGIC)] != PLAN_LIBRARY_MAGIC:
+                raise ValueError("Not a plan library file")
+            start = len(PLAN_LIBRARY_MAGIC)
+            version, index_length = _HEADER.unpack_from(self._mmap, start)
+            if version != PLAN_LIBRARY_VERSION:
+                raise ValueError(f"Unsupported plan library version: {version}")
+            start += _HEADER.size
+            index = json.loads(self._mmap[start:start + index_length])
+        except Exception:
+            self._mmap.close()
+            raise
+
+        self.path = path
+        self.version = version
+        self.metadata = index.get("metadata", {})
+        self._plans = index["plans"]
+        self._base = start + index_length
+
+    def get(self, project_type: str, experience_level: str, team_size: str) -> list:
+        """The precomputed plan, or None if the library doesn't have this combination."""
+        entry = self._plans.get(plan_key(project_type, experience_level, team_size))
+        if entry is None:
+            return None
+        offset, length = entry
+        return json.loads(self._mmap[self._base + offset:self._base + offset + length])
+
+    def __len__(self):
+        return len(self._plans)
+
+    def close(self):
+        self._mmap.close()
+
+
+def load_plan_library(path: str) -> PlanLibrary:
+    """Open the library file. Returns None if it's missing or unreadable (server runs without it)."""
+    if not path or not os.path.exists(path):
+        logger.info("No plan library at %s; generic plans will use Claude", path)
+        return None
+    try:
+        library = PlanLibrary(path)
+    except (OSError, ValueError, KeyError, struct.error) as e:
+        logger.warning("Could not load plan library %s: %s", path, e)
+        return None
+    logger.info("Loaded plan library %s (%d plans)", path, len(library))
+    return library
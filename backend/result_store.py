@@ -0,0 +1,126 @@
+"""
+Short-lived in-memory results for Sprint Kit.
+Holds work that finishes after the response went out (e.g. a Claude plan that
+replaces an instant template plan) until the client comes back for it, and
+rendered output worth reusing (e.g. exported PDFs).
+Per process: each worker has its own store.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class ResultStore:
+    """
+    Thread-safe key -> value store where every entry expires ttl_seconds after
+    its last write, and the oldest entries go first once max_entries is reached
+    (or, with max_bytes, once the values' total size_of() is over max_bytes).
+
+    Readers can block in wait_for() until a writer makes the value they want.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int, clock=time.monotonic, max_bytes: int = None, size_of=len):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._size_of = size_of
+        self._clock = clock
+        self._entries = OrderedDict()  # key -> (expires_at, value, size), oldest write first
+        self._changed = threading.Condition()
+
+    def _evict(self, now: float):
+        while self._entries:
+            key, (expires_at, _, size) = next(iter(self._entries.items()))
+            if (expires_at > now and len(self._entries) <= self.max_entries
+                    and (self.max_bytes is None or self.size <= self.max_bytes)):
+                break
+            del self._entries[key]
+            self.size -= size
+
+    def put(self, key, value):
+        """Store (or replace) a value and wake anyone waiting on it."""
+        size = self._size_of(value) if self.max_bytes is not None else 0
+        with self._changed:
+            now = self._clock()
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= old[2]
+            self._entries[key] = (now + self.ttl_seconds, value, size)
+            self.size += size
+            self._evict(now)
+            self._changed.notify_all()
+
+    def get(self, key, default=None):
+        """The value, or default if it's missing or expired."""
+        with self._changed:
+            self._evict(self._clock())
+            entry = self._entries.get(key)
+            return entry[1] if entry else default
+
+    def wait_for(self, key, predicate, timeout: float):
+        """
+        Wait up to timeout seconds for predicate(value) to be true.
+
+        Returns: the latest value (whether or not predicate passed), or None if missing/expired
+        """
+        deadline = time.monotonic() + max(timeout, 0)
+        with self._changed:
+            while True:
+                self._evict(self._clock())
+                entry = self._entries.get(key)
+                if entry is None or predicate(entry[1]):
+                    return entry[1] if entry else None
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return entry[1]
+                self._changed.wait(remaining)
+
+    def __len__(self):
+        with self._changed:
+            self._evict(self._clock())
+            return len(self._entries)
+
+
+class ByteCache:
+    """
+    Thread-safe LRU cache of key -> bytes, bounded by total size.
+    Values are immutable bytes, so hits can be sent without copying.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key) -> bytes:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value: bytes):
+        """Store value (skipped if it alone is bigger than the cache), evicting least recently used."""
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self._entries[key] = value
+            self.size += len(value)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
@@ -4,22 +4,249 @@ Centralizes all safety checks, validation, and logging.
 CRITICAL: Child safety is non-negotiable.
 """
 
+import atexit
+import bisect
+import hashlib
+import json
 import logging
+import os
+import queue
 import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from logging.handlers import QueueHandler, QueueListener
+from typing import NamedTuple
 from config import (
-    DISALLOWED_KEYWORDS,
     OUT_OF_SCOPE_RESPONSE,
-    PROMPT_INJECTION_KEYWORDS
+    SAFETY_KEYWORDS_FILE,
+    SAFETY_KEYWORDS_POLL_SECONDS,
+    SAFETY_LOG_RATE_LIMIT,
+    SAFETY_LOG_WINDOW_SECONDS,
+    SAFETY_SCAN_PARALLEL_THRESHOLD,
+    SAFETY_SCAN_WORKERS
 )
 
+# Prevent resource exhaustion from huge inputs
+MAX_INPUT_LENGTH = 5000
+
+# PII patterns
+EMAIL_PATTERN = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+PHONE_PATTERN = re.compile(r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b')
+
+
+# ===== NON-BLOCKING LOGGING =====
+
+class RateLimitFilter(logging.Filter):
+    """
+    Drop repeated log records of the same kind during abuse bursts.
+
+    Records are grouped by logger and message template (not the formatted text),
+    so a flood of injection attempts becomes a handful of lines per window.
+    Errors always pass. The first record of each new window reports how many
+    similar records were suppressed in the previous one.
+    """
+
+    def __init__(self, limit: int = SAFETY_LOG_RATE_LIMIT, window_seconds: float = SAFETY_LOG_WINDOW_SECONDS):
+        super().__init__()
+        self.limit = limit
+        self.window_seconds = window_seconds
+        self._lock = threading.Lock()
+        self._window_start = time.monotonic()
+        self._counts = {}
+        self._suppressed = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.ERROR:
+            return True
+
+        key = (record.name, record.msg)
+        with self._lock:
+            now = time.monotonic()
+            if now - self._window_start >= self.window_seconds:
+                self._window_start = now
+                self._counts = {}
+                carried_over = self._suppressed
+                self._suppressed = {}
+            else:
+                carried_over = None
+
+            count = self._counts.get(key, 0)
+            if count >= self.limit:
+                self._suppressed[key] = self._suppressed.get(key, 0) + 1
+                return False
+            self._counts[key] = count + 1
+
+            suppressed = carried_over.get(key, 0) if carried_over else 0
+
+        if suppressed:
+            record.msg = f"{record.msg} [{suppressed} similar messages suppressed]"
+        return True
+
+
+# Every listener started by attach_queue_handler, so forked workers can restart them
+_log_listeners = []
+
+
+def attach_queue_handler(target_logger: logging.Logger, handler: logging.Handler, rate_limit: bool = False) -> QueueListener:
+    """
+    Route a logger through a QueueHandler so callers never block on log I/O.
+
+    The real handler runs on a QueueListener thread, which is stopped (and its
+    queue flushed) at interpreter exit.
+
+    Returns: the started QueueListener
+    """
+    log_queue = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    if rate_limit:
+        queue_handler.addFilter(RateLimitFilter())
+    target_logger.addHandler(queue_handler)
+
+    listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    _log_listeners.append(listener)
+    return listener
+
+
+def restart_log_listeners():
+    """
+    Give each log queue a running listener again. Threads don't survive fork,
+    so a worker forked from a preloaded parent calls this before serving.
+    """
+    for position, old in enumerate(_log_listeners):
+        listener = QueueListener(old.queue, *old.handlers, respect_handler_level=old.respect_handler_level)
+        listener.start()
+        atexit.register(listener.stop)
+        _log_listeners[position] = listener
+
+
 # Setup safety logger
 safety_logger = logging.getLogger("sprint_kit.safety")
-handler = logging.StreamHandler()
-formatter = logging.Formatter('%(asctime)s - [SAFETY] %(levelname)s - %(message)s')
-handler.setFormatter(formatter)
 if not safety_logger.handlers:
-    safety_logger.addHandler(handler)
+    handler = logging.StreamHandler()
+    formatter = logging.Formatter('%(asctime)s - [SAFETY] %(levelname)s - %(message)s')
+    handler.setFormatter(formatter)
+    attach_queue_handler(safety_logger, handler, rate_limit=True)
 safety_logger.setLevel(logging.WARNING)
+# Don't also write synchronously (and un-rate-limited) through the root handlers
+safety_logger.propagate = False
+
+
+# ===== KEYWORD MATCHER (hot-reloadable) =====
+
+# Keyword file key -> check category
+KEYWORD_CATEGORIES = {
+    "disallowed_keywords": "disallowed_topic",
+    "prompt_injection_keywords": "prompt_injection"
+}
+
+
+class KeywordMatcher(NamedTuple):
+    """
+    Compiled keyword patterns built from one version of the keyword file.
+    Never mutated: a reload builds a new matcher and swaps the reference.
+    """
+    version: str
+    patterns: dict
+
+
+def compile_keyword_pattern(keywords: list) -> re.Pattern:
+    """
+    Compile a keyword list into one alternation regex.
+    Matches the same substrings as `keyword in text` (longest keyword wins at a position).
+    """
+    ordered = sorted(set(keywords), key=len, reverse=True)
+    return re.compile("|".join(re.escape(kw.lower()) for kw in ordered))
+
+
+def load_keyword_matcher(path: str = SAFETY_KEYWORDS_FILE) -> KeywordMatcher:
+    """
+    Read the keyword file and compile a matcher.
+    Version is a short hash of the file contents.
+
+    Raises: OSError if unreadable, ValueError if malformed or a list is empty
+    """
+    with open(path, "rb") as f:
+        raw = f.read()
+    data = json.loads(raw)
+
+    patterns = {}
+    for key, category in KEYWORD_CATEGORIES.items():
+        keywords = data.get(key) if isinstance(data, dict) else None
+        if not keywords or not isinstance(keywords, list) or not all(isinstance(kw, str) and kw.strip() for kw in keywords):
+            raise ValueError(f"{key} must be a non-empty list of keywords")
+        patterns[category] = compile_keyword_pattern(keywords)
+
+    return KeywordMatcher(version=hashlib.sha256(raw).hexdigest()[:12], patterns=patterns)
+
+
+# Loaded at import: if the keyword file is missing or broken, fail loudly (no keywords = no safety)
+_keyword_matcher = load_keyword_matcher()
+
+
+def get_keyword_matcher() -> KeywordMatcher:
+    """Return the current matcher. Callers should fetch it once per check."""
+    return _keyword_matcher
+
+
+def reload_keyword_matcher(path: str = SAFETY_KEYWORDS_FILE) -> bool:
+    """
+    Rebuild the matcher from the keyword file and swap it in.
+    If the file is broken, the current matcher stays in place.
+
+    Returns: True if the file loaded (changed or not), False on error
+    """
+    global _keyword_matcher
+    try:
+        matcher = load_keyword_matcher(path)
+    except (OSError, ValueError) as e:
+        safety_logger.error("Safety keyword reload failed, keeping version %s: %s", _keyword_matcher.version, e)
+        return False
+
+    if matcher.version != _keyword_matcher.version:
+        # Single reference assignment: in-flight checks keep the matcher they already fetched
+        _keyword_matcher = matcher
+        safety_logger.warning("Safety keywords reloaded: version %s", matcher.version)
+    return True
+
+
+def _file_signature(path: str):
+    try:
+        stat = os.stat(path)
+        return (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        return None
+
+
+_keyword_watcher = None
+_keyword_watcher_lock = threading.Lock()
+
+
+def start_keyword_watcher(path: str = SAFETY_KEYWORDS_FILE, poll_seconds: float = SAFETY_KEYWORDS_POLL_SECONDS) -> threading.Thread:
+    """
+    Watch the keyword file on a daemon thread and reload it when it changes.
+    Recompilation happens on the watcher thread, never on a request thread.
+    Safe to call more than once (e.g. after a worker fork).
+    """
+    global _keyword_watcher
+    with _keyword_watcher_lock:
+        if _keyword_watcher is not None and _keyword_watcher.is_alive():
+            return _keyword_watcher
+
+        def watch():
+            last_signature = _file_signature(path)
+            while True:
+                time.sleep(poll_seconds)
+                signature = _file_signature(path)
+                if signature != last_signature:
+                    last_signature = signature
+                    reload_keyword_matcher(path)
+
+        _keyword_watcher = threading.Thread(target=watch, name="safety-keyword-watcher", daemon=True)
+        _keyword_watcher.start()
+        return _keyword_watcher
 
 
 def is_request_in_scope(user_input: str) -> dict:
@@ -37,15 +264,16 @@ def is_request_in_scope(user_input: str) -> dict:
     input_lower = user_input.lower()
     
     # Check for disallowed keywords
-    for keyword in DISALLOWED_KEYWORDS:
-        if keyword in input_lower:
-            safety_logger.warning(f"Disallowed keyword detected: {keyword}")
-            return {
-                "in_scope": False,
-                "reason": f"Request involves {keyword}",
-                "should_respond": True,
-                "response": OUT_OF_SCOPE_RESPONSE
-            }
+    match = get_keyword_matcher().patterns["disallowed_topic"].search(input_lower)
+    if match:
+        keyword = match.group()
+        safety_logger.warning("Disallowed keyword detected: %s", keyword)
+        return {
+            "in_scope": False,
+            "reason": f"Request involves {keyword}",
+            "should_respond": True,
+            "response": OUT_OF_SCOPE_RESPONSE
+        }
     
     # Valid if it's about a project
     return {
@@ -65,17 +293,17 @@ def validate_before_claude_call(user_input: str) -> dict:
     input_lower = user_input.lower()
     
     # Check for prompt injection attempts
-    for keyword in PROMPT_INJECTION_KEYWORDS:
-        if keyword in input_lower:
-            safety_logger.warning(f"Prompt injection attempt detected: {keyword}")
-            return {
-                "safe": False,
-                "reason": "Request appears to be attempting to change how I work"
-            }
+    match = get_keyword_matcher().patterns["prompt_injection"].search(input_lower)
+    if match:
+        safety_logger.warning("Prompt injection attempt detected: %s", match.group())
+        return {
+            "safe": False,
+            "reason": "Request appears to be attempting to change how I work"
+        }
     
     # Check input length (prevent resource exhaustion)
-    if len(user_input) > 5000:
-        safety_logger.warning(f"Oversized input: {len(user_input)} characters")
+    if len(user_input) > MAX_INPUT_LENGTH:
+        safety_logger.warning("Oversized input: %d characters", len(user_input))
         return {"safe": False, "reason": "Input too long"}
     
     # Check for empty input
@@ -103,21 +331,19 @@ def validate_claude_response(response_text: str) -> dict:
     
     for indicator in jailbreak_indicators:
         if indicator in response_lower:
-            safety_logger.warning(f"Jailbreak indicator in response: {indicator}")
+            safety_logger.warning("Jailbreak indicator in response: %s", indicator)
             return {
                 "safe": False,
                 "reason": f"Response shows attempted override: {indicator}"
             }
     
     # Check for email addresses (PII)
-    email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-    if re.search(email_pattern, response_text):
+    if EMAIL_PATTERN.search(response_text):
         safety_logger.warning("Email address detected in response")
         return {"safe": False, "reason": "Response contains email (PII)"}
     
     # Check for phone numbers (PII)
-    phone_pattern = r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b'
-    if re.search(phone_pattern, response_text):
+    if PHONE_PATTERN.search(response_text):
         safety_logger.warning("Phone number detected in response")
         return {"safe": False, "reason": "Response contains phone number (PII)"}
     
@@ -132,7 +358,7 @@ def handle_error_safely(error: Exception, context: str) -> dict:
     Returns: {"error": bool, "user_message": str, "internal_error": str}
     """
     # Log the real error (for debugging)
-    safety_logger.error(f"[{context}] {type(error).__name__}: {str(error)}")
+    safety_logger.error("[%s] %s: %s", context, type(error).__name__, error)
     
     # Return generic safe message to user
     return {
@@ -140,3 +366,110 @@ def handle_error_safely(error: Exception, context: str) -> dict:
         "user_message": "Something went wrong. Please try again.",
         "internal_error": str(error)  # Keep internally, never send to frontend
     }
+
+
+# ===== BATCH SCANNING (Teacher moderation, no Claude call) =====
+
+# PII hits are reported by category only - never echo the email/phone back
+SCAN_PII_PATTERNS = {
+    "email": EMAIL_PATTERN,
+    "phone": PHONE_PATTERN
+}
+
+# Never appears in keywords or PII, so no match can span two items
+_SCAN_SEPARATOR = "\x00"
+
+
+def _scan_chunk(start: int, texts: list, keyword_patterns: dict) -> list:
+    """
+    Scan a chunk of texts in one pass per pattern.
+
+    All texts are joined into a single string, each pattern runs once over it,
+    and match offsets are mapped back to items with a binary search.
+
+    Returns: list of verdict dicts (see scan_texts)
+    """
+    lowered = [text.lower() for text in texts]
+    joined = _SCAN_SEPARATOR.join(lowered)
+
+    offsets = []
+    position = 0
+    for text in lowered:
+        offsets.append(position)
+        position += len(text) + 1
+
+    categories = [set() for _ in texts]
+    keywords = [set() for _ in texts]
+
+    for category, pattern in keyword_patterns.items():
+        for match in pattern.finditer(joined):
+            item = bisect.bisect_right(offsets, match.start()) - 1
+            categories[item].add(category)
+            keywords[item].add(match.group())
+
+    for category, pattern in SCAN_PII_PATTERNS.items():
+        for match in pattern.finditer(joined):
+            categories[bisect.bisect_right(offsets, match.start()) - 1].add(category)
+
+    verdicts = []
+    for i, text in enumerate(texts):
+        if len(text) > MAX_INPUT_LENGTH:
+            categories[i].add("too_long")
+        verdicts.append({
+            "index": start + i,
+            "safe": not categories[i],
+            "categories": sorted(categories[i]),
+            "keywords": sorted(keywords[i])
+        })
+    return verdicts
+
+
+_scan_pool = None
+_scan_pool_lock = threading.Lock()
+
+
+def _get_scan_pool(workers: int) -> ProcessPoolExecutor:
+    """Create the shared scan process pool on first use."""
+    global _scan_pool
+    with _scan_pool_lock:
+        if _scan_pool is None:
+            _scan_pool = ProcessPoolExecutor(max_workers=workers)
+            atexit.register(_scan_pool.shutdown, wait=False, cancel_futures=True)
+        return _scan_pool
+
+
+def scan_texts(texts: list, workers: int = None, chunk_size: int = 500):
+    """
+    Run the safety checks over many student texts, for teacher moderation.
+
+    Checks disallowed topics, prompt injection, PII (email/phone) and length.
+    Large batches are split into chunks and spread across a process pool.
+
+    Args:
+        texts: List of strings
+        workers: Process count (default SAFETY_SCAN_WORKERS; 1 = scan in-process)
+        chunk_size: Items per chunk
+
+    Yields (in input order): {
+        "index": int,
+        "safe": bool,
+        "categories": list of flagged categories,
+        "keywords": list of matched keywords
+    }
+    """
+    workers = SAFETY_SCAN_WORKERS if workers is None else workers
+    # One matcher for the whole batch, even if the keyword file reloads mid-scan
+    keyword_patterns = get_keyword_matcher().patterns
+    chunks = [
+        (start, texts[start:start + chunk_size], keyword_patterns)
+        for start in range(0, len(texts), chunk_size)
+    ]
+
+    if workers > 1 and len(texts) >= SAFETY_SCAN_PARALLEL_THRESHOLD:
+        pool = _get_scan_pool(workers)
+        results = pool.map(_scan_chunk, *zip(*chunks))
+    else:
+        results = (_scan_chunk(*chunk) for chunk in chunks)
+
+    for verdicts in results:
+        yield from verdicts
@@ -0,0 +1,140 @@
+"""
+Production server for the Sprint Kit API (gunicorn).
+
+The app is loaded once in the master process before workers fork, so the
+compiled safety matchers, the plan library and the Claude SDK are loaded once
+and shared copy-on-write. PDFs render in spawned processes (PDF_RENDER_PROCESSES)
+that build their own renderer, so the master only builds one when PDFs render
+in the workers (PDF_RENDER_PROCESSES=0). Each worker then restarts its background threads.
+On SIGTERM, workers stop taking requests, finish the ones in flight and drain
+background Claude calls and export jobs (up to SERVE_GRACEFUL_TIMEOUT_SECONDS).
+
+One worker by default: instant breakdowns, timeline estimates and export jobs live
+in the memory of the worker that created them, and a follow-up request (poll,
+edit, download) landing on another worker would get a 404. Scale with --threads;
+run more workers only behind a load balancer that keeps each client on one worker.
+
+Usage (from backend/):
+    python serve.py [--bind 0.0.0.0:5000] [--workers 1] [--worker-class threaded] [--threads 8]
+
+Worker classes:
+    threaded (gthread) - default; each worker runs --threads requests at once,
+                         good for requests that mostly wait on Claude
+    sync               - one request at a time per worker
+    async (gevent)     - many concurrent requests per worker; needs `pip install gevent`
+"""
+
+import argparse
+import logging
+
+from config import (
+    SERVE_BIND,
+    SERVE_GRACEFUL_TIMEOUT_SECONDS,
+    SERVE_THREADS,
+    SERVE_TIMEOUT_SECONDS,
+    SERVE_WORKER_CLASS,
+    SERVE_WORKERS,
+    STARTUP_WARMUP
+)
+
+logger = logging.getLogger(__name__)
+
+WORKER_CLASSES = {
+    "sync": "sync",
+    "threaded": "gthread",
+    "gthread": "gthread",
+    "async": "gevent",
+    "gevent": "gevent"
+}
+
+
+def preload():
+    """Build shared state in the master process, before workers fork."""
+    import app  # safety matchers, plan library, similar-plan cache
+
+    # Warm up exactly once: at import ("blocking"), on the warm-up thread ("background"),
+    # or here. Either way no thread may be mid-import when the workers fork.
+    if STARTUP_WARMUP == "off":
+        app.warm_up()
+    else:
+        app.wait_for_warm_up()
+    return app.app
+
+
+def post_fork(server, worker):
+    """gunicorn hook (in the new worker): threads don't survive fork, so start them again."""
+    from safety import restart_log_listeners, start_keyword_watcher
+
+    restart_log_listeners()
+    start_keyword_watcher()
+
+
+def worker_exit(server, worker):
+    """gunicorn hook (in the exiting worker): finish background Claude calls and export jobs."""
+    from app import drain_background_work
+
+    drain_background_work()
+
+
+def server_options(bind: str, workers: int, worker_class: str, threads: int, preload_app: bool = True) -> dict:
+    """
+    gunicorn settings for the given worker model.
+
+    Raises: ValueError for an unknown worker class
+    """
+    if worker_class not in WORKER_CLASSES:
+        raise ValueError(f"Unknown worker class {worker_class!r} (use one of: {', '.join(WORKER_CLASSES)})")
+
+    options = {
+        "bind": bind,
+        "workers": workers,
+        "worker_class": WORKER_CLASSES[worker_class],
+        "preload_app": preload_app,
+        "timeout": SERVE_TIMEOUT_SECONDS,
+        "graceful_timeout": SERVE_GRACEFUL_TIMEOUT_SECONDS,
+        "post_fork": post_fork,
+        "worker_exit": worker_exit
+    }
+    if options["worker_class"] == "gthread":
+        options["threads"] = threads
+    elif options["worker_class"] == "gevent":
+        options["worker_connections"] = threads * 100
+    return options
+
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(description="Run the Sprint Kit API with gunicorn.")
+    parser.add_argument("--bind", default=SERVE_BIND)
+    parser.add_argument("--workers", type=int, default=SERVE_WORKERS)
+    parser.add_argument("--worker-class", default=SERVE_WORKER_CLASS, choices=sorted(WORKER_CLASSES))
+    parser.add_argument("--threads", type=int, default=SERVE_THREADS, help="threads per worker (threaded)")
+    parser.add_argument("--no-preload", action="store_true", help="load the app in each worker instead")
+    args = parser.parse_args(argv)
+
+    options = server_options(args.bind, args.workers, args.worker_class, args.threads, not args.no_preload)
+    if args.workers > 1:
+        logger.warning(
+            "Running %d workers: instant breakdowns, timeline estimates and export jobs are kept "
+            "per worker, so clients need sticky sessions or their follow-up requests may 404",
+            args.workers
+        )
+    if options["worker_class"] == "gevent":
+        # Patch before the app (and the Claude client's ssl/socket) is imported
+        from gevent import monkey
+        monkey.patch_all()
+
+    from gunicorn.app.base import BaseApplication
+
+    class SprintKitServer(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return preload()
+
+    SprintKitServer().run()
+
+
+if __name__ == "__main__":
+    main()
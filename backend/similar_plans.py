@@ -0,0 +1,170 @@
+"""
+Near-duplicate project detection for Sprint Kit.
+Students in one class often describe the same assignment in slightly different
+words. A MinHash signature of each request's text plus an LSH (banding) index
+finds a close-enough earlier request in well under a millisecond, so its
+Claude plan can be reused instead of making another call.
+
+Held in memory per process, bounded (least recently used entries go first).
+"""
+
+import json
+import re
+import threading
+import zlib
+from collections import OrderedDict
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, punctuation and extra spaces removed."""
+    return _NON_WORD.sub(" ", (text or "").lower()).strip()
+
+
+def shingles(text: str, size: int = 5) -> set:
+    """Character shingles of the normalized text (robust to small edits and typos)."""
+    text = normalize_text(text)
+    if len(text) < size:
+        return {text} if text else set()
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+class MinHashIndex:
+    """
+    MinHash + LSH index of {scope, text} -> value.
+
+    Only entries with the same scope (e.g. type, experience and team size) can match.
+    A match needs an estimated Jaccard similarity of at least threshold;
+    bands x rows = num_perm, and the banding lets candidates be found by a few dict lookups.
+    """
+
+    def __init__(self, num_perm: int = 64, bands: int = 16, threshold: float = 0.7, max_entries: int = 2000, seed: int = 1):
+        import numpy as np
+
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        rng = np.random.default_rng(seed)
+        # Multiply-shift hashing: (a * x + b) mod 2**64, top 32 bits (a odd)
+        self._a = rng.integers(0, 1 << 63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._b = rng.integers(0, 1 << 63, size=num_perm, dtype=np.uint64)
+        self._np = np
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.max_entries = max_entries
+
+        self._entries = OrderedDict()  # id -> (scope, signature, band keys, value)
+        self._buckets = {}  # band key -> set of ids
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def signature(self, text: str):
+        """MinHash signature (num_perm uint64 values), or None for empty text."""
+        np = self._np
+        grams = shingles(text)
+        if not grams:
+            return None
+        hashes = np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+        return ((np.outer(self._a, hashes) + self._b[:, None]) >> np.uint64(32)).min(axis=1)
+
+    def _band_keys(self, scope, signature) -> list:
+        return [
+            (scope, band, signature[band * self.rows:(band + 1) * self.rows].tobytes())
+            for band in range(self.bands)
+        ]
+
+    def add(self, scope, text: str, value):
+        """Index text under scope. Evicts the least recently used entry when full."""
+        signature = self.signature(text)
+        if signature is None:
+            return
+        keys = self._band_keys(scope, signature)
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (scope, signature, keys, value)
+            for key in keys:
+                self._buckets.setdefault(key, set()).add(entry_id)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, entry_id):
+        _, _, keys, _ = self._entries.pop(entry_id)
+        for key in keys:
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._buckets[key]
+
+    def query(self, scope, text: str):
+        """
+        Most similar indexed entry with the same scope.
+
+        Returns: (estimated similarity, value) or None if nothing reaches threshold
+        """
+        signature = self.signature(text)
+        if signature is None:
+            return None
+        keys = self._band_keys(scope, signature)
+        with self._lock:
+            candidates = set()
+            for key in keys:
+                candidates.update(self._buckets.get(key, ()))
+            best_id, best = None, 0.0
+            for entry_id in candidates:
+                similarity = float((self._entries[entry_id][1] == signature).mean())
+                if similarity > best:
+                    best_id, best = entry_id, similarity
+            if best_id is None or best < self.threshold:
+                return None
+            self._entries.move_to_end(best_id)
+            return best, self._entries[best_id][3]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+def _request_text(project_title: str, project_description: str, goal: str = '', brainstorm_ideas: str = '') -> str:
+    # Goal and brainstorm are part of what the plan was built from, so they count too
+    return " | ".join(part for part in (project_title, project_description, goal, brainstorm_ideas) if part)
+
+
+class SimilarPlanCache:
+    """Claude plans keyed by near-duplicate request text within (type, experience, team size)."""
+
+    def __init__(self, threshold: float = 0.7, max_entries: int = 2000):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._index = None
+        self._lock = threading.Lock()
+
+    @property
+    def index(self) -> MinHashIndex:
+        """Built on first use, so numpy isn't loaded until there's a plan to remember."""
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    self._index = MinHashIndex(threshold=self.threshold, max_entries=self.max_entries)
+        return self._index
+
+    def find(self, project_title, project_description, project_type, experience_level, team_size, goal='', brainstorm_ideas=''):
+        """A copy of the plan for a near-duplicate earlier request, or None."""
+        if self._index is None:
+            return None  # nothing remembered yet
+        match = self.index.query(
+            (project_type, experience_level, str(team_size)),
+            _request_text(project_title, project_description, goal, brainstorm_ideas)
+        )
+        return json.loads(match[1]) if match else None
+
+    def add(self, tasks, project_title, project_description, project_type, experience_level, team_size, goal='', brainstorm_ideas=''):
+        """Remember a validated plan (stored serialized, so later changes to tasks don't leak in)."""
+        self.index.add(
+            (project_type, experience_level, str(team_size)),
+            _request_text(project_title, project_description, goal, brainstorm_ideas),
+            json.dumps(tasks, separators=(",", ":"))
+        )
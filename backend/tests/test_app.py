@@ -0,0 +1,330 @@
+"""
+Tests for the Flask API endpoints.
+pytest test file - run with: pytest tests/test_app.py -v
+"""
+
+import io
+import os
+import subprocess
+import sys
+import threading
+import time
+import zipfile
+from concurrent.futures import Future
+import pytest
+import app as app_module
+from pdf_export import PdfRenderPool
+from result_store import ByteCache, ResultStore
+
+PROJECT = {
+    "title": "Popsicle Bridge",
+    "goals": {"goal": "Hold 5 kg"},
+    "team_members": ["Ana"],
+    "tasks": [{"name": "=Sketch", "hours": 2, "difficulty": "Easy", "assigned_to": "Ana"}],
+    "timeline": {"total_hours": 2, "deadline": "2026-11-02"}
+}
+
+BREAKDOWN_REQUEST = {
+    "project_title": "Popsicle Bridge",
+    "project_description": "Build a bridge that holds 5 kg",
+    "project_type": "hardware",
+    "mode": "instant"
+}
+
+
+@pytest.fixture
+def client():
+    app_module.app.config["TESTING"] = True
+    return app_module.app.test_client()
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class BrokenTitlePool(PdfRenderPool):
+    """Renders on the calling thread; projects titled "Broken..." fail and "Slow..." wait for self.gate."""
+
+    def __init__(self, processes, max_queue):
+        super().__init__(processes, max_queue)
+        self.gate = Future()
+
+    def submit(self, project_data, slot_wait=0):
+        if str(project_data.get("title", "")).startswith("Slow"):
+            return self.gate
+        if str(project_data.get("title", "")).startswith("Broken"):
+            future = Future()
+            future.set_exception(ValueError("Could not generate PDF"))
+            return future
+        return super().submit(project_data, slot_wait)
+
+
+@pytest.fixture
+def pdf_pool(monkeypatch):
+    """Render PDFs on the calling thread, with an empty export cache."""
+    pool = BrokenTitlePool(0, 4)
+    monkeypatch.setattr(app_module, "_pdf_pool", pool)
+    monkeypatch.setattr(app_module, "_export_cache", ByteCache(1024 * 1024))
+    yield pool
+    if not pool.gate.done():
+        pool.gate.set_result(b"%PDF-slow")
+
+
+@pytest.fixture
+def job_clock(monkeypatch):
+    """Fresh export job stores; the finished-job TTL (60 s) runs on the returned clock."""
+    clock = FakeClock()
+    monkeypatch.setattr(app_module, "_export_jobs", ResultStore(60, 10, clock=clock, max_bytes=1024 * 1024,
+                                                                size_of=lambda job: len(job.get("result") or b"")))
+    monkeypatch.setattr(app_module, "_active_export_jobs", {})
+    return clock
+
+
+@pytest.fixture
+def claude_calls(monkeypatch):
+    """Stub the Claude-backed breakdown and record its calls."""
+    calls = []
+
+    def generate(**context):
+        calls.append(context)
+        return {"tasks": [{"task": "Claude task", "hours": 1, "difficulty": "Easy"}], "source": "claude", "message": None}
+
+    monkeypatch.setattr(app_module, "generate_tasks_with_context", generate)
+    return calls
+
+
+class TestInstantBreakdown:
+    """Test the bounded background upgrade of instant plans."""
+
+    def test_upgrade_reaches_revision_1(self, client, claude_calls):
+        plan = client.post("/api/projects/break-down", json=BREAKDOWN_REQUEST).get_json()
+        assert plan["status"] == "pending"
+        upgraded = client.get(f"/api/projects/break-down/{plan['revision_token']}?after=0&wait=5").get_json()
+        assert upgraded["revision"] == 1
+        assert upgraded["source"] == "claude"
+        assert len(claude_calls) == 1
+
+    def test_full_queue_skips_upgrade(self, client, claude_calls, monkeypatch):
+        """With no free slot the starter plan is final and Claude isn't queued."""
+        monkeypatch.setattr(app_module, "_breakdown_slots", threading.BoundedSemaphore(1))
+        app_module._breakdown_slots.acquire()
+        plan = client.post("/api/projects/break-down", json=BREAKDOWN_REQUEST).get_json()
+        assert plan["status"] == "done"
+        assert plan["revision"] == 0
+        assert client.get(f"/api/projects/break-down/{plan['revision_token']}").status_code == 200
+        assert claude_calls == []
+
+    def test_waiters_limited(self, client, monkeypatch):
+        """With every waiter slot taken, a long poll answers at once instead of holding a thread."""
+        token = "waiting-token"
+        app_module._breakdown_results.put(token, {"revision_token": token, "revision": 0, "status": "pending"})
+        monkeypatch.setattr(app_module, "_breakdown_waiters", threading.BoundedSemaphore(1))
+        app_module._breakdown_waiters.acquire()
+        started = time.monotonic()
+        response = client.get(f"/api/projects/break-down/{token}?after=0&wait=5")
+        assert time.monotonic() - started < 1
+        assert response.get_json()["revision"] == 0
+        app_module._breakdown_waiters.release()
+        started = time.monotonic()
+        client.get(f"/api/projects/break-down/{token}?after=0&wait=0.2")
+        assert time.monotonic() - started >= 0.2
+
+    def test_expired_token_skipped(self, claude_calls, monkeypatch):
+        """An upgrade whose plan expired while queued never calls Claude, and frees its slot."""
+        slots = threading.BoundedSemaphore(1)
+        monkeypatch.setattr(app_module, "_breakdown_slots", slots)
+        slots.acquire()
+        app_module._upgrade_breakdown("expired-token", dict(BREAKDOWN_REQUEST))
+        assert claude_calls == []
+        assert app_module._breakdown_results.get("expired-token") is None
+        assert slots.acquire(blocking=False)
+
+
+class TestExportEndpoint:
+    """Test format choice and conditional requests on /api/projects/export."""
+
+    def test_pdf_by_default(self, client, pdf_pool):
+        response = client.post("/api/projects/export", json=PROJECT)
+        assert response.status_code == 200
+        assert response.mimetype == "application/pdf"
+        assert response.data.startswith(b"%PDF")
+
+    def test_render_timeout_is_503(self, client, pdf_pool, monkeypatch):
+        """A render that never finishes gets 503 + Retry-After, not a 500."""
+        monkeypatch.setattr(app_module, "PDF_RENDER_TIMEOUT_SECONDS", 0.1)
+        response = client.post("/api/projects/export", json=dict(PROJECT, title="Slow Bridge"))
+        assert response.status_code == 503
+        assert int(response.headers["Retry-After"]) > 0
+
+    def test_accept_header_picks_format(self, client):
+        response = client.post("/api/projects/export", json=PROJECT, headers={"Accept": "text/markdown"})
+        assert response.status_code == 200
+        assert response.mimetype == "text/markdown"
+        assert response.get_data(as_text=True).startswith("# Popsicle Bridge\n")
+
+    def test_format_query_beats_accept(self, client):
+        response = client.post("/api/projects/export?format=csv", json=PROJECT, headers={"Accept": "text/markdown"})
+        assert response.mimetype == "text/csv"
+        assert 'filename="Popsicle_Bridge_plan.csv"' in response.headers["Content-Disposition"]
+        assert "'=Sketch" in response.get_data(as_text=True)
+
+    def test_unknown_format(self, client):
+        assert client.post("/api/projects/export?format=xls", json=PROJECT).status_code == 400
+
+    def test_not_modified(self, client, pdf_pool):
+        """A matching If-None-Match gets 304 with no body, for text formats and PDF alike."""
+        for query in ("?format=json", ""):
+            etag = client.post(f"/api/projects/export{query}", json=PROJECT).headers["ETag"]
+            response = client.post(f"/api/projects/export{query}", json=PROJECT, headers={"If-None-Match": etag})
+            assert response.status_code == 304
+            assert response.data == b""
+        changed = dict(PROJECT, title="Other Bridge")
+        assert client.post("/api/projects/export?format=json", json=changed, headers={"If-None-Match": etag}).status_code == 200
+
+
+class TestBatchExport:
+    """Test the streamed ZIP from /api/export/batch."""
+
+    def export(self, client, titles):
+        response = client.post("/api/export/batch", json={"projects": [dict(PROJECT, title=title) for title in titles]})
+        assert response.status_code == 200
+        assert response.mimetype == "application/zip"
+        return zipfile.ZipFile(io.BytesIO(response.data))
+
+    def test_zip_entries(self, client, pdf_pool):
+        archive = self.export(client, ["Bridge A", "Bridge B"])
+        assert sorted(archive.namelist()) == ["01_Bridge_A_plan.pdf", "02_Bridge_B_plan.pdf"]
+        assert all(archive.read(name).startswith(b"%PDF") for name in archive.namelist())
+
+    def test_failed_render_listed(self, client, pdf_pool):
+        """The other PDFs are still sent; the failed one is named in export_errors.txt."""
+        archive = self.export(client, ["Bridge A", "Broken Bridge"])
+        assert sorted(archive.namelist()) == ["01_Bridge_A_plan.pdf", "export_errors.txt"]
+        assert "02_Broken_Bridge_plan.pdf: could not be created" in archive.read("export_errors.txt").decode("utf-8")
+
+    def test_bad_request(self, client):
+        assert client.post("/api/export/batch", json={"projects": []}).status_code == 400
+        assert client.post("/api/export/batch", json={"projects": [{"title": ""}]}).status_code == 400
+
+
+class TestExportJobs:
+    """Test the background export job lifecycle."""
+
+    def start(self, client, title="Popsicle Bridge", export_format="pdf"):
+        response = client.post("/api/export/jobs", json={"project": dict(PROJECT, title=title), "format": export_format})
+        assert response.status_code == 202
+        return response.get_json()
+
+    def wait_finished(self, client, job):
+        for _ in range(100):
+            status = client.get(job["status_url"]).get_json()
+            if status["status"] in ("done", "failed"):
+                return status
+            time.sleep(0.05)
+        raise AssertionError("export job didn't finish")
+
+    def test_status_then_download(self, client, pdf_pool, job_clock):
+        job = self.start(client)
+        assert job["status"] == "queued"
+        assert "result" not in job
+        status = self.wait_finished(client, job)
+        assert status["status"] == "done"
+        assert status["expires_at"]
+        download = client.get(job["download_url"])
+        assert download.status_code == 200
+        assert download.data.startswith(b"%PDF")
+        assert "Popsicle_Bridge_plan.pdf" in download.headers["Content-Disposition"]
+
+    def test_one_project_batch_is_zip(self, client, pdf_pool, job_clock):
+        """A "projects" list with a single project still gives a ZIP, like /api/export/batch."""
+        response = client.post("/api/export/jobs", json={"projects": [PROJECT]})
+        assert response.status_code == 202
+        job = response.get_json()
+        assert job["format"] == "zip"
+        assert self.wait_finished(client, job)["status"] == "done"
+        download = client.get(job["download_url"])
+        assert download.mimetype == "application/zip"
+        assert zipfile.ZipFile(io.BytesIO(download.data)).namelist() == ["01_Popsicle_Bridge_plan.pdf"]
+
+    def test_not_ready_and_never_expires_while_running(self, client, pdf_pool, job_clock):
+        """A running job answers 409 on download and outlives the TTL until it finishes."""
+        job = self.start(client, title="Slow Bridge")
+        assert client.get(job["download_url"]).status_code == 409
+        job_clock.now += 3600
+        assert client.get(job["status_url"]).get_json()["status"] in ("queued", "running")
+        pdf_pool.gate.set_result(b"%PDF-slow")
+        assert self.wait_finished(client, job)["status"] == "done"
+        assert client.get(job["download_url"]).data == b"%PDF-slow"
+
+    def test_expired_after_ttl(self, client, pdf_pool, job_clock):
+        job = self.start(client, export_format="md")
+        self.wait_finished(client, job)
+        job_clock.now += 61
+        assert client.get(job["status_url"]).status_code == 404
+        assert client.get(job["download_url"]).status_code == 404
+
+    def test_failed_job(self, client, pdf_pool, job_clock):
+        job = self.start(client, title="Broken Bridge")
+        status = self.wait_finished(client, job)
+        assert status["status"] == "failed"
+        assert status["error"]
+        download = client.get(job["download_url"])
+        assert download.status_code == 409
+        assert download.get_json()["status"] == "failed"
+
+    def test_queue_full(self, client, pdf_pool, job_clock, monkeypatch):
+        """Past EXPORT_JOB_MAX_PENDING active jobs, new ones get 503 + Retry-After."""
+        monkeypatch.setattr(app_module, "EXPORT_JOB_MAX_PENDING", 1)
+        self.start(client, title="Slow Bridge")
+        response = client.post("/api/export/jobs", json={"project": PROJECT})
+        assert response.status_code == 503
+        assert int(response.headers["Retry-After"]) > 0
+
+    def test_oversized_result_failed(self, client, pdf_pool, job_clock, monkeypatch):
+        """A file bigger than EXPORT_JOB_MAX_RESULT_BYTES isn't kept; the job fails instead."""
+        monkeypatch.setattr(app_module, "EXPORT_JOB_MAX_RESULT_BYTES", 10)
+        status = self.wait_finished(client, self.start(client, export_format="json"))
+        assert status["status"] == "failed"
+        assert "too big" in status["error"]
+
+
+class TestSchoolCalendar:
+    """Test where holiday date errors are reported."""
+
+    def test_bad_request_holiday_is_400(self, client):
+        response = client.post("/api/projects/validate-timeline", json={
+            "tasks": [{"hours": 2}], "deadline_date": "2026-12-01", "holidays": ["next tuesday"]
+        })
+        assert response.status_code == 400
+        assert response.get_json()["error"] == "Invalid holiday dates"
+
+    def test_bad_school_holidays_setting_fails_startup(self):
+        """A malformed SCHOOL_HOLIDAYS stops the app at import, naming the setting."""
+        env = dict(os.environ, SCHOOL_HOLIDAYS="2026-11-26,winter break", STARTUP_WARMUP="off")
+        result = subprocess.run([sys.executable, "-c", "import app"], env=env, capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        assert result.returncode != 0
+        assert "Invalid SCHOOL_HOLIDAYS setting" in result.stderr
+
+
+class TestTimelineEstimateEdits:
+    """Test batched edits on a live timeline estimate."""
+
+    def test_failed_batch_changes_nothing(self, client):
+        created = client.post("/api/projects/timeline-estimates", json={
+            "tasks": [{"hours": 3, "assigned_to": "Ana"}], "deadline_days": 5
+        }).get_json()
+        url = f"/api/projects/timeline-estimates/{created['estimate_id']}"
+        response = client.patch(url, json={"edits": [
+            {"op": "add", "task": {"hours": 2, "assigned_to": "Ben"}},
+            {"op": "add", "task": {"hours": 2, "assigned_to": ["Ben"]}}
+        ]})
+        assert response.status_code == 400
+        assert response.get_json()["revision"] == 0
+        edited = client.patch(url, json={"op": "update", "id": "0", "task": {"hours": 4}}).get_json()
+        assert edited["revision"] == 1
+        assert edited["results"][0]["changed"]["total_hours"] == 4
@@ -4,14 +4,26 @@ pytest test file - run with: pytest tests/test_core_logic.py -v
 """
 
 import pytest
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from core_logic import (
     validate_project,
     validate_task_clarity,
     validate_success_criteria,
     validate_timeline,
+    simulate_timeline_risk,
+    schedule_tasks,
+    get_availability_calendar,
+    parse_holidays,
+    TimelineEstimate,
     validate_team_balance,
-    award_badges
+    suggest_balanced_assignment,
+    award_badges,
+    award_badges_batch,
+    award_badges_for_reflection,
+    compile_badge_rules,
+    evaluate_badges,
+    match_badge_keywords,
+    BADGE_RULES
 )
 
 
@@ -120,6 +132,233 @@ class TestTimeline:
         assert result["realistic"] == False
 
 
+class TestTimelineRisk:
+    """Test Monte Carlo timeline risk."""
+
+    def test_plenty_of_time_is_likely(self):
+        """A small plan with lots of time should almost surely finish."""
+        tasks = [{"hours": 2, "difficulty": "Easy"}, {"hours": 3, "difficulty": "Medium"}]
+        result = simulate_timeline_risk(tasks, available_hours=40, hours_per_day=2)
+        assert result["probability_on_time"] > 0.99
+        assert result["p50_hours"] <= result["p90_hours"]
+
+    def test_harder_and_less_experienced_is_riskier(self):
+        """Hard tasks and beginners should lower the chance of finishing on time."""
+        easy = [{"hours": 4, "difficulty": "Easy"}] * 3
+        hard = [{"hours": 4, "difficulty": "Hard"}] * 3
+        assert (
+            simulate_timeline_risk(hard, 14, 2, "beginner")["probability_on_time"]
+            < simulate_timeline_risk(easy, 14, 2, "advanced")["probability_on_time"]
+        )
+
+    def test_same_plan_same_answer(self):
+        """Results should be reproducible for the same plan."""
+        tasks = [{"hours": 5, "difficulty": "Hard"}]
+        assert simulate_timeline_risk(tasks, 6, 2) == simulate_timeline_risk(tasks, 6, 2)
+
+    def test_validate_timeline_includes_forecast(self):
+        """validate_timeline should report the risk forecast."""
+        deadline = (datetime.now() + timedelta(days=7)).isoformat()
+        result = validate_timeline([{"hours": 2}, {"hours": 2}], deadline)
+        assert 0 <= result["forecast"]["probability_on_time"] <= 1
+        assert result["forecast"]["p90_date"] >= result["forecast"]["p50_date"]
+
+
+class TestAvailabilityCalendar:
+    """Test the school-day availability calendar."""
+
+    # A Monday
+    START = date(2026, 11, 23)
+
+    def test_weekends_have_no_hours(self):
+        """A full week has five school days of hours."""
+        calendar = get_availability_calendar(start=self.START)
+        assert calendar.hours_between(self.START, self.START + timedelta(days=7)) == 10
+        assert calendar.work_days_between(self.START, self.START + timedelta(days=7)) == 5
+        assert calendar.hours_between(date(2026, 11, 28), date(2026, 11, 30)) == 0
+
+    def test_holidays_and_breaks_skipped(self):
+        """Holidays and inclusive break ranges are days off."""
+        calendar = get_availability_calendar(holidays=["2026-11-26..2026-11-27"], start=self.START)
+        assert calendar.hours_between(self.START, self.START + timedelta(days=7)) == 6
+        assert len(parse_holidays(["2026-12-21..2027-01-01"])) == 12
+        with pytest.raises(ValueError):
+            parse_holidays(["not a date"])
+
+    def test_parsed_holidays_reused(self):
+        """Already parsed dates can be passed back in (e.g. startup holidays plus a request's)."""
+        parsed = parse_holidays(["2026-11-26..2026-11-27"])
+        assert parse_holidays(parsed | parse_holidays(["2026-11-23"])) == parsed | {self.START}
+        calendar = get_availability_calendar(holidays=parsed, start=self.START)
+        assert calendar.hours_between(self.START, self.START + timedelta(days=7)) == 6
+
+    def test_student_hours_by_weekday(self):
+        """Students can set their own hours, including weekends."""
+        calendar = get_availability_calendar({"saturday": 4, "monday": 0}, start=self.START)
+        assert calendar.hours_between(self.START, self.START + timedelta(days=7)) == 12
+        with pytest.raises(ValueError):
+            get_availability_calendar({"someday": 1}, start=self.START)
+
+    def test_date_after_hours(self):
+        """Finishing dates skip weekends."""
+        calendar = get_availability_calendar(start=self.START)
+        assert calendar.date_after_hours(2) == self.START
+        assert calendar.date_after_hours(12) == date(2026, 11, 30)
+        assert calendar.work_day(5) == date(2026, 11, 30)
+
+    def test_validate_timeline_uses_calendar(self):
+        """A deadline over a holiday week has fewer hours available."""
+        today = date.today()
+        deadline = (datetime.now() + timedelta(days=14)).isoformat()
+        tasks = [{"hours": 2}]
+        normal = validate_timeline(tasks, deadline)
+        days_off = [(today + timedelta(days=i)).isoformat() for i in range(7)]
+        calendar = get_availability_calendar(holidays=days_off, start=today)
+        with_break = validate_timeline(tasks, deadline, calendar=calendar)
+        assert with_break["available_hours"] < normal["available_hours"]
+        assert with_break["school_days"] == 5
+
+    def test_schedule_gets_dates(self):
+        """Scheduled work days map onto school days."""
+        calendar = get_availability_calendar(start=self.START)
+        tasks = [{"id": "a", "hours": 6, "assigned_to": "Alex"}, {"id": "b", "hours": 6, "depends_on": ["a"], "assigned_to": "Alex"}]
+        result = schedule_tasks(tasks, calendar=calendar)
+        assert result["finish_date"] == "2026-11-30"
+        assert result["tasks"][1]["start_date"] == "2026-11-26"
+        assert [day["date"] for day in result["members"]["Alex"]][3:6] == ["2026-11-26", "2026-11-27", "2026-11-30"]
+
+
+class TestTimelineEstimate:
+    """Test incremental timeline updates."""
+
+    def make_estimate(self):
+        tasks = [{"hours": 3, "assigned_to": "Alex"}, {"hours": 4, "assigned_to": "Jordan"}]
+        return TimelineEstimate(tasks, available_hours=10)
+
+    def test_update_returns_only_changes(self):
+        """Changing one task's hours reports the new total and that member's load."""
+        estimate = self.make_estimate()
+        result = estimate.apply({"op": "update", "id": "0", "task": {"hours": 5}})
+        assert result["changed"]["total_hours"] == 9
+        assert "status" not in result["changed"]
+        assert result["loads"] == {"Alex": 5}
+
+    def test_status_changes_with_edits(self):
+        """Adding too much work flips the status; removing it flips it back."""
+        estimate = self.make_estimate()
+        added = estimate.apply({"op": "add", "task": {"hours": 8, "assigned_to": "Sam"}})
+        assert added["changed"]["status"] == "too_tight"
+        assert added["changed"]["realistic"] == False
+        removed = estimate.apply({"op": "remove", "id": added["id"]})
+        assert removed["changed"]["status"] == "tight"
+        assert removed["loads"] == {"Sam": 0}
+
+    def test_reassign_moves_load(self):
+        """Reassigning a task moves its hours between members."""
+        estimate = self.make_estimate()
+        result = estimate.apply({"op": "update", "id": "1", "task": {"assigned_to": "Alex"}})
+        assert result["loads"] == {"Alex": 7, "Jordan": 0}
+        assert result["changed"] == {}
+
+    def test_matches_full_recompute(self):
+        """Running totals should match recomputing from scratch."""
+        estimate = self.make_estimate()
+        for hours in range(1, 50):
+            estimate.apply({"op": "update", "id": "0", "task": {"hours": hours / 10}})
+        assert estimate.snapshot() == TimelineEstimate(
+            [{"hours": 4.9, "assigned_to": "Alex"}, {"hours": 4, "assigned_to": "Jordan"}], 10
+        ).snapshot() | {"revision": 49}
+
+    def test_invalid_edits_rejected(self):
+        """Bad hours and unknown tasks don't change the totals."""
+        estimate = self.make_estimate()
+        with pytest.raises(ValueError):
+            estimate.apply({"op": "update", "id": "0", "task": {"hours": 0}})
+        with pytest.raises(KeyError):
+            estimate.apply({"op": "remove", "id": "99"})
+        assert estimate.snapshot()["total_hours"] == 7
+
+    def test_bad_assignee_rejected_cleanly(self):
+        """A non-name assigned_to (e.g. a list) is refused before any totals change."""
+        estimate = self.make_estimate()
+        before = estimate.snapshot()
+        with pytest.raises(ValueError):
+            estimate.apply({"op": "add", "task": {"hours": 2, "assigned_to": ["Alex"]}})
+        with pytest.raises(ValueError):
+            estimate.apply({"op": "update", "id": "0", "task": {"assigned_to": {"name": "Sam"}}})
+        assert estimate.snapshot() == before
+        with pytest.raises(ValueError):
+            TimelineEstimate([{"hours": 1, "assigned_to": 7}], 10)
+
+    def test_batch_all_or_nothing(self):
+        """If one edit in a batch fails, the earlier ones are rolled back too."""
+        estimate = self.make_estimate()
+        before = estimate.snapshot()
+        with pytest.raises(KeyError):
+            estimate.apply_all([
+                {"op": "add", "task": {"hours": 2, "assigned_to": "Sam"}},
+                {"op": "update", "id": "0", "task": {"hours": 1, "assigned_to": "Jordan"}},
+                {"op": "remove", "id": "1"},
+                {"op": "remove", "id": "99"}
+            ])
+        assert estimate.snapshot() == before
+        assert estimate.apply({"op": "add", "task": {"hours": 1}})["id"] == "2"
+        estimate.apply({"op": "remove", "id": "2"})
+        results = estimate.apply_all([{"op": "add", "task": {"hours": 2, "assigned_to": "Sam"}}, {"op": "remove", "id": "1"}])
+        assert [r["revision"] for r in results] == [3, 4]
+        assert estimate.snapshot()["loads"] == {"Alex": 3, "Sam": 2}
+
+
+class TestSchedule:
+    """Test dependency-aware scheduling."""
+
+    def make_plan(self):
+        return [
+            {"id": "plan", "task": "Plan", "hours": 2, "assigned_to": "Alex"},
+            {"id": "buy", "task": "Buy parts", "hours": 1, "depends_on": ["plan"], "assigned_to": "Jordan"},
+            {"id": "build", "task": "Build", "hours": 6, "depends_on": ["plan", "buy"], "assigned_to": "Alex"},
+            {"id": "poster", "task": "Poster", "hours": 2, "depends_on": ["plan"], "assigned_to": "Jordan"},
+            {"id": "test", "task": "Test", "hours": 2, "depends_on": ["build", "poster"], "assigned_to": "Jordan"}
+        ]
+
+    def test_critical_path(self):
+        """Longest dependency chain should be the critical path."""
+        result = schedule_tasks(self.make_plan())
+        assert result["critical_path"] == ["plan", "buy", "build", "test"]
+        assert result["critical_path_days"] == 5.5
+
+        poster = next(t for t in result["tasks"] if t["id"] == "poster")
+        assert poster["critical"] == False
+        assert poster["slack"] > 0
+
+    def test_dependencies_respected(self):
+        """No task should start before everything it depends on is finished."""
+        result = schedule_tasks(self.make_plan(), capacity={"Alex": 3, "Jordan": 1})
+        finish = {t["id"]: t["scheduled_finish"] for t in result["tasks"]}
+        for task in result["tasks"]:
+            for dep in next(p for p in self.make_plan() if p["id"] == task["id"]).get("depends_on", []):
+                assert task["scheduled_start"] >= finish[dep]
+
+    def test_daily_capacity_respected(self):
+        """Nobody should be scheduled for more than their hours per day."""
+        result = schedule_tasks(self.make_plan(), capacity={"Alex": 3, "Jordan": 1})
+        for day in result["members"]["Alex"]:
+            assert day["hours"] <= 3
+        for day in result["members"]["Jordan"]:
+            assert day["hours"] <= 1
+
+    def test_parallel_work_shortens_timeline(self):
+        """Independent tasks for different people should run at the same time."""
+        tasks = [{"hours": 4, "assigned_to": name} for name in ["Alex", "Jordan", "Sam"]]
+        assert schedule_tasks(tasks)["days_needed"] == 2
+
+    def test_cycle_rejected(self):
+        """Circular dependencies can't be scheduled."""
+        tasks = [{"id": "a", "hours": 1, "depends_on": ["b"]}, {"id": "b", "hours": 1, "depends_on": ["a"]}]
+        with pytest.raises(ValueError):
+            schedule_tasks(tasks)
+
+
 class TestTeamBalance:
     """Test team workload distribution."""
     
@@ -146,6 +385,37 @@ class TestTeamBalance:
         assert result["balanced"] == False
         assert result["warning"] is not None
 
+    def test_hours_outweigh_task_count(self):
+        """One big task should count as much work as several small ones."""
+        tasks = [{"task": "Build the robot", "hours": 6, "difficulty": "Medium"}] + [
+            {"task": f"Small job {i}", "hours": 1, "difficulty": "Medium"} for i in range(5)
+        ]
+        assignments = {"0": "Alex", "1": "Jordan", "2": "Jordan", "3": "Jordan", "4": "Jordan", "5": "Jordan"}
+        result = validate_team_balance(assignments, tasks)
+        assert result["balanced"] == True
+
+        assignments["1"] = "Alex"
+        assignments["2"] = "Alex"
+        result = validate_team_balance(assignments, tasks)
+        assert result["balanced"] == False
+        assert result["suggested_moves"][0]["from"] == "Alex"
+        assert result["suggested_moves"][0]["to"] == "Jordan"
+
+    def test_idle_team_member_gets_work(self):
+        """Team members with no tasks should receive suggested moves."""
+        tasks = [{"task": f"Task {i}", "hours": 2, "difficulty": "Easy"} for i in range(4)]
+        assignments = {"0": "Alex", "1": "Alex", "2": "Jordan", "3": "Jordan"}
+        result = validate_team_balance(assignments, tasks, team_members=["Alex", "Jordan", "Sam"])
+        assert result["balanced"] == False
+        assert any(move["to"] == "Sam" for move in result["suggested_moves"])
+
+    def test_suggestion_is_near_optimal(self):
+        """Suggested plan should be close to a perfect split."""
+        efforts = {i: float(h) for i, h in enumerate([8, 7, 6, 5, 4, 4, 3, 3, 2, 2, 1, 1])}
+        current = {i: "A" for i in efforts}
+        plan = suggest_balanced_assignment(efforts, current, ["A", "B", "C"])
+        assert max(plan["loads"].values()) <= sum(efforts.values()) / 3 + 1
+
 
 class TestBadges:
     """Test badge award logic."""
@@ -187,3 +457,84 @@ class TestBadges:
         badges = award_badges(reflection, tasks_edited=True, timeline_accuracy=0.9)
         
         assert len(badges) >= 2
+
+
+class TestBadgeRules:
+    """Test the table-driven badge rule engine."""
+
+    def test_single_pass_finds_all_badges(self):
+        """One scan should find keywords for every badge."""
+        hits = match_badge_keywords("We split the work and my teammate helped")
+        assert hits == {"break_it_down", "team_player"}
+
+    def test_overlapping_keywords_not_hidden(self):
+        """A keyword inside another badge's keyword should still count."""
+        rules = [
+            {"id": "a", "name": "A", "reason": "a", "emoji": "", "keywords": ["breakthrough"]},
+            {"id": "b", "name": "B", "reason": "b", "emoji": "", "keywords": ["through"]}
+        ]
+        assert match_badge_keywords("what a breakthrough", compile_badge_rules(rules)) == {"a", "b"}
+
+    def test_new_rule_is_data_only(self):
+        """Adding a badge should only need a new rule row."""
+        rules = BADGE_RULES + [{
+            "id": "researcher",
+            "name": "Researcher",
+            "reason": "You found good sources.",
+            "emoji": "🔎",
+            "keywords": ["source", "cited"]
+        }]
+        badges = evaluate_badges("We cited three sources", timeline_accuracy=2.0, matcher=compile_badge_rules(rules))
+        assert [b["name"] for b in badges] == ["Researcher"]
+
+    def test_answers_need_substantive_reflection(self):
+        """NEW format keyword badges need more than 20 characters."""
+        badges = award_badges(["Q1"], ["team"], tasks_edited=True, timeline_accuracy=2.0)
+        assert badges == []
+
+    def test_both_formats_same_engine(self):
+        """NEW and OLD reflection payloads should award the same badges."""
+        new_format = award_badges_for_reflection(
+            {"prompts": ["Q1", "Q2"], "answers": ["We broke it into steps", "and worked together"]},
+            timeline_accuracy=1.0
+        )
+        old_format = award_badges_for_reflection(
+            {"went_well": "We broke it into steps", "was_hard": "", "learned": "and worked together"},
+            timeline_accuracy=1.0
+        )
+        assert new_format == old_format
+        assert [b["name"] for b in new_format] == ["I Can Break It Down", "Team Player", "Planner Power"]
+
+
+class TestBadgeBatch:
+    """Test class-wide badge evaluation."""
+
+    def test_matrix_matches_single_reflection(self):
+        """Each matrix row should match awarding badges one at a time."""
+        reflections = [
+            {"prompts": ["Q1"], "answers": ["We split the work into small steps"]},
+            {"went_well": "My teammate helped", "was_hard": "", "learned": ""},
+            "It was okay",
+            {"prompts": ["Q1"], "answers": ["team"]}
+        ]
+        tasks_edited = [False, True, False, True]
+        accuracy = [1.0, 2.0, 0.9, 1.1]
+
+        result = award_badges_batch(reflections, tasks_edited, accuracy)
+
+        assert result["total"] == 4
+        for i, row in enumerate(result["matrix"]):
+            earned = [name for name, hit in zip(result["badges"], row) if hit]
+            single = award_badges_for_reflection(reflections[i], tasks_edited[i], accuracy[i])
+            assert earned == [b["name"] for b in single]
+
+    def test_class_counts(self):
+        """Counts should total each badge column."""
+        reflections = ["we worked together as a team"] * 3 + ["It was okay"]
+        result = award_badges_batch(reflections, timeline_accuracy=[1.0, 1.0, 3.0, "bad"])
+        assert result["counts"] == {"I Can Break It Down": 0, "Team Player": 3, "Planner Power": 2}
+
+    def test_mismatched_columns_rejected(self):
+        """Every reflection needs its own tasks_edited and accuracy value."""
+        with pytest.raises(ValueError):
+            award_badges_batch(["a", "b"], tasks_edited=[True])
@@ -0,0 +1,94 @@
+"""
+Tests for the lightweight export formats.
+pytest test file - run with: pytest tests/test_export_formats.py -v
+"""
+
+import csv
+import io
+import json
+import subprocess
+import sys
+from export_formats import EXPORT_FORMATS, export_mimetypes, find_export_format
+
+PROJECT = {
+    "title": "Bridge, big; test",
+    "goals": {"goal": "Hold 5 kg"},
+    "team_members": ["Ana", "Ben"],
+    "tasks": [
+        {"name": "Sketch | plan", "hours": 2, "difficulty": "Easy", "assigned_to": "Ana",
+         "start_date": "2026-10-20", "finish_date": "2026-10-21"},
+        {"name": "Build", "hours": 4, "difficulty": "Hard", "assigned_to": "Ben"}
+    ],
+    "timeline": {"total_hours": 6, "deadline": "2026-11-02"},
+    "reflection": {"prompts": ["What surprised you?"], "answers": ["Glue takes long"]},
+    "insights": ["Test early"],
+    "badges": [{"name": "Team Player", "reason": "Shared the work"}]
+}
+
+
+def render(name: str, project: dict = PROJECT) -> str:
+    return "".join(EXPORT_FORMATS[name].render(project))
+
+
+class TestFormatRegistry:
+    """Test picking a format by name, extension or mimetype."""
+
+    def test_find_format(self):
+        assert find_export_format("md") == "markdown"
+        assert find_export_format("text/csv") == "csv"
+        assert find_export_format("PDF") == "pdf"
+        assert find_export_format("xls") is None
+
+    def test_pdf_is_default_mimetype(self):
+        assert export_mimetypes()[0] == "application/pdf"
+
+    def test_no_reportlab_import(self):
+        """The text formats never load the PDF library."""
+        code = "import sys, export_formats; sys.exit('reportlab' in sys.modules)"
+        assert subprocess.run([sys.executable, "-c", code]).returncode == 0
+
+
+class TestFormats:
+    """Test each format's output."""
+
+    def test_markdown(self):
+        text = render("markdown")
+        assert text.startswith("# Bridge, big; test\n")
+        assert "| Sketch \\| plan | 2 | Easy | Ana |" in text
+        assert "**What surprised you?**\n\nGlue takes long" in text
+        assert "- **Team Player:** Shared the work" in text
+
+    def test_csv(self):
+        rows = list(csv.reader(io.StringIO(render("csv"))))
+        assert rows[0][:4] == ["name", "hours", "difficulty", "assigned_to"]
+        assert rows[1] == ["Sketch | plan", "2", "Easy", "Ana", "2026-10-20", "2026-10-21"]
+        assert len(rows) == 3
+
+    def test_csv_formulas_neutralized(self):
+        """Cells a spreadsheet would run as a formula are prefixed with '."""
+        names = ["=HYPERLINK(\"http://x\")", "+1+1", "-2+3", "@SUM(A1)", "\tTab", "\rReturn", "Plain - text"]
+        project = dict(PROJECT, tasks=[{"name": name, "hours": 1, "assigned_to": "=cmd"} for name in names])
+        rows = list(csv.reader(io.StringIO(render("csv", project), newline="")))
+        assert [row[0] for row in rows[1:]] == ["'" + name for name in names[:-1]] + ["Plain - text"]
+        assert all(row[3] == "'=cmd" for row in rows[1:])
+        assert rows[1][1] == "1"
+
+    def test_json_is_canonical(self):
+        """Same plan, same text, whatever the key order."""
+        reordered = dict(reversed(list(PROJECT.items())))
+        assert render("json", reordered) == render("json")
+        assert json.loads(render("json")) == PROJECT
+
+    def test_ics_events(self):
+        """One event per scheduled task plus the deadline, with escaped text."""
+        text = render("ics")
+        assert text.startswith("BEGIN:VCALENDAR\r\n")
+        assert text.count("BEGIN:VEVENT") == 2
+        assert "DTSTART;VALUE=DATE:20261020\r\nDTEND;VALUE=DATE:20261022" in text
+        assert "SUMMARY:Deadline: Bridge\\, big\\; test" in text
+
+    def test_ics_long_lines_folded(self):
+        project = dict(PROJECT, title="A" * 200)
+        lines = render("ics", project).split("\r\n")
+        assert all(len(line.encode("utf-8")) <= 75 for line in lines)
+        assert any(line.startswith(" ") for line in lines)
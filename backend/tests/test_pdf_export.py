@@ -0,0 +1,158 @@
+"""
+Tests for PDF export.
+pytest test file - run with: pytest tests/test_pdf_export.py -v
+"""
+
+import io
+import time
+import zipfile
+from concurrent.futures import Future, ThreadPoolExecutor
+import pytest
+
+pytest.importorskip("reportlab")
+
+from pdf_export import (  # noqa: E402
+    WARMUP_PROJECT,
+    TASK_TABLE_CHUNK_ROWS,
+    PdfRenderPool,
+    RenderPoolBusy,
+    export_etag,
+    export_filename,
+    get_pdf_renderer,
+    iter_zip,
+    warm_pdf_renderer
+)
+
+
+class TestPdfRenderer:
+    """Test the shared PDF renderer."""
+
+    def test_renders_pdf(self):
+        """A project becomes a PDF."""
+        pdf = get_pdf_renderer().render(dict(WARMUP_PROJECT, title="Bridge"))
+        assert pdf.startswith(b"%PDF")
+
+    def test_buffer_ready_to_stream(self):
+        """The buffer starts at the beginning and holds the whole PDF."""
+        buffer = get_pdf_renderer().render_to_buffer(WARMUP_PROJECT)
+        assert buffer.tell() == 0
+        assert buffer.getbuffer().nbytes == len(buffer.read())
+
+    def test_built_once_per_process(self):
+        """Every export uses the same renderer."""
+        assert warm_pdf_renderer()
+        assert get_pdf_renderer() is get_pdf_renderer()
+
+    def test_concurrent_exports(self):
+        """Shared styles and headings are safe across threads."""
+        renderer = get_pdf_renderer()
+        projects = [dict(WARMUP_PROJECT, title=f"Project {i}") for i in range(8)]
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            pdfs = list(pool.map(renderer.render, projects))
+        assert all(pdf.startswith(b"%PDF") for pdf in pdfs)
+        # Same layout as rendering one at a time
+        assert [len(pdf) for pdf in pdfs] == [len(renderer.render(p)) for p in projects]
+
+
+class TestExportEtag:
+    """Test content addressing of exports."""
+
+    def test_key_order_does_not_matter(self):
+        """The same project sent with keys in another order has the same ETag."""
+        reordered = dict(reversed(list(WARMUP_PROJECT.items())))
+        assert export_etag(reordered) == export_etag(WARMUP_PROJECT)
+
+    def test_changes_change_etag(self):
+        """Any edit, or another format, gives a new ETag."""
+        edited = dict(WARMUP_PROJECT, title="Edited")
+        assert export_etag(edited) != export_etag(WARMUP_PROJECT)
+        assert export_etag(WARMUP_PROJECT, "csv") != export_etag(WARMUP_PROJECT)
+
+
+class TestPdfRenderPool:
+    """Test rendering in separate processes with backpressure."""
+
+    def test_renders_in_process_pool(self):
+        """Project data goes to a render process and PDF bytes come back."""
+        pool = PdfRenderPool(processes=1, max_queue=1)
+        try:
+            pdf = pool.render(dict(WARMUP_PROJECT, title="Pool"), timeout=60)
+        finally:
+            pool.shutdown()
+        assert pdf.startswith(b"%PDF")
+
+    def test_rejects_when_saturated(self):
+        """Once processes + queue are all taken, new renders are turned away."""
+        pool = PdfRenderPool(processes=0, max_queue=0)
+        assert pool._slots.acquire(blocking=False)
+        with pytest.raises(RenderPoolBusy):
+            pool.render(WARMUP_PROJECT)
+        pool._slots.release()
+        assert pool.render(WARMUP_PROJECT).startswith(b"%PDF")
+
+
+class TestBatchExport:
+    """Test rendering many projects into a streamed ZIP."""
+
+    def test_render_many_returns_every_project(self):
+        """Each project comes back once, tagged with its index."""
+        pool = PdfRenderPool(processes=0, max_queue=2)
+        projects = [dict(WARMUP_PROJECT, title=f"Student {i}") for i in range(3)]
+        results = dict(pool.render_many(projects))
+        assert sorted(results) == [0, 1, 2]
+        assert all(pdf.startswith(b"%PDF") for pdf in results.values())
+
+    def test_render_many_timeouts(self):
+        """A stuck render times out on its own; once the batch deadline passes, the rest do too."""
+        class StuckPool(PdfRenderPool):
+            def submit(self, project_data, slot_wait=0):
+                if project_data["title"] == "Stuck":
+                    return Future()  # never finishes
+                return super().submit(project_data, slot_wait)
+
+        pool = StuckPool(processes=0, max_queue=2)
+        projects = [dict(WARMUP_PROJECT, title=title) for title in ("Fine", "Stuck", "Fine too")]
+        results = dict(pool.render_many(projects, timeout=0.1))
+        assert isinstance(results[1], TimeoutError)
+        assert results[0].startswith(b"%PDF") and results[2].startswith(b"%PDF")
+
+        started = time.monotonic()
+        results = dict(pool.render_many(projects, total_timeout=0.2))
+        assert time.monotonic() - started < 5
+        assert isinstance(results[1], TimeoutError)
+        assert isinstance(results[2], TimeoutError)
+
+    def test_zip_streams_file_by_file(self):
+        """Every added file produces a chunk, and the chunks form a valid archive."""
+        chunks = list(iter_zip([("a.pdf", b"%PDF-a"), ("b.pdf", b"%PDF-b")]))
+        assert len(chunks) == 3
+        archive = zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+        assert archive.namelist() == ["a.pdf", "b.pdf"]
+        assert archive.read("b.pdf") == b"%PDF-b"
+
+    def test_export_filename(self):
+        """Titles become safe, numbered file names."""
+        assert export_filename("My Bridge / Project!", 2) == "03_My_Bridge_Project_plan.pdf"
+        assert export_filename("", None) == "project_plan.pdf"
+
+
+class TestLargeTaskLists:
+    """Test the chunked task table layout."""
+
+    def test_tasks_split_into_chunks_with_header(self):
+        """Every chunk starts with the header row and repeats it on new pages."""
+        rows = [[f"Task {i}", "1", "Easy", "A"] for i in range(TASK_TABLE_CHUNK_ROWS * 2 + 5)]
+        tables = get_pdf_renderer().task_tables(rows)
+        assert len(tables) == 3
+        assert all(table.repeatRows == 1 for table in tables)
+        assert sum(len(table._cellvalues) - 1 for table in tables) == len(rows)
+        assert tables[2]._cellvalues[0] == ['Task', 'Hours', 'Difficulty', 'Assigned To']
+
+    def test_no_tasks_still_has_header(self):
+        """An empty plan shows just the header row."""
+        assert len(get_pdf_renderer().task_tables([])) == 1
+
+    def test_renders_many_tasks(self):
+        """A plan with hundreds of tasks spans pages and still renders."""
+        tasks = [{"name": f"Task {i}", "hours": 1, "difficulty": "Easy", "assigned_to": "A"} for i in range(300)]
+        assert get_pdf_renderer().render(dict(WARMUP_PROJECT, tasks=tasks)).startswith(b"%PDF")
@@ -0,0 +1,64 @@
+"""
+Tests for the precomputed plan library.
+pytest test file - run with: pytest tests/test_plan_library.py -v
+"""
+
+import pytest
+from plan_library import (
+    PlanLibrary,
+    load_plan_library,
+    normalize_team_size,
+    write_plan_library
+)
+
+
+PLAN = [{"task": "Sketch the design", "hours": 2, "difficulty": "Easy"}]
+
+
+class TestPlanLibrary:
+    """Test writing, memory-mapping and reading plans."""
+
+    @pytest.fixture
+    def library_path(self, tmp_path):
+        path = str(tmp_path / "plans.bin")
+        write_plan_library(path, {
+            ("hardware", "beginner", "1"): PLAN,
+            ("event", "advanced", "4+"): PLAN * 3
+        }, {"model": "test"})
+        return path
+
+    def test_round_trip(self, library_path):
+        """Plans come back exactly as written."""
+        library = PlanLibrary(library_path)
+        assert len(library) == 2
+        assert library.get("hardware", "beginner", "1") == PLAN
+        assert len(library.get("event", "advanced", "4+")) == 3
+        assert library.get("software", "beginner", "1") is None
+        assert library.metadata == {"model": "test"}
+        library.close()
+
+    def test_team_sizes_normalized(self, library_path):
+        """Exact team counts map onto the library's sizes."""
+        library = PlanLibrary(library_path)
+        assert library.get("event", "advanced", "6") is not None
+        assert normalize_team_size("3") == "2-3"
+        assert normalize_team_size("") == "1"
+        library.close()
+
+    def test_every_get_is_a_new_list(self, library_path):
+        """Changing a returned plan doesn't change the library."""
+        library = PlanLibrary(library_path)
+        tasks = library.get("hardware", "beginner", "1")
+        tasks[0]["hours"] = 99
+        assert library.get("hardware", "beginner", "1") == PLAN
+        library.close()
+
+    def test_missing_or_bad_file(self, tmp_path):
+        """The server runs without a library rather than failing."""
+        assert load_plan_library(str(tmp_path / "missing.bin")) is None
+        bad = tmp_path / "bad.bin"
+        bad.write_bytes(b"not a library")
+        assert load_plan_library(str(bad)) is None
+        empty = tmp_path / "empty.bin"
+        empty.write_bytes(b"")
+        assert load_plan_library(str(empty)) is None
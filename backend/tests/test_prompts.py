@@ -0,0 +1,70 @@
+"""
+Tests for Sprint Kit prompt templates and fallback plans.
+pytest test file - run with: pytest tests/test_prompts.py -v
+"""
+
+import pytest
+from prompts import (
+    build_fallback_plan,
+    get_fallback_tasks,
+    FALLBACK_TASKS_BY_TYPE
+)
+
+
+class TestFallbackPlan:
+    """Test the scaled fallback plan (no Claude call)."""
+
+    def total_hours(self, tasks):
+        return sum(task["hours"] for task in tasks)
+
+    def test_templates_cannot_be_changed(self):
+        """Callers get copies; the templates themselves are read-only."""
+        tasks = get_fallback_tasks("hardware")
+        tasks[0]["hours"] = 99
+        tasks.clear()
+        assert get_fallback_tasks("hardware")[0]["hours"] == 1
+        with pytest.raises(TypeError):
+            FALLBACK_TASKS_BY_TYPE["hardware"][0]["hours"] = 99
+
+    def test_fresh_plan_every_call(self):
+        """Same inputs give equal plans, but never the same objects."""
+        first = build_fallback_plan("software", "beginner", "2-3", "Make a quiz game")
+        second = build_fallback_plan("software", "beginner", "2-3", "Make a quiz game")
+        assert first == second
+        assert first is not second
+        assert all(a is not b for a, b in zip(first, second))
+
+    def test_scales_with_experience(self):
+        """Beginners get more hours and smaller pieces than advanced teams."""
+        beginner = build_fallback_plan("hardware", "beginner")
+        advanced = build_fallback_plan("hardware", "advanced")
+        assert self.total_hours(beginner) > self.total_hours(advanced)
+        assert len(beginner) > len(advanced)
+        assert any("(part 1)" in task["task"] for task in beginner)
+
+    def test_teams_get_review_tasks(self):
+        """Each teammate gets a review task, plus a kickoff to split the work."""
+        solo = build_fallback_plan("event", "intermediate", "1")
+        team = build_fallback_plan("event", "intermediate", "4+")
+        reviews = [task for task in team if task["task"].startswith("Teammate")]
+        assert len(reviews) == 4
+        assert not any(task["task"].startswith("Teammate") for task in solo)
+        assert team[0]["task"].startswith("Split up the work")
+
+    def test_uses_goal_and_brainstorm(self):
+        """The student's goal words and brainstorm ideas show up in the plan."""
+        tasks = build_fallback_plan(
+            "hardware",
+            goal="A robot arm that stacks blocks",
+            brainstorm_ideas="- use servos\n- cardboard frame"
+        )
+        text = " ".join(task["task"] for task in tasks)
+        assert "robot" in text
+        assert "Try your idea: use servos" in text
+        assert "Try your idea: cardboard frame" in text
+
+    def test_unknown_values_fall_back(self):
+        """Unknown type or level still gives a usable plan."""
+        tasks = build_fallback_plan("spaceship", "expert", "lots")
+        assert len(tasks) >= 5
+        assert all(task["hours"] >= 1 for task in tasks)
@@ -0,0 +1,103 @@
+"""
+Tests for the short-lived result store.
+pytest test file - run with: pytest tests/test_result_store.py -v
+"""
+
+import threading
+from result_store import ByteCache, ResultStore
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestResultStore:
+    """Test TTL eviction, size limit and waiting for updates."""
+
+    def test_entries_expire(self):
+        """Entries disappear ttl_seconds after their last write."""
+        clock = FakeClock()
+        store = ResultStore(ttl_seconds=10, max_entries=100, clock=clock)
+        store.put("a", 1)
+        clock.now = 9
+        assert store.get("a") == 1
+        store.put("a", 2)
+        clock.now = 18
+        assert store.get("a") == 2
+        clock.now = 20
+        assert store.get("a") is None
+        assert len(store) == 0
+
+    def test_oldest_evicted_when_full(self):
+        """The least recently written entry goes first."""
+        store = ResultStore(ttl_seconds=60, max_entries=2)
+        store.put("a", 1)
+        store.put("b", 2)
+        store.put("a", 3)
+        store.put("c", 4)
+        assert store.get("b") is None
+        assert store.get("a") == 3
+        assert store.get("c") == 4
+
+    def test_bounded_by_total_size(self):
+        """With max_bytes, the oldest entries go once the values' total size is over it."""
+        store = ResultStore(ttl_seconds=60, max_entries=10, max_bytes=25, size_of=lambda job: len(job["result"]))
+        store.put("a", {"result": b"a" * 10})
+        store.put("b", {"result": b"b" * 10})
+        store.put("a", {"result": b"a" * 5})
+        assert store.size == 15
+        store.put("c", {"result": b"c" * 12})
+        assert store.get("b") is None
+        assert store.get("a") is not None and store.get("c") is not None
+        assert store.size == 17
+
+    def test_wait_for_update(self):
+        """A waiting reader wakes up when the value it wants is written."""
+        store = ResultStore(ttl_seconds=60, max_entries=10)
+        store.put("plan", {"revision": 0})
+        threading.Timer(0.05, store.put, args=("plan", {"revision": 1})).start()
+        value = store.wait_for("plan", lambda v: v["revision"] > 0, timeout=5)
+        assert value == {"revision": 1}
+
+    def test_wait_times_out_with_latest(self):
+        """If nothing changes, the current value comes back after the timeout."""
+        store = ResultStore(ttl_seconds=60, max_entries=10)
+        store.put("plan", {"revision": 0})
+        assert store.wait_for("plan", lambda v: v["revision"] > 0, timeout=0.01) == {"revision": 0}
+        assert store.wait_for("missing", lambda v: True, timeout=0.01) is None
+
+
+class TestByteCache:
+    """Test the size-bounded LRU byte cache."""
+
+    def test_hit_returns_same_bytes(self):
+        """Hits hand back the stored object itself (no copy)."""
+        cache = ByteCache(max_bytes=100)
+        value = b"x" * 10
+        cache.put("a", value)
+        assert cache.get("a") is value
+        assert cache.get("b") is None
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_bounded_by_total_size(self):
+        """Least recently used entries are evicted to stay under max_bytes."""
+        cache = ByteCache(max_bytes=25)
+        cache.put("a", b"a" * 10)
+        cache.put("b", b"b" * 10)
+        cache.get("a")
+        cache.put("c", b"c" * 10)
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.size == 20
+
+    def test_oversized_value_not_cached(self):
+        """A value bigger than the whole cache is skipped, not allowed to flush it."""
+        cache = ByteCache(max_bytes=25)
+        cache.put("a", b"a" * 10)
+        cache.put("big", b"x" * 30)
+        assert cache.get("big") is None
+        assert cache.get("a") is not None
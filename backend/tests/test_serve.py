@@ -0,0 +1,99 @@
+"""
+Tests for the production server settings.
+pytest test file - run with: pytest tests/test_serve.py -v
+"""
+
+import os
+import subprocess
+import sys
+import textwrap
+import pytest
+import serve
+from serve import post_fork, server_options, worker_exit
+
+# Preload like the gunicorn master, fork, then run the worker hooks in the child
+FORKED_WORKER_SCRIPT = textwrap.dedent("""
+    import os, sys, time
+    import serve, app, safety
+
+    serve.preload()
+    pid = os.fork()
+    if pid:
+        _, status = os.waitpid(pid, 0)
+        sys.exit(os.waitstatus_to_exitcode(status))
+
+    try:
+        serve.post_fork(None, None)
+        assert safety._keyword_watcher.is_alive(), "keyword watcher not restarted"
+        assert all(listener._thread.is_alive() for listener in safety._log_listeners), "log listener not restarted"
+
+        def slow_breakdown(**context):
+            time.sleep(0.2)
+            return {"tasks": [], "source": "claude", "message": None}
+
+        app.generate_tasks_with_context = slow_breakdown
+        app._breakdown_results.put("token", {"revision_token": "token", "revision": 0, "status": "pending"})
+        app._breakdown_slots.acquire()
+        app._breakdown_executor.submit(app._upgrade_breakdown, "token", {})
+        serve.worker_exit(None, None)
+        assert app._breakdown_results.get("token")["revision"] == 1, "background upgrade not drained"
+    except BaseException as e:
+        print(repr(e), file=sys.stderr)
+        os._exit(1)
+    os._exit(0)
+""")
+
+
+class TestServerOptions:
+    """Test the gunicorn settings for each worker model."""
+
+    def test_threaded_workers(self):
+        options = server_options("127.0.0.1:5000", 3, "threaded", 8)
+        assert options["worker_class"] == "gthread"
+        assert options["threads"] == 8
+        assert options["workers"] == 3
+        assert options["preload_app"] is True
+
+    def test_async_workers(self):
+        options = server_options("127.0.0.1:5000", 2, "async", 8)
+        assert options["worker_class"] == "gevent"
+        assert "threads" not in options
+
+    def test_hooks_installed(self):
+        """Forked workers restart their threads and drain on shutdown."""
+        options = server_options("127.0.0.1:5000", 2, "sync", 1)
+        assert options["post_fork"] is post_fork
+        assert options["worker_exit"] is worker_exit
+
+    def test_unknown_worker_class(self):
+        with pytest.raises(ValueError):
+            server_options("127.0.0.1:5000", 2, "tornado", 1)
+
+
+class TestPreload:
+    """Test the master's warm-up before fork."""
+
+    @pytest.mark.parametrize("mode, warm_ups", [("off", 1), ("background", 0), ("blocking", 0)])
+    def test_warm_up_once(self, monkeypatch, mode, warm_ups):
+        """preload runs warm_up only if the import didn't already start it, and always waits for it."""
+        import app
+        calls = []
+        monkeypatch.setattr(serve, "STARTUP_WARMUP", mode)
+        monkeypatch.setattr(app, "warm_up", lambda: calls.append("warm_up"))
+        monkeypatch.setattr(app, "wait_for_warm_up", lambda: calls.append("wait"))
+        assert serve.preload() is app.app
+        assert calls.count("warm_up") == warm_ups
+        assert len(calls) == 1
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="gunicorn workers are forked")
+class TestWorkerHooks:
+    """Smoke test the hooks in a real forked worker (in a separate interpreter)."""
+
+    def test_post_fork_and_worker_exit(self):
+        """After fork the worker's threads run again; on exit its background work finishes."""
+        env = dict(os.environ, STARTUP_WARMUP="off", PDF_RENDER_PROCESSES="0", PDF_WARMUP="false")
+        result = subprocess.run(
+            [sys.executable, "-c", FORKED_WORKER_SCRIPT], env=env, capture_output=True, text=True, timeout=60
+        )
+        assert result.returncode == 0, result.stderr
@@ -0,0 +1,55 @@
+"""
+Tests for near-duplicate plan reuse (MinHash + LSH).
+pytest test file - run with: pytest tests/test_similar_plans.py -v
+"""
+
+from similar_plans import MinHashIndex, SimilarPlanCache, shingles
+
+
+BRIDGE = "Build a bridge out of popsicle sticks that can hold as much weight as possible, then test it and present it"
+BRIDGE_REWORDED = "Build a bridge out of popsicle-sticks that can hold as much weight as possible and then test it and present it!"
+PLAN = [{"task": "Cut popsicle sticks", "hours": 2, "difficulty": "Easy"}]
+
+
+class TestSimilarPlans:
+    """Test near-duplicate lookups."""
+
+    def test_estimate_tracks_jaccard(self):
+        """MinHash agreement should be close to the true shingle overlap."""
+        index = MinHashIndex(num_perm=128, bands=32)
+        a, b = shingles(BRIDGE), shingles(BRIDGE_REWORDED)
+        jaccard = len(a & b) / len(a | b)
+        estimate = float((index.signature(BRIDGE) == index.signature(BRIDGE_REWORDED)).mean())
+        assert abs(estimate - jaccard) < 0.15
+
+    def test_reworded_request_reuses_plan(self):
+        """A slightly different description of the same assignment finds the plan."""
+        cache = SimilarPlanCache()
+        cache.add(PLAN, "Popsicle stick bridge", BRIDGE, "hardware", "beginner", "1")
+        assert cache.find("Popsicle-stick bridge", BRIDGE_REWORDED, "hardware", "beginner", "1") == PLAN
+
+    def test_different_project_or_context_misses(self):
+        """Other projects, and the same project for another level or team size, don't match."""
+        cache = SimilarPlanCache()
+        cache.add(PLAN, "Popsicle stick bridge", BRIDGE, "hardware", "beginner", "1")
+        assert cache.find("Volcano", "Make a baking soda volcano for the science fair", "hardware", "beginner", "1") is None
+        assert cache.find("Popsicle stick bridge", BRIDGE, "hardware", "advanced", "1") is None
+        assert cache.find("Popsicle stick bridge", BRIDGE, "hardware", "beginner", "4+") is None
+
+    def test_returns_copies(self):
+        """Editing a reused plan doesn't change what the next student gets."""
+        cache = SimilarPlanCache()
+        cache.add(PLAN, "Popsicle stick bridge", BRIDGE, "hardware", "beginner", "1")
+        tasks = cache.find("Popsicle stick bridge", BRIDGE, "hardware", "beginner", "1")
+        tasks[0]["hours"] = 99
+        assert cache.find("Popsicle stick bridge", BRIDGE, "hardware", "beginner", "1") == PLAN
+
+    def test_size_is_bounded(self):
+        """Oldest entries are evicted, along with their LSH buckets."""
+        index = MinHashIndex(max_entries=3)
+        for i in range(10):
+            index.add("scope", f"project number {i} about topic {i * 7919}", i)
+        assert len(index) == 3
+        assert index.query("scope", "project number 0 about topic 0") is None
+        assert index.query("scope", "project number 9 about topic 71271")[1] == 9
+        assert all(entry_id in index._entries for bucket in index._buckets.values() for entry_id in bucket)
@@ -0,0 +1,50 @@
+"""
+Cold-start benchmark: a fresh worker must be able to import the app quickly.
+pytest test file - run with: pytest tests/test_startup.py -v
+"""
+
+import os
+import subprocess
+import sys
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Seconds for `import app` in a fresh interpreter; timing depends on the machine,
+# so the budget check only runs when this is set (e.g. COLD_START_BUDGET_SECONDS=1.5)
+COLD_START_BUDGET_SECONDS = os.getenv("COLD_START_BUDGET_SECONDS")
+
+IMPORT_APP = """
+import sys, time
+start = time.perf_counter()
+import app
+elapsed = time.perf_counter() - start
+heavy = [name for name in ("anthropic", "numpy", "reportlab", "dotenv") if name in sys.modules]
+print(f"{elapsed}|{','.join(heavy)}")
+"""
+
+
+def cold_import(warm_up: str = "off"):
+    env = dict(os.environ, STARTUP_WARMUP=warm_up, ERROR_LOG_FILE=os.devnull)
+    result = subprocess.run([sys.executable, "-c", IMPORT_APP], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True, check=True)
+    elapsed, heavy = result.stdout.strip().splitlines()[-1].split("|")
+    return float(elapsed), [name for name in heavy.split(",") if name]
+
+
+class TestColdStart:
+    """Test that heavy dependencies stay off the import path."""
+
+    def test_heavy_modules_not_imported(self):
+        """The Claude SDK, numpy and reportlab load on first use or in warm-up, not at import."""
+        _, heavy = cold_import()
+        assert "anthropic" not in heavy
+        assert "numpy" not in heavy
+        assert "reportlab" not in heavy
+
+    @pytest.mark.skipif(not COLD_START_BUDGET_SECONDS, reason="set COLD_START_BUDGET_SECONDS to check import time")
+    def test_import_within_budget(self):
+        """Best of three fresh imports of app stays under COLD_START_BUDGET_SECONDS."""
+        budget = float(COLD_START_BUDGET_SECONDS)
+        best = min(cold_import()[0] for _ in range(3))
+        assert best < budget, f"import app took {best:.2f}s (budget {budget}s)"
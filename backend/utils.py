@@ -5,25 +5,42 @@ UPDATED: Pass methodology guidance to prompts for context-aware task generation.
 """
 
 import logging
+import logging.handlers
 import json
+import threading
+from datetime import date, timedelta
 from io import BytesIO
-from datetime import datetime
-from anthropic import Anthropic
 from config import (
     CLAUDE_API_KEY,
     CLAUDE_MODEL,
-    MAX_TOKENS
+    MAX_TOKENS,
+    REFINE_MAX_TOKENS,
+    ERROR_LOG_FILE,
+    ERROR_LOG_MAX_BYTES,
+    ERROR_LOG_BACKUP_COUNT,
+    PLAN_LIBRARY_FILE,
+    SCHOOL_HOLIDAYS,
+    SIMILAR_PLAN_MAX_ENTRIES,
+    SIMILAR_PLAN_REUSE,
+    SIMILAR_PLAN_THRESHOLD
 )
 from prompts import (
     DETECT_PROJECT_TYPE_PROMPT,
     TASK_BREAKDOWN_PROMPT,
+    TASK_REFINE_PROMPT,
     TIME_ESTIMATION_PROMPT,
     ADAPTIVE_REFLECTION_PROMPT,
     REFLECTION_INSIGHT_PROMPT,
-    get_fallback_tasks,
+    build_fallback_plan,
     get_methodology_guidance
 )
+from core_logic import get_availability_calendar, simulate_timeline_risk, timeline_status
+from pdf_export import get_pdf_renderer
+from plan_library import load_plan_library
+from similar_plans import SimilarPlanCache
 from safety import (
+    attach_queue_handler,
+    is_request_in_scope,
     validate_before_claude_call,
     validate_claude_response,
     handle_error_safely
@@ -31,17 +48,113 @@ from safety import (
 
 logger = logging.getLogger(__name__)
 
+_error_logging_ready = False
+
+
 def setup_error_logging():
-    """Log Claude failures with timestamp to local file."""
+    """
+    Log Claude failures with timestamp to a size-rotated local file.
+    Writes happen on a background listener thread, not the request thread.
+    Called once by the app at startup (importing this module doesn't create the handler).
+    """
+    global _error_logging_ready
+    if _error_logging_ready:
+        return
+    _error_logging_ready = True
     try:
-        handler = logging.FileHandler('claude_errors.log')
+        handler = logging.handlers.RotatingFileHandler(
+            ERROR_LOG_FILE,
+            maxBytes=ERROR_LOG_MAX_BYTES,
+            backupCount=ERROR_LOG_BACKUP_COUNT,
+            delay=True
+        )
         formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
         handler.setFormatter(formatter)
-        logger.addHandler(handler)
+        attach_queue_handler(logger, handler)
     except Exception as e:
         logger.warning(f"Could not setup file logging: {e}")
 
-setup_error_logging()
+
+# ===== CLAUDE CLIENT =====
+# The anthropic SDK takes over a second to import, so it's loaded on first use
+# (or by warm_claude_client during startup), not when this module is imported.
+
+_claude_client = None
+_claude_client_lock = threading.Lock()
+
+
+def get_claude_client():
+    """The Anthropic client for this process, created on first use and shared by all calls."""
+    global _claude_client
+    if _claude_client is None:
+        with _claude_client_lock:
+            if _claude_client is None:
+                from anthropic import Anthropic
+                _claude_client = Anthropic(api_key=CLAUDE_API_KEY)
+    return _claude_client
+
+
+def warm_claude_client():
+    """
+    Import the anthropic SDK now so the first Claude call doesn't pay for it.
+    Only the import: the client (and its connections) is created per process on
+    first use, so it's never shared across a fork.
+    """
+    import anthropic  # noqa: F401
+
+# Precomputed plans for generic requests (memory-mapped; None if not built)
+plan_library = load_plan_library(PLAN_LIBRARY_FILE)
+
+# Claude plans from recent requests, for near-duplicate descriptions of the same assignment
+similar_plans = SimilarPlanCache(SIMILAR_PLAN_THRESHOLD, SIMILAR_PLAN_MAX_ENTRIES) if SIMILAR_PLAN_REUSE else None
+
+
+def _is_generic_request(goal: str, brainstorm_ideas: str) -> bool:
+    """No goal or brainstorm yet: nothing a precomputed plan would miss."""
+    return not (goal or '').strip() and not (brainstorm_ideas or '').strip()
+
+
+def _fallback_text(text: str) -> str:
+    """Student text to work into a fallback plan, or '' if it failed the safety checks."""
+    if not (text or '').strip():
+        return ''
+    if not validate_before_claude_call(text)["safe"] or not is_request_in_scope(text)["in_scope"]:
+        return ''
+    return text
+
+
+def _fallback_plan(project_type: str, experience_level: str, team_size: str, goal: str, brainstorm_ideas: str) -> list:
+    """
+    build_fallback_plan with only the goal/brainstorm text that passed the safety checks.
+    The fallback is often used because Claude's pre-check rejected that text,
+    and it shouldn't end up in task names instead.
+    """
+    return build_fallback_plan(
+        project_type, experience_level, team_size, _fallback_text(goal), _fallback_text(brainstorm_ideas)
+    )
+
+
+def instant_task_plan(
+    project_type: str,
+    experience_level: str,
+    team_size: str,
+    goal: str = '',
+    brainstorm_ideas: str = ''
+) -> dict:
+    """
+    A plan available right now, without Claude: the library plan for generic
+    requests, otherwise the scaled fallback plan.
+
+    Returns: {"tasks": list, "source": "library" or "fallback"}
+    """
+    if plan_library is not None and _is_generic_request(goal, brainstorm_ideas):
+        tasks = plan_library.get(project_type, experience_level, team_size)
+        if tasks:
+            return {"tasks": tasks, "source": "library"}
+    return {
+        "tasks": _fallback_plan(project_type, experience_level, team_size, goal, brainstorm_ideas),
+        "source": "fallback"
+    }
 
 
 # ===== LAYER 1: PROJECT TYPE DETECTION =====
@@ -88,12 +201,35 @@ def generate_tasks_with_context(
     Uses methodology guidance to ensure tasks match project type.
     Now includes student's goal and brainstorm ideas for more specific task generation.
 
+    Generic requests (no goal or brainstorm) are answered from the plan library when it has the combination.
+    Near-duplicates of an earlier request (same type, experience, team size) reuse its Claude plan.
+
     Returns: {
         "tasks": list of task dicts,
-        "source": "claude" or "fallback",
+        "source": "claude", "library", "similar" or "fallback",
         "message": str or None
     }
     """
+    if plan_library is not None and _is_generic_request(goal, brainstorm_ideas):
+        tasks = plan_library.get(project_type, experience_level, team_size)
+        if tasks:
+            return {"tasks": tasks, "source": "library", "message": None}
+
+    request_context = dict(
+        project_title=project_title,
+        project_description=project_description,
+        project_type=project_type,
+        experience_level=experience_level,
+        team_size=team_size,
+        goal=goal,
+        brainstorm_ideas=brainstorm_ideas
+    )
+    if similar_plans is not None:
+        tasks = similar_plans.find(**request_context)
+        if tasks:
+            logger.info("Reusing plan from a near-duplicate request")
+            return {"tasks": tasks, "source": "similar", "message": None}
+
     # Get methodology guidance based on project type, experience, team size
     methodology_guidance = get_methodology_guidance(project_type, experience_level, team_size)
 
@@ -112,7 +248,7 @@ def generate_tasks_with_context(
     if not response["success"]:
         logger.warning(f"Task generation failed, using {project_type} fallback")
         return {
-            "tasks": get_fallback_tasks(project_type),
+            "tasks": _fallback_plan(project_type, experience_level, team_size, goal, brainstorm_ideas),
             "source": "fallback",
             "message": "Using template tasks. Edit them to match your project!"
         }
@@ -120,6 +256,9 @@ def generate_tasks_with_context(
     try:
         tasks = parse_json_response(response["data"])
         if isinstance(tasks, list) and len(tasks) > 0:
+            # Only well-formed plans are worth reusing
+            if similar_plans is not None and clean_generated_tasks(tasks) == tasks:
+                similar_plans.add(tasks, **request_context)
             return {
                 "tasks": tasks,
                 "source": "claude",
@@ -129,23 +268,110 @@ def generate_tasks_with_context(
         logger.error(f"Failed to parse tasks: {e}")
 
     return {
-        "tasks": get_fallback_tasks(project_type),
+        "tasks": _fallback_plan(project_type, experience_level, team_size, goal, brainstorm_ideas),
         "source": "fallback",
         "message": "Using template tasks. You can edit them!"
     }
 
 
+# ===== LAYER 2 (REFINE): REWRITE ONE TASK =====
+
+# Keep the project summary compact: names of a few other tasks, not the whole plan
+REFINE_MAX_OTHER_TASKS = 12
+REFINE_MAX_TASK_NAME = 60
+
+
+def clean_generated_tasks(tasks, count: int = None) -> list:
+    """Keep only well-formed {task, hours, difficulty} items (at most count, if given)."""
+    if not isinstance(tasks, list):
+        return []
+    cleaned = []
+    for item in tasks:
+        if not isinstance(item, dict) or not str(item.get("task", "")).strip():
+            continue
+        try:
+            hours = float(item.get("hours", 0))
+        except (ValueError, TypeError):
+            continue
+        if hours <= 0:
+            continue
+        difficulty = str(item.get("difficulty", "Medium")).capitalize()
+        cleaned.append({
+            "task": str(item["task"]).strip(),
+            "hours": int(hours) if hours == int(hours) else hours,
+            "difficulty": difficulty if difficulty in ("Easy", "Medium", "Hard") else "Medium"
+        })
+    return cleaned[:count]
+
+
+def refine_task(
+    task: dict,
+    project_title: str,
+    project_type: str,
+    experience_level: str,
+    team_size: str,
+    other_tasks: list = None,
+    feedback: str = '',
+    count: int = 1
+) -> dict:
+    """
+    Rewrite one task instead of regenerating the whole plan.
+    Sends only the task plus a short project summary, and caps the answer at REFINE_MAX_TOKENS.
+
+    Returns: {
+        "tasks": list of 1-count replacement tasks (the original task if Claude fails),
+        "source": "claude" or "original",
+        "message": str or None
+    }
+    """
+    names = [
+        str(t.get("task", ""))[:REFINE_MAX_TASK_NAME]
+        for t in (other_tasks or [])[:REFINE_MAX_OTHER_TASKS]
+        if isinstance(t, dict) and t.get("task")
+    ]
+
+    response = call_claude_safely(
+        TASK_REFINE_PROMPT,
+        max_tokens=REFINE_MAX_TOKENS,
+        project_title=project_title,
+        project_type=project_type,
+        experience_level=experience_level,
+        team_size=team_size,
+        other_tasks="; ".join(names) or "none yet",
+        task_json=json.dumps({k: task.get(k) for k in ("task", "hours", "difficulty") if k in task}),
+        feedback=feedback or "Make it clearer and more specific",
+        count=count
+    )
+
+    if response["success"]:
+        tasks = clean_generated_tasks(parse_json_response(response["data"]), count)
+        if tasks:
+            return {"tasks": tasks, "source": "claude", "message": None}
+        logger.error("Refined task response had no usable tasks")
+    else:
+        logger.warning("Task refine failed, keeping the original task")
+
+    return {
+        "tasks": [task],
+        "source": "original",
+        "message": "Couldn't rewrite this task right now. You can edit it yourself!"
+    }
+
+
 # ===== LAYER 2B: TIME ESTIMATION (Context-Aware) =====
 
 def estimate_timeline_with_context(
     tasks: list,
     deadline_days: int,
     experience_level: str,
-    team_size: str
+    team_size: str,
+    calendar=None
 ) -> dict:
     """
     Estimate if timeline is realistic based on experience and team size.
     Accounts for parallel work with larger teams and capacity based on experience.
+    Available hours come from the school calendar (default: SCHOOL_HOLIDAYS, 2h per
+    school day), so weekends and holidays don't count as work days.
 
     Returns: {
         "total_hours": int,
@@ -154,7 +380,8 @@ def estimate_timeline_with_context(
         "status": "good/tight/too_tight",
         "message": str,
         "suggestion": str or None,
-        "explanation": str (HOW we calculated this)
+        "explanation": str (HOW we calculated this),
+        "forecast": Monte Carlo risk (see core_logic.simulate_timeline_risk) or None
     }
     """
     response = call_claude_safely(
@@ -193,15 +420,28 @@ def estimate_timeline_with_context(
                 "explanation": "Unable to calculate at this time."
             }
 
-        # Add transparency explanation
+        # Available time from the calendar (weekends and holidays off), not days x hours
+        today = date.today()
+        calendar = calendar or get_availability_calendar(holidays=SCHOOL_HOLIDAYS, start=today)
+        end = today + timedelta(days=max(deadline_days, 1))
+        available = calendar.hours_between(today, end)
+        school_days = calendar.work_days_between(today, end)
         total = result.get("total_hours", 0)
-        available = result.get("available_hours", 0)
-        exp_level = experience_level.capitalize()
-        hours_per_day = available // deadline_days if deadline_days > 0 else 0
+        result["available_hours"] = round(available, 2)
+        result["status"], result["message"] = timeline_status(float(total), available)
+        result["realistic"] = result["status"] in ["good", "tight"]
 
-        explanation = f"You have {deadline_days} days. For {exp_level.lower()}s, that's {hours_per_day}h per day = {available}h total. Your tasks = {total}h."
+        # Add transparency explanation
+        result["explanation"] = (
+            f"You have {deadline_days} days, {school_days} of them school days with time for project work. "
+            f"That's {available:g}h total. Your tasks = {total}h."
+        )
 
-        result["explanation"] = explanation
+        # Chance of actually finishing, given how far off estimates usually are
+        if available > 0:
+            result["forecast"] = simulate_timeline_risk(
+                tasks, available, experience_level=experience_level, calendar=calendar
+            )
         return result
     except Exception as e:
         logger.error(f"Failed to parse timeline: {e}")
@@ -276,11 +516,13 @@ def generate_adaptive_reflection_prompts(
 
 # ===== CLAUDE SAFETY WRAPPER =====
 
-def call_claude_safely(prompt_template: str, **kwargs) -> dict:
+def call_claude_safely(prompt_template: str, max_tokens: int = MAX_TOKENS, **kwargs) -> dict:
     """
     Call Claude with comprehensive safety checks before and after.
     This is the ONLY place Claude gets called. All safety happens here.
 
+    max_tokens caps the completion (small prompts can ask for small answers).
+
     Returns: {
         "success": bool,
         "data": str or None (Claude's response),
@@ -298,8 +540,9 @@ def call_claude_safely(prompt_template: str, **kwargs) -> dict:
             "user_message": "Prompt formatting error"
         }
 
-    # PRE-CALL: Check input safety
-    pre_validation = validate_before_claude_call(input_text)
+    # PRE-CALL: Check input safety - on the values filled in, not on our own
+    # template (its safety rules mention words like "ignore" on purpose)
+    pre_validation = validate_before_claude_call("\n".join(str(value) for value in kwargs.values()))
 
     if not pre_validation["safe"]:
         logger.warning(f"Pre-validation failed: {pre_validation['reason']}")
@@ -314,10 +557,9 @@ def call_claude_safely(prompt_template: str, **kwargs) -> dict:
         if not CLAUDE_API_KEY:
             raise ValueError("Claude API key not configured")
 
-        client = Anthropic(api_key=CLAUDE_API_KEY)
-        message = client.messages.create(
+        message = get_claude_client().messages.create(
             model=CLAUDE_MODEL,
-            max_tokens=MAX_TOKENS,
+            max_tokens=max_tokens,
             messages=[{"role": "user", "content": input_text}]
         )
         response_text = message.content[0].text
@@ -445,125 +687,13 @@ def parse_json_response(response_text: str) -> dict:
 
 def export_project_to_pdf(project_data: dict) -> bytes:
     """Generate PDF of completed project."""
-    try:
-        from reportlab.lib.pagesizes import letter
-        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
-        from reportlab.lib.units import inch
-        from reportlab.lib import colors
-        from datetime import datetime
-
-        pdf_buffer = BytesIO()
-        doc = SimpleDocTemplate(
-            pdf_buffer,
-            pagesize=letter,
-            topMargin=0.5*inch,
-            bottomMargin=0.5*inch,
-            leftMargin=0.5*inch,
-            rightMargin=0.5*inch
-        )
-        story = []
-        styles = getSampleStyleSheet()
-
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=24,
-            textColor=colors.HexColor('#1e40af'),
-            spaceAfter=12,
-            alignment=1
-        )
+    return export_project_to_pdf_buffer(project_data).getvalue()
 
-        heading_style = ParagraphStyle(
-            'CustomHeading',
-            parent=styles['Heading2'],
-            fontSize=14,
-            textColor=colors.HexColor('#1e40af'),
-            spaceAfter=10,
-            spaceBefore=12
-        )
-
-        story.append(Paragraph(f"<b>{project_data.get('title', 'Project Plan')}</b>", title_style))
-        story.append(Spacer(1, 0.2*inch))
-
-        goal = project_data.get('goals', {}).get('goal', 'N/A') if isinstance(project_data.get('goals', {}), dict) else 'N/A'
-        story.append(Paragraph(f"<b>Goal:</b> {goal}", styles['Normal']))
-
-        team = ", ".join(project_data.get('team_members', [])) or "Solo"
-        story.append(Paragraph(f"<b>Team:</b> {team}", styles['Normal']))
-        story.append(Paragraph(f"<b>Created:</b> {datetime.now().strftime('%B %d, %Y')}", styles['Normal']))
-        story.append(Spacer(1, 0.3*inch))
-
-        story.append(Paragraph("📋 Project Tasks", heading_style))
-
-        tasks_data = [['Task', 'Hours', 'Difficulty', 'Assigned To']]
-        for task in project_data.get('tasks', []):
-            tasks_data.append([
-                task.get('name', 'Unnamed'),
-                str(task.get('hours', '?')),
-                task.get('difficulty', 'Medium'),
-                task.get('assigned_to', 'Unassigned')
-            ])
-
-        tasks_table = Table(tasks_data, colWidths=[2.2*inch, 0.6*inch, 0.9*inch, 1.3*inch])
-        tasks_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1e40af')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('FONTSIZE', (0, 1), (-1, -1), 9)
-        ]))
-        story.append(tasks_table)
-        story.append(Spacer(1, 0.3*inch))
-
-        story.append(Paragraph("⏱️ Timeline", heading_style))
-        timeline = project_data.get('timeline', {})
-        if isinstance(timeline, dict):
-            story.append(Paragraph(f"<b>Expected Duration:</b> {timeline.get('total_hours', '?')} hours", styles['Normal']))
-            story.append(Paragraph(f"<b>Deadline:</b> {timeline.get('deadline', 'N/A')}", styles['Normal']))
-        story.append(Spacer(1, 0.3*inch))
-
-        story.append(Paragraph("🤔 What We Learned", heading_style))
-        reflection = project_data.get('reflection', {})
-        if isinstance(reflection, dict):
-            story.append(Paragraph(f"<b>What Went Well:</b>", styles['Normal']))
-            story.append(Paragraph(reflection.get('went_well', 'N/A'), styles['Normal']))
-            story.append(Spacer(1, 0.15*inch))
-
-            story.append(Paragraph(f"<b>What Was Hard:</b>", styles['Normal']))
-            story.append(Paragraph(reflection.get('was_hard', 'N/A'), styles['Normal']))
-            story.append(Spacer(1, 0.15*inch))
-
-            story.append(Paragraph(f"<b>What I Learned:</b>", styles['Normal']))
-            story.append(Paragraph(reflection.get('learned', 'N/A'), styles['Normal']))
-        story.append(Spacer(1, 0.3*inch))
-
-        insights = project_data.get('insights', [])
-        if insights and isinstance(insights, list):
-            story.append(Paragraph("💡 Key Insights", heading_style))
-            for insight in insights:
-                story.append(Paragraph(f"• {insight}", styles['Normal']))
-            story.append(Spacer(1, 0.2*inch))
-
-        badges = project_data.get('badges', [])
-        if badges and isinstance(badges, list):
-            story.append(Paragraph("🏆 Badges Earned", heading_style))
-            for badge in badges:
-                if isinstance(badge, dict):
-                    story.append(Paragraph(
-                        f"<b>{badge.get('name', 'Badge')}:</b> {badge.get('reason', '')}",
-                        styles['Normal']
-                    ))
-
-        doc.build(story)
-        pdf_buffer.seek(0)
-        return pdf_buffer.getvalue()
 
+def export_project_to_pdf_buffer(project_data: dict) -> BytesIO:
+    """Generate PDF of completed project, as a buffer ready to stream (no extra copies)."""
+    try:
+        return get_pdf_renderer().render_to_buffer(project_data)
     except Exception as e:
         logger.error(f"PDF generation failed: {e}")
         raise ValueError("Could not generate PDF")
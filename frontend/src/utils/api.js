@@ -64,7 +64,8 @@ export const api = {
   },
 
   // ===== LAYER 2: TASK BREAKDOWN (Context-Aware) =====
-  breakDownTasks: async (projectTitle, projectDescription, projectType, experienceLevel, teamSize, goal = '', brainstormIdeas = '') => {
+  // mode 'instant': returns a starter plan now plus a revision_token for getBreakdownRevision
+  breakDownTasks: async (projectTitle, projectDescription, projectType, experienceLevel, teamSize, goal = '', brainstormIdeas = '', mode = '') => {
     try {
       const response = await fetch(`${API_BASE}/api/projects/break-down`, {
         method: 'POST',
@@ -76,7 +77,45 @@ export const api = {
           experience_level: experienceLevel || 'beginner',
           team_size: teamSize || '1',
           goal: goal || '',
-          brainstorm_ideas: brainstormIdeas || ''
+          brainstorm_ideas: brainstormIdeas || '',
+          ...(mode ? { mode } : {})
+        })
+      });
+      const data = await response.json();
+      return { success: response.ok, data };
+    } catch (error) {
+      return handleApiError(error);
+    }
+  },
+
+  // Waits (up to waitSeconds) for a plan newer than afterRevision
+  getBreakdownRevision: async (revisionToken, afterRevision = 0, waitSeconds = 15) => {
+    try {
+      const response = await fetch(
+        `${API_BASE}/api/projects/break-down/${revisionToken}?after=${afterRevision}&wait=${waitSeconds}`
+      );
+      const data = await response.json();
+      return { success: response.ok, data };
+    } catch (error) {
+      return handleApiError(error);
+    }
+  },
+
+  // Rewrite one task (much cheaper than regenerating the whole plan)
+  refineTask: async (task, projectState, otherTasks = [], feedback = '', count = 1) => {
+    try {
+      const response = await fetch(`${API_BASE}/api/projects/tasks/refine`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({
+          task,
+          project_title: projectState.title,
+          project_type: projectState.project_type || 'other',
+          experience_level: projectState.experience_level || 'beginner',
+          team_size: projectState.team_size || '1',
+          other_tasks: otherTasks.map(t => ({ task: t.task })),
+          feedback,
+          count
         })
       });
       const data = await response.json();
@@ -127,6 +166,35 @@ export const api = {
     }
   },
 
+  // Live timeline: start once, then send single-task edits
+  createTimelineEstimate: async (tasks, deadlineDate) => {
+    try {
+      const response = await fetch(`${API_BASE}/api/projects/timeline-estimates`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ tasks, deadline_date: deadlineDate })
+      });
+      const data = await response.json();
+      return { success: response.ok, data };
+    } catch (error) {
+      return handleApiError(error);
+    }
+  },
+
+  editTimelineEstimate: async (estimateId, edits) => {
+    try {
+      const response = await fetch(`${API_BASE}/api/projects/timeline-estimates/${estimateId}`, {
+        method: 'PATCH',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ edits })
+      });
+      const data = await response.json();
+      return { success: response.ok, data };
+    } catch (error) {
+      return handleApiError(error);
+    }
+  },
+
   // Timeline validation (legacy)
   validateTimeline: async (tasks, deadlineDate) => {
     try {
@@ -146,12 +214,12 @@ export const api = {
   },
 
   // Team balance
-  validateTeamBalance: async (assignments) => {
+  validateTeamBalance: async (assignments, tasks, teamMembers) => {
     try {
       const response = await fetch(`${API_BASE}/api/projects/validate-team-balance`, {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ assignments })
+        body: JSON.stringify({ assignments, tasks, team_members: teamMembers })
       });
       const data = await response.json();
       return { success: response.ok, data };
@@ -221,6 +289,107 @@ export const api = {
       window.URL.revokeObjectURL(url);
       document.body.removeChild(a);
 
+      return { success: true };
+    } catch (error) {
+      return handleApiError(error);
+    }
+  },
+
+  // Export in another format: 'md', 'csv', 'json' or 'ics' (no PDF rendering)
+  exportAs: async (projectData, format) => {
+    try {
+      const response = await fetch(`${API_BASE}/api/projects/export?format=${encodeURIComponent(format)}`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(projectData)
+      });
+
+      if (!response.ok) throw new Error('Export failed');
+
+      const blob = await response.blob();
+      const url = window.URL.createObjectURL(blob);
+      const a = document.createElement('a');
+      a.href = url;
+      a.download = `${projectData.title || 'project'}_plan.${format}`;
+      document.body.appendChild(a);
+      a.click();
+      window.URL.revokeObjectURL(url);
+      document.body.removeChild(a);
+
+      return { success: true };
+    } catch (error) {
+      return handleApiError(error);
+    }
+  },
+
+  // Background export: pass { project, format } or { projects } (ZIP), then poll getExportJob
+  createExportJob: async (request) => {
+    try {
+      const response = await fetch(`${API_BASE}/api/export/jobs`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(request)
+      });
+      const data = await response.json();
+      return { success: response.ok, data };
+    } catch (error) {
+      return handleApiError(error);
+    }
+  },
+
+  getExportJob: async (jobId) => {
+    try {
+      const response = await fetch(`${API_BASE}/api/export/jobs/${jobId}`);
+      const data = await response.json();
+      return { success: response.ok, data };
+    } catch (error) {
+      return handleApiError(error);
+    }
+  },
+
+  downloadExportJob: async (job) => {
+    try {
+      const response = await fetch(`${API_BASE}${job.download_url}`);
+
+      if (!response.ok) throw new Error('Export not ready');
+
+      const blob = await response.blob();
+      const url = window.URL.createObjectURL(blob);
+      const a = document.createElement('a');
+      a.href = url;
+      a.download = job.filename;
+      document.body.appendChild(a);
+      a.click();
+      window.URL.revokeObjectURL(url);
+      document.body.removeChild(a);
+
+      return { success: true };
+    } catch (error) {
+      return handleApiError(error);
+    }
+  },
+
+  // Bulk export (teachers): one ZIP with every project's PDF
+  exportBatch: async (projects) => {
+    try {
+      const response = await fetch(`${API_BASE}/api/export/batch`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ projects })
+      });
+
+      if (!response.ok) throw new Error('Batch export failed');
+
+      const blob = await response.blob();
+      const url = window.URL.createObjectURL(blob);
+      const a = document.createElement('a');
+      a.href = url;
+      a.download = 'project_plans.zip';
+      document.body.appendChild(a);
+      a.click();
+      window.URL.revokeObjectURL(url);
+      document.body.removeChild(a);
+
       return { success: true };
     } catch (error) {
       return handleApiError(error);